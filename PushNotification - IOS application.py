@@ -1,8 +1,54 @@
-import time
-import schedule
-from datetime import datetime
+import logging
 
-print("--- SCRIPT STARTED EXECUTION (WEB SERVER MODE) ---", flush=True)
+from push_dispatch import DeadLetterStore, PushDispatcher
+from reminder_coalesce import ReminderCoalescer
+from reminder_engine import ReminderScheduler, daily_trigger
+from reminder_log import start_async_logging
+from reminder_metrics import MetricsRegistry, serve_metrics
+from reminder_shards import ShardStore, ShardWorker
+from reminder_store import DurableReminders, ReminderStore
+
+log = logging.getLogger("medminders.server")
+
+# HACKATHON DEMO MODE cycles through all reminders every 45 seconds.
+# Set to False for the real daily schedule. For load testing, run
+# reminder_simulation.py instead: it replays a whole day for a synthetic
+# population on a virtual clock in a few minutes.
+DEMO_MODE = True
+
+# SQLite job store for the daily schedule (e.g. "reminders.db"). With a store,
+# reminders survive restarts and ones missed while the script was down are
+# sent late (up to an hour); None keeps the schedule in memory only.
+JOB_STORE_PATH = None
+
+# Sharded mode: several copies of this script (on one or more hosts) share the
+# schedule in this SQLite file, split by user_id, and take over each other's
+# users if one dies. Each copy needs its own SHARD_WORKER_ID. Takes precedence
+# over JOB_STORE_PATH.
+SHARD_DATABASE = None
+SHARD_WORKER_ID = "worker-1"
+
+# Push endpoint to deliver to (e.g. "http://127.0.0.1:8787/push" with
+# mock_push_server.py running). Pushes are queued for PushDispatcher's worker
+# connections so the scheduler never waits on the network; None only logs them.
+PUSH_ENDPOINT = None
+PUSH_CONCURRENCY = 64
+# The provider's send quota (pushes per second), enforced on our side so peaks
+# are smoothed instead of answered with 429s; None for no limit.
+PUSH_RATE_LIMIT = None
+# Pushes that cannot be delivered (unregistered devices, or still failing after
+# retries) are kept here for follow-up; None keeps them in memory only.
+DEAD_LETTER_PATH = None
+PUSH_DISPATCHER = None  # started in main when PUSH_ENDPOINT is set
+
+# Port for the Prometheus metrics endpoint (http://127.0.0.1:<port>/metrics):
+# reminder fire lag, jobs per tick, push latency, queue depths and error
+# counts. None (the default) serves nothing; set a port to opt in.
+METRICS_PORT = None
+
+# Send one push per user per minute: reminders due together (e.g. a morning
+# Metformin and Vitamin D) are combined into a single message.
+COALESCE_REMINDERS = True
 
 # Global state for cycling (used in TEST MODE)
 MEDICATION_INDEX = 0
@@ -41,6 +87,12 @@ MEDICATION_SCHEDULES = [
     }
 ]
 
+# Each user's IANA time zone; reminders fire at their time_str in that zone.
+USER_TIME_ZONES = {
+    "user_12345": "America/New_York",
+    "user_67890": "Europe/London",
+}
+DEFAULT_TIME_ZONE = "UTC"
 
 # --- 2. Notification Functions (Simulated Push API Call) ---
 
@@ -53,13 +105,15 @@ def send_push_notification_api(user_id, title, message):
     # ⚠️ REAL-WORLD SERVER STEPS:
     # 1. Lookup the user's unique APNs Device Token using the user_id (stored in a database).
     # 2. Construct the APNs/FCM payload (a JSON dictionary).
-    # 3. Use the Python 'requests' library to POST the payload to the notification service endpoint.
+    # 3. POST the payload to the notification service endpoint (PushDispatcher does this
+    #    asynchronously; this function only queues the push).
+    if PUSH_DISPATCHER is not None:
+        # Never waits: with the queue full the push goes to the dead letters (and is logged there)
+        PUSH_DISPATCHER.submit(user_id, title, message, block=False, dead_letter_when_full=True)
+        return
 
     # Log the simulated push notification sent (server output)
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(
-        f"[{current_time}] PUSH API CALLED (Simulated) -> Target User: {user_id} | Title: {title} | Message: {message}",
-        flush=True)
+    log.info("PUSH API CALLED (Simulated) -> Target User: %s | Title: %s | Message: %s", user_id, title, message)
 
 
 def send_medication_notification(med_data):
@@ -69,19 +123,33 @@ def send_medication_notification(med_data):
     Args:
         med_data (dict): Contains medication and user details.
     """
-    med_name = med_data['med_name']
-    dosage = med_data['dosage']
-    time_of_day = med_data['time_of_day']
     user_id = med_data.get('user_id', 'unknown_user')
+    title, message = render_medication_notification([med_data])
 
-    title = f"Time for Medication: {time_of_day} Dose"
+    # Call the conceptual API function
+    send_push_notification_api(user_id, title, message)
+
+
+def render_medication_notification(med_list):
+    """
+    Builds the (title, message) of one push for one or more medications due
+    together (ReminderCoalescer hands over everything due for a user at once).
+    """
+    times_of_day = list(dict.fromkeys(med_data['time_of_day'] for med_data in med_list))
+    doses = [f"{med_data['dosage']} of {med_data['med_name']}" for med_data in med_list]
+
+    if len(med_list) == 1:
+        title = f"Time for Medication: {times_of_day[0]} Dose"
+    elif len(times_of_day) == 1:
+        title = f"Time for Medication: {times_of_day[0]} Doses"
+    else:
+        title = "Time for Medication"
+    listed = doses[0] if len(doses) == 1 else ", ".join(doses[:-1]) + f" and {doses[-1]}"
     message = (
-        f"Take your {dosage} of {med_name} now. "
+        f"Take your {listed} now. "
         "Don't forget to take it with food!"
     )
-
-    # Call the conceptual API function
-    send_push_notification_api(user_id, title, message)
+    return title, message
 
 
 def cycle_medication_notifications():
@@ -102,65 +170,101 @@ def cycle_medication_notifications():
 
 
 # --- 3. Scheduling Setup ---
-def setup_schedule():
-    """Reads the configuration and sets up all daily jobs."""
-    print("--- DEBUG: Starting setup_schedule function ---", flush=True)
+def setup_schedule(scheduler):
+    """Reads the configuration and sets up all daily jobs on the scheduler."""
+    log.debug("Starting setup_schedule function")
 
-    # --- ⚠️ HACKATHON DEMO MODE: REMINDER SET TO CYCLE EVERY 45 SECONDS ⚠️ ---
-    # This cycles through all medications in MEDICATION_SCHEDULES for quick testing/demo.
-    try:
-        # Schedules the cycling function to run every 45 seconds
-        schedule.every(45).seconds.do(cycle_medication_notifications)
-
-        print("-" * 50, flush=True)
-        print("!!! HACKATHON DEMO MODE ACTIVE !!! (Server Simulation)", flush=True)
-        print(f"Scheduling {len(MEDICATION_SCHEDULES)} simulated push notifications to cycle every 45 seconds.",
-              flush=True)
-        print("TO RESTORE DAILY SCHEDULE: Comment out the 45-second block and uncomment the loop below.", flush=True)
-        print("-" * 50, flush=True)
-
-    except Exception as e:
-        print(f"Error setting up DEMO schedule: {e}", flush=True)
-
-    # --- ORIGINAL DAILY SCHEDULING (COMMENTED OUT FOR TESTING) ---
-    # for job_data in MEDICATION_SCHEDULES:
-    #     try:
-    #         time_str = job_data['time_str']
-    #         med_name = job_data['med_name']
-
-    #         # Schedule the job to run every day at the specified time string
-    #         # schedule.every().day.at(time_str).do(
-    #         #     send_medication_notification, job_data
-    #         # )
-    #         # print(f"Scheduled {med_name} ({time_str}) successfully.")
-
-    #     except KeyError as e:
-    #         print(f"Error in configuration: Missing key {e} in a medication schedule entry.")
-    #     except Exception as e:
-    #         # This catch is mainly for other unexpected scheduling errors
-    #         print(f"Error scheduling job at time {time_str}: {e}")
+    if DEMO_MODE:
+        # --- ⚠️ HACKATHON DEMO MODE: REMINDER SET TO CYCLE EVERY 45 SECONDS ⚠️ ---
+        # This cycles through all medications in MEDICATION_SCHEDULES for quick testing/demo.
+        try:
+            # Schedules the cycling function to run every 45 seconds
+            scheduler.every(45, cycle_medication_notifications)
+
+            log.info("!!! HACKATHON DEMO MODE ACTIVE !!! (Server Simulation)")
+            log.info("Scheduling %d simulated push notifications to cycle every 45 seconds.",
+                     len(MEDICATION_SCHEDULES))
+            log.info("TO RESTORE DAILY SCHEDULE: Set DEMO_MODE = False.")
+
+        except Exception as e:
+            log.error("Error setting up DEMO schedule: %s", e)
+        return
+
+    # --- DAILY SCHEDULING ---
+    # Every entry becomes a daily job in its user's time zone; all of them are added to the
+    # scheduler in one bulk call.
+    notify = send_medication_notification
+    if COALESCE_REMINDERS:
+        notify = ReminderCoalescer(scheduler, send_push_notification_api, render_medication_notification).add
+
+    entries = []
+    for job_data in MEDICATION_SCHEDULES:
+        try:
+            time_str = job_data['time_str']
+            tz = USER_TIME_ZONES.get(job_data['user_id'], DEFAULT_TIME_ZONE)
+            daily_trigger(time_str, tz)  # validates the time and the zone
+            entries.append((time_str, tz, notify, (job_data,)))
+            log.info("Scheduled %s (%s %s) successfully.", job_data['med_name'], time_str, tz)
+
+        except KeyError as e:
+            log.error("Error in configuration: Missing key %s in a medication schedule entry.", e)
+        except Exception as e:
+            # Invalid time string or unknown time zone
+            log.error("Error scheduling entry %s: %s", job_data, e)
+
+    if SHARD_DATABASE is not None:
+        store = ShardStore(SHARD_DATABASE)
+        # Only the first worker to start fills the shared store
+        store.import_jobs(((job_data['user_id'], time_str, tz, job_data) for time_str, tz, _, (job_data,) in entries),
+                          only_if_empty=True)
+        worker = ShardWorker(store, scheduler, SHARD_WORKER_ID, notify).start()
+        log.info("Shard worker %s: running partitions %s.", SHARD_WORKER_ID, worker.partitions)
+        return
+
+    if JOB_STORE_PATH is None:
+        scheduler.add_daily_jobs(entries)
+        return
+
+    # The store is filled from MEDICATION_SCHEDULES on first run only; after
+    # that it is the source of truth.
+    store = ReminderStore(JOB_STORE_PATH)
+    if not store.has_jobs():
+        store.import_jobs((job_data.get('user_id'), time_str, tz, job_data)
+                          for time_str, tz, _, (job_data,) in entries)
+    replayed, skipped = DurableReminders(store, scheduler, notify).start()
+    log.info("Job store %s: replayed %d missed reminders, skipped %d.", JOB_STORE_PATH, replayed, skipped)
 
 
 # --- 4. Main Execution ---
 if __name__ == "__main__":
-    setup_schedule()
+    # Log lines are JSON, written to stdout by a background thread in batches, so
+    # logging never makes the scheduler wait on the terminal.
+    LOG_WRITER = start_async_logging()
+    log.info("--- SCRIPT STARTED EXECUTION (WEB SERVER MODE) ---")
 
-    print("-" * 50)
-    print("Medication Scheduler is running...")
-    print(
+    metrics = MetricsRegistry()
+    if METRICS_PORT is not None:
+        serve_metrics(metrics, port=METRICS_PORT)
+        log.info("Metrics at http://127.0.0.1:%d/metrics", METRICS_PORT)
+    if PUSH_ENDPOINT is not None:
+        PUSH_DISPATCHER = PushDispatcher(
+            PUSH_ENDPOINT, concurrency=PUSH_CONCURRENCY, rate_limit=PUSH_RATE_LIMIT,
+            dead_letters=DeadLetterStore(DEAD_LETTER_PATH) if DEAD_LETTER_PATH else None, metrics=metrics).start()
+    scheduler = ReminderScheduler(metrics=metrics)
+    setup_schedule(scheduler)
+
+    log.info("Medication Scheduler is running...")
+    log.info(
         "This background process would typically be managed by a service manager (like systemd or supervisor) on a real server.")
-    print("Press Ctrl+C to stop the scheduler.")
-    print("-" * 50)
+    log.info("Press Ctrl+C to stop the scheduler.")
 
-    # Main loop to keep checking the pending jobs
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)  # Sleep for 1 second to reduce CPU usage
-        except KeyboardInterrupt:
-            # Cleanly exit the loop when the user presses Ctrl+C
-            print("\nScheduler stopped by user.")
-            break
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}. Waiting 5 seconds and continuing.", flush=True)
-            time.sleep(5)
+    # Sleeps until the next reminder is due instead of polling every second
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        # Cleanly exit when the user presses Ctrl+C
+        log.info("Scheduler stopped by user.")
+    finally:
+        if PUSH_DISPATCHER is not None:
+            PUSH_DISPATCHER.close(timeout=10.0)
+        LOG_WRITER.stop()
@@ -1,11 +1,20 @@
-import time
-import schedule
-import subprocess
-import platform
-from datetime import datetime
-import inspect  # Added for module inspection/debugging
+import logging
 
-print("--- SCRIPT STARTED EXECUTION ---", flush=True)  # <--- NEW LINE: CONFIRMS FILE IS RUNNING
+from desktop_notify import default_notifier
+from reminder_engine import ReminderScheduler, daily_trigger
+from reminder_log import start_async_logging
+from reminder_store import DurableReminders, ReminderStore
+
+log = logging.getLogger("medminders.desktop")
+
+# HACKATHON DEMO MODE cycles through all reminders every 45 seconds.
+# Set to False for the real daily schedule.
+DEMO_MODE = True
+
+# SQLite job store for the daily schedule (e.g. "reminders.db"). With a store,
+# reminders survive restarts and ones missed while the script was down are
+# sent late (up to an hour); None keeps the schedule in memory only.
+JOB_STORE_PATH = None
 
 # Global state for cycling (used in TEST MODE)
 MEDICATION_INDEX = 0
@@ -44,7 +53,7 @@ MEDICATION_SCHEDULES = [
 # --- 2. Notification Function ---
 def send_medication_notification(med_data):
     """
-    Sends a desktop notification using native OS commands (subprocess).
+    Sends a desktop notification through the platform's notifier backend.
 
     Args:
         med_data (dict): Contains 'med_name', 'dosage', and 'time_of_day'.
@@ -60,40 +69,22 @@ def send_medication_notification(med_data):
         "Don't forget to take it with food!"
     )
 
-    system_os = platform.system()
-    notification_status = "Notification Sent"
+    # The backend (D-Bus with the optional jeepney package, a resident
+    # osascript/notify-send helper, or the console) is picked once at startup
+    # and reused for every reminder. notify() raises if the notification failed.
+    notifier = default_notifier()
 
     try:
-        if system_os == "Darwin":  # macOS
-            # Uses the built-in 'osascript' command to trigger a native notification
-            subprocess.run([
-                'osascript',
-                '-e', f'display notification "{message}" with title "{title}"'
-            ], check=True, capture_output=True)
-            notification_status = "macOS Notification Sent via osascript"
-
-        elif system_os == "Linux":
-            # Uses the 'notify-send' command (standard on many Linux desktop environments)
-            subprocess.run([
-                'notify-send',
-                title,
-                message
-            ], check=True, capture_output=True)
-            notification_status = "Linux Notification Sent via notify-send"
-
-        else:
-            # Fallback for Windows or other unsupported systems
-            notification_status = "Fallback Console Message Sent (Native notification unavailable)"
+        notification_status = notifier.notify(title, message)
 
     except FileNotFoundError:
         # Handles case where osascript, notify-send, or other command is not found
-        notification_status = f"ERROR: System notification command not found on {system_os}. Showing console message instead."
+        notification_status = f"ERROR: System notification command not found ({notifier.name}). Showing console message instead."
     except Exception as e:
         notification_status = f"ERROR: Failed to send native notification: {e}. Showing console message instead."
 
     # Log the action for the console (always runs)
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] {notification_status}: {time_of_day} dose of {med_name} ({dosage})")
+    log.info("%s: %s dose of %s (%s) via %s", notification_status, time_of_day, med_name, dosage, notifier.name)
 
 
 def cycle_medication_notifications():
@@ -114,94 +105,77 @@ def cycle_medication_notifications():
 
 
 # --- 3. Scheduling Setup ---
-def setup_schedule():
-    """Reads the configuration and sets up all daily jobs."""
-    print("--- DEBUG: Starting setup_schedule function ---", flush=True)
-
-    # --- DIAGNOSTIC CHECK FOR 'schedule' PACKAGE ---
-    try:
-        if not hasattr(schedule, 'every'):
-            # This handles the exact AttributeError you are seeing
-            raise AttributeError("Missing 'every' attribute in schedule module.")
-
-        # Check if a local file is shadowing the library
-        module_path = inspect.getfile(schedule)
-        if "site-packages" not in module_path and "dist-packages" not in module_path and "venv" not in module_path:
-            print("-" * 50, flush=True)
-            print("CRITICAL WARNING: The 'schedule' module is being loaded from:", flush=True)
-            print(f"-> {module_path}", flush=True)
-            print("If this path is inside your project, you have a naming conflict (shadowing).", flush=True)
-            print("Please rename any file or folder named 'schedule' in your project directory.", flush=True)
-            print("-" * 50, flush=True)
-
-    except AttributeError as e:
-        # This catches the critical "has no attribute 'every'" error and provides instructions
-        print("-" * 50, flush=True)
-        print(f"CRITICAL ERROR: Failed to access a required function from the 'schedule' package: {e}", flush=True)
-        print(
-            "ACTION REQUIRED: The package is likely corrupted or missing. Please run the following command in your PyCharm terminal:",
-            flush=True)
-        print("pip install --upgrade schedule", flush=True)
-        print("-" * 50, flush=True)
-        return  # Exit the setup function to prevent crashing the loop
-    except Exception as e:
-        # Catch other errors during the diagnostic check
-        print(f"Diagnostic Error: {e}", flush=True)
-        return
-    # ---------------------------------------------
+def setup_schedule(scheduler):
+    """Reads the configuration and sets up all daily jobs on the scheduler."""
+    log.debug("Starting setup_schedule function")
 
-    # --- ⚠️ HACKATHON DEMO MODE: REMINDER SET TO CYCLE EVERY 45 SECONDS ⚠️ ---
-    # This cycles through all medications in MEDICATION_SCHEDULES for quick testing/demo.
-    try:
-        # Schedules the cycling function to run every 45 seconds
-        schedule.every(45).seconds.do(cycle_medication_notifications)
+    if DEMO_MODE:
+        # --- ⚠️ HACKATHON DEMO MODE: REMINDER SET TO CYCLE EVERY 45 SECONDS ⚠️ ---
+        # This cycles through all medications in MEDICATION_SCHEDULES for quick testing/demo.
+        try:
+            # Schedules the cycling function to run every 45 seconds
+            scheduler.every(45, cycle_medication_notifications)
 
-        print("-" * 50, flush=True)
-        print("!!! HACKATHON DEMO MODE ACTIVE !!!", flush=True)
-        print(f"Scheduling {len(MEDICATION_SCHEDULES)} medications to cycle every 45 seconds.", flush=True)
-        print("TO RESTORE DAILY SCHEDULE: Comment out the 45-second block and uncomment the loop below.", flush=True)
-        print("-" * 50, flush=True)
+            log.info("!!! HACKATHON DEMO MODE ACTIVE !!!")
+            log.info("Scheduling %d medications to cycle every 45 seconds.", len(MEDICATION_SCHEDULES))
+            log.info("TO RESTORE DAILY SCHEDULE: Set DEMO_MODE = False.")
 
-    except Exception as e:
-        print(f"Error setting up DEMO schedule: {e}", flush=True)
+        except Exception as e:
+            log.error("Error setting up DEMO schedule: %s", e)
+        return
 
-    # --- ORIGINAL DAILY SCHEDULING (COMMENTED OUT FOR TESTING) ---
-    # for job_data in MEDICATION_SCHEDULES:
-    #     try:
-    #         time_str = job_data['time_str']
-    #         med_name = job_data['med_name']
+    # --- DAILY SCHEDULING ---
+    # Every entry becomes a daily job in this machine's local time zone; all of them are added to the
+    # scheduler in one bulk call.
+    entries = []
+    for job_data in MEDICATION_SCHEDULES:
+        try:
+            time_str = job_data['time_str']
+            tz = None  # this machine's local time
+            daily_trigger(time_str, tz)  # validates the time and the zone
+            entries.append((time_str, tz, send_medication_notification, (job_data,)))
+            log.info("Scheduled %s (%s) successfully.", job_data['med_name'], time_str)
+
+        except KeyError as e:
+            log.error("Error in configuration: Missing key %s in a medication schedule entry.", e)
+        except Exception as e:
+            # Invalid time string or unknown time zone
+            log.error("Error scheduling entry %s: %s", job_data, e)
 
-    #         # Schedule the job to run every day at the specified time string
-    #         # schedule.every().day.at(time_str).do(
-    #         #     send_medication_notification, job_data
-    #         # )
-    #         # print(f"Scheduled {med_name} ({time_str}) successfully.")
+    if JOB_STORE_PATH is None:
+        scheduler.add_daily_jobs(entries)
+        return
 
-    #     except KeyError as e:
-    #         print(f"Error in configuration: Missing key {e} in a medication schedule entry.")
-    #     except Exception as e:
-    #         # This catch is mainly for other unexpected scheduling errors
-    #         print(f"Error scheduling job at time {time_str}: {e}")
+    # The store is filled from MEDICATION_SCHEDULES on first run only; after
+    # that it is the source of truth.
+    store = ReminderStore(JOB_STORE_PATH)
+    if not store.has_jobs():
+        store.import_jobs((job_data.get('user_id'), time_str, tz, job_data)
+                          for time_str, tz, _, (job_data,) in entries)
+    replayed, skipped = DurableReminders(store, scheduler, send_medication_notification).start()
+    log.info("Job store %s: replayed %d missed reminders, skipped %d.", JOB_STORE_PATH, replayed, skipped)
 
 
 # --- 4. Main Execution ---
 if __name__ == "__main__":
-    setup_schedule()
+    # Log lines are JSON, written to stdout by a background thread in batches, so
+    # logging never makes the scheduler wait on the terminal.
+    LOG_WRITER = start_async_logging()
+    log.info("--- SCRIPT STARTED EXECUTION ---")  # <--- NEW LINE: CONFIRMS FILE IS RUNNING
 
-    print("-" * 50)
-    print("Medication Scheduler is running...")
-    print("Press Ctrl+C to stop the scheduler.")
-    print("-" * 50)
+    log.info("Desktop notifications via: %s", default_notifier().name)
+    scheduler = ReminderScheduler()
+    setup_schedule(scheduler)
 
-    # Main loop to keep checking the pending jobs
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)  # Sleep for 1 second to reduce CPU usage
-        except KeyboardInterrupt:
-            # Cleanly exit the loop when the user presses Ctrl+C
-            print("\nScheduler stopped by user.")
-            break
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}. Waiting 5 seconds and continuing.")
-            time.sleep(5)
+    log.info("Medication Scheduler is running...")
+    log.info("Press Ctrl+C to stop the scheduler.")
+
+    # Sleeps until the next reminder is due instead of polling every second
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        # Cleanly exit when the user presses Ctrl+C
+        log.info("Scheduler stopped by user.")
+    finally:
+        default_notifier().close()
+        LOG_WRITER.stop()
@@ -0,0 +1,22 @@
+import { NextRequest, NextResponse } from "next/server";
+
+// Proxies DDI checks to the long-lived Python service (python ddi_service.py).
+const DDI_SERVICE_URL = process.env.DDI_SERVICE_URL || "http://127.0.0.1:8765";
+
+export async function POST(req: NextRequest){
+  const { medications } = await req.json();
+  if (!Array.isArray(medications)) {
+    return NextResponse.json({ error: "medications must be a list" }, { status: 400 });
+  }
+  try {
+    const res = await fetch(`${DDI_SERVICE_URL}/check`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ medications }),
+      cache: "no-store",
+    });
+    return NextResponse.json(await res.json(), { status: res.status });
+  } catch {
+    return NextResponse.json({ error: "DDI service unavailable" }, { status: 503 });
+  }
+}
@@ -0,0 +1,85 @@
+"""
+Benchmark: "who is affected by a new interaction" via PatientDrugIndex vs. scanning
+the whole population.
+
+The population uses bench_suite's Zipf-skewed regimens, so the most popular
+drugs are taken by a large share of patients; new pairs are drawn both among the
+popular drugs (worst case for the intersection) and uniformly.
+
+The full-population check_for_interactions_batch rescan (what finding affected
+patients took before) is timed too, once the new rows are in the table.
+
+Usage:
+    python benchmarks/bench_affected_patients.py [--patients 500000] [--new-pairs 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bench_suite import drug_names, synthetic_regimens, synthetic_table
+from ddi_patients import PatientDrugIndex
+from drug_to_drug import MedMindersDDIWarningSystem
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1e3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=3000)
+    parser.add_argument('--pairs', type=int, default=100_000)
+    parser.add_argument('--patients', type=int, default=500_000)
+    parser.add_argument('--new-pairs', type=int, default=200)
+    parser.add_argument('--zipf', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=31)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    table = synthetic_table(args.pairs, args.drugs, args.zipf, rng)
+    system = MedMindersDDIWarningSystem(table)
+    regimens = synthetic_regimens(args.patients, args.drugs, args.zipf, 2, 60, rng)
+    patient_ids = [f"user-{p}" for p in range(args.patients)]
+
+    start = time.perf_counter()
+    index = PatientDrugIndex(system, dict(zip(patient_ids, regimens)))
+    build_s = time.perf_counter() - start
+
+    names = drug_names(args.drugs)
+    popular = [tuple(rng.choice(20, size=2, replace=False)) for _ in range(args.new_pairs // 2)]
+    uniform = [tuple(rng.choice(args.drugs, size=2, replace=False)) for _ in range(args.new_pairs // 2)]
+    new_pairs = [(names[a], names[b]) for a, b in popular + uniform]
+
+    index_s, scan_s, affected = [], [], []
+    regimen_sets = [set(regimen) for regimen in regimens]
+    for drug_a, drug_b in new_pairs:
+        start = time.perf_counter()
+        hits = index.affected_by(drug_a, drug_b)
+        index_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = [patient_ids[p] for p, drugs in enumerate(regimen_sets) if drug_a in drugs and drug_b in drugs]
+        scan_s.append(time.perf_counter() - start)
+        if sorted(hits) != sorted(expected):
+            raise SystemExit(f"MISMATCH for {drug_a} / {drug_b}")
+        affected.append(len(hits))
+
+    start = time.perf_counter()
+    alerts = index.alerts_for_new_interaction(*new_pairs[0], 3, "Synthetic new interaction. Contraindicated.")
+    alert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    system.check_for_interactions_batch(regimens)
+    rescan_s = time.perf_counter() - start
+
+    print(f"{args.patients} patients, index built in {build_s:.1f}s, {len(new_pairs)} new pairs "
+          f"(affected patients: median {int(np.median(affected))}, max {max(affected)})")
+    print(f"PatientDrugIndex.affected_by : p50 {percentile_ms(index_s, 50):8.3f} ms  p99 {percentile_ms(index_s, 99):8.3f} ms")
+    print(f"linear regimen scan          : p50 {percentile_ms(scan_s, 50):8.1f} ms  p99 {percentile_ms(scan_s, 99):8.1f} ms")
+    print(f"full batch rescan            : {rescan_s * 1e3:8.0f} ms")
+    print(f"alerts for the most common pair ({len(alerts)} patients): {alert_s * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
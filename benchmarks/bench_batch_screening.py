@@ -0,0 +1,62 @@
+"""
+Benchmark: population screening with check_for_interactions_batch vs. a Python loop
+over check_for_interactions + generate_final_warning.
+
+Usage:
+    python benchmarks/bench_batch_screening.py [--patients 100000]
+"""
+import argparse
+import random
+import time
+
+from bench_interaction_index import MedMindersDDIWarningSystem, build_lookup_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=20000)
+    parser.add_argument('--pairs', type=int, default=200000)
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lookup_table = build_lookup_table(args.drugs, args.pairs, rng)
+    system = MedMindersDDIWarningSystem(lookup_table)
+
+    # Skew towards a few hundred common drugs so that hit rates are realistic
+    common = names[:300]
+    regimens = []
+    for _ in range(args.patients):
+        size = rng.randint(2, 40)
+        n_common = rng.randint(0, size)
+        regimens.append(rng.sample(common, n_common) + rng.sample(names, size - n_common))
+
+    start = time.perf_counter()
+    loop_results = [system.check_for_interactions(regimen) for regimen in regimens]
+    loop_warnings = [system.generate_final_warning(results) for results in loop_results]
+    loop_s = time.perf_counter() - start
+
+    system.check_for_interactions_batch(regimens[:10])  # build the pair table outside the timing
+    start = time.perf_counter()
+    batch_results, batch_warnings = system.check_for_interactions_batch(regimens)
+    batch_s = time.perf_counter() - start
+
+    # Pre-encoded ID input (e.g. straight from a patient x drug CSR matrix)
+    indptr, drug_ids, _ = system.encode_regimens(regimens)
+    start = time.perf_counter()
+    system.screen_batch(indptr, drug_ids)
+    ids_s = time.perf_counter() - start
+
+    if batch_results != loop_results or batch_warnings != loop_warnings:
+        raise SystemExit("MISMATCH between batch and single-regimen screening")
+
+    flagged = sum(1 for warning in loop_warnings if warning['status_code'] > 0)
+    print(f"patients: {len(regimens)} (2-40 meds, {flagged} flagged), results identical")
+    print(f"single-regimen loop: {loop_s:7.2f}s  ({len(regimens) / loop_s:10.0f} patients/s)")
+    print(f"batch              : {batch_s:7.2f}s  ({len(regimens) / batch_s:10.0f} patients/s)")
+    print(f"batch, ID input    : {ids_s:7.2f}s  ({len(regimens) / ids_s:10.0f} patients/s)")
+
+
+if __name__ == '__main__':
+    main()
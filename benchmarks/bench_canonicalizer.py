@@ -0,0 +1,67 @@
+"""
+Benchmark: DrugNameCanonicalizer throughput and LRU hit rate by cache size.
+
+Raw request strings are drawn from a Zipf-like distribution over spelling variants
+("warfarin", "Coumadin", "Warfarin Sodium 5mg", ...) of a synthetic vocabulary,
+which is how repeated app traffic looks.
+
+Usage:
+    python benchmarks/bench_canonicalizer.py [--lookups 500000]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ddi_canonical import BRAND_TO_GENERIC, DrugNameCanonicalizer
+
+STRENGTHS = ['5mg', '10 mg', '500 MG', '0.5 mg/ml', '75 mcg', '1000 IU']
+FORMS = ['', ' Tablet', ' Capsule', ' ER', ' oral solution']
+SALTS = ['', ' Sodium', ' HCl', ' Hydrochloride']
+
+
+def build_variants(vocabulary, rng):
+    generic_to_brands = {}
+    for brand, generic in BRAND_TO_GENERIC.items():
+        generic_to_brands.setdefault(generic, []).append(brand)
+
+    variants = []
+    for name in vocabulary:
+        spellings = [name, name.lower(), name.upper()] + generic_to_brands.get(name, [])
+        for _ in range(6):
+            variants.append(
+                f"{rng.choice(spellings)}{rng.choice(SALTS)} {rng.choice(STRENGTHS)}{rng.choice(FORMS)}")
+        variants.extend(spellings)
+    rng.shuffle(variants)
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=5000)
+    parser.add_argument('--lookups', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=17)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = sorted(set(BRAND_TO_GENERIC.values())) + [f"Drug{i:05d}" for i in range(args.drugs)]
+    variants = build_variants(vocabulary, rng)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(variants))))
+    stream = rng.choices(variants, cum_weights=weights, k=args.lookups)
+
+    print(f"{len(vocabulary)} drugs, {len(variants)} distinct raw strings, {len(stream)} lookups")
+    for cache_size in (0, 256, 1024, 4096, 16384):
+        canonicalizer = DrugNameCanonicalizer(vocabulary, cache_size=cache_size)
+        start = time.perf_counter()
+        for raw in stream:
+            canonicalizer.canonicalize(raw)
+        elapsed = time.perf_counter() - start
+        print(f"cache {cache_size:>6}: {len(stream) / elapsed:10.0f} lookups/s  hit rate {canonicalizer.hit_rate:6.1%}")
+
+
+if __name__ == '__main__':
+    main()
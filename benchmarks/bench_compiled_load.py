@@ -0,0 +1,78 @@
+"""
+Benchmark: cold-start cost of MedMindersDDIWarningSystem built from a DataFrame
+vs. opened from a compiled, memory-mapped database.
+
+Each variant is loaded in a fresh subprocess, which reports its load time and
+the RSS it added (Linux, read from /proc/self/statm).
+
+Usage:
+    python benchmarks/bench_compiled_load.py [--drugs 20000] [--pairs 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOADER = """
+import json, os, pickle, sys, time
+sys.path.insert(0, {repo_root!r})
+from drug_to_drug import MedMindersDDIWarningSystem
+source = {source!r}
+if source.endswith('.pkl'):
+    with open(source, 'rb') as f:
+        source = pickle.load(f)
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+rss_before = rss_mb()
+start = time.perf_counter()
+system = MedMindersDDIWarningSystem(source)
+system.check_for_interactions(system.drug_names[:2])
+load_s = time.perf_counter() - start
+print(json.dumps({{'load_s': load_s, 'rss_mb': rss_mb() - rss_before}}))
+"""
+
+
+def load_in_subprocess(source):
+    output = subprocess.run([sys.executable, '-c', LOADER.format(repo_root=REPO_ROOT, source=source)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=20000)
+    parser.add_argument('--pairs', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    from bench_interaction_index import build_lookup_table
+    from drug_to_drug import compile_lookup_table
+
+    _, lookup_table = build_lookup_table(args.drugs, args.pairs, random.Random(args.seed))
+    with tempfile.TemporaryDirectory() as tmp:
+        table_path = os.path.join(tmp, 'lookup_table.pkl')
+        lookup_table.to_pickle(table_path)
+
+        compiled_path = os.path.join(tmp, 'ddi.bin')
+        start = time.perf_counter()
+        compile_lookup_table(lookup_table, compiled_path)
+        compile_s = time.perf_counter() - start
+
+        dataframe = load_in_subprocess(table_path)
+        compiled = load_in_subprocess(compiled_path)
+        size_mb = os.path.getsize(compiled_path) / 2 ** 20
+
+    print(f"table: {args.drugs} drugs, {len(lookup_table)} pairs; compiled in {compile_s:.2f}s to {size_mb:.1f} MB")
+    print(f"DataFrame load: {dataframe['load_s']:7.3f}s  +{dataframe['rss_mb']:7.1f} MB RSS")
+    print(f"compiled mmap : {compiled['load_s']:7.3f}s  +{compiled['rss_mb']:7.1f} MB RSS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Load test: ddi_service.py on localhost at several concurrency levels.
+
+Starts the service in a subprocess on a synthetic compiled table (one run per
+micro-batching window), then drives it with N concurrent keep-alive clients that
+each POST /check back to back. Reports throughput, p50/p99 latency and the
+average batch size the service formed.
+
+Usage:
+    python benchmarks/bench_ddi_service.py [--concurrency 1,8,32,128] [--windows-ms 0,2] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_suite import synthetic_regimens, synthetic_table
+from drug_to_drug import compile_lookup_table
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = next(int(line.split(b':', 1)[1]) for line in head.split(b'\r\n')
+                  if line.lower().startswith(b'content-length:'))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def health(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return (await request(reader, writer, 'GET', '/health'))[1]
+    finally:
+        writer.close()
+
+
+async def client(port, regimens, n_requests, latencies, rng):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            status, payload = await request(reader, writer, 'POST', '/check',
+                                            {'medications': regimens[rng.randrange(len(regimens))]})
+            latencies.append(time.perf_counter() - start)
+            if status != 200 or 'warning' not in payload:
+                raise RuntimeError(f"bad response {status}: {payload}")
+    finally:
+        writer.close()
+
+
+async def run_level(port, regimens, concurrency, total_requests, seed):
+    before = await health(port)
+    latencies = []
+    per_client = max(1, total_requests // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, regimens, per_client, latencies, random.Random(seed + c))
+                           for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await health(port)
+    batches = after['batches'] - before['batches']
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1e3),
+        'p99_ms': float(np.percentile(latencies, 99) * 1e3),
+        'mean_batch': (after['requests'] - before['requests']) / batches if batches else 0.0,
+    }
+
+
+async def wait_ready(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("ddi_service exited during startup")
+        try:
+            return await health(port)
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("ddi_service did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pairs', type=int, default=100_000)
+    parser.add_argument('--drugs', type=int, default=2500)
+    parser.add_argument('--concurrency', default='1,8,32,128')
+    parser.add_argument('--windows-ms', default='0,2')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=4000, help="requests per concurrency level")
+    parser.add_argument('--seed', type=int, default=43)
+    parser.add_argument('--json', action='store_true', help="print a JSON report instead of a table")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    table = synthetic_table(args.pairs, args.drugs, 0.8, rng)
+    regimens = synthetic_regimens(2000, args.drugs, 0.8, 2, 60, rng)
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = compile_lookup_table(table, os.path.join(tmp, 'ddi.db'))
+        for window_ms in [float(w) for w in args.windows_ms.split(',')]:
+            port = free_port()
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(REPO_ROOT, 'ddi_service.py'), '--database', database,
+                 '--port', str(port), '--window-ms', str(window_ms), '--max-batch', str(args.max_batch)],
+                stdout=subprocess.DEVNULL)
+            try:
+                asyncio.run(wait_ready(port, process))
+                for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                    result = asyncio.run(run_level(port, regimens, concurrency, args.requests, args.seed))
+                    result['window_ms'] = window_ms
+                    report.append(result)
+                    if not args.json:
+                        print(f"window {window_ms:3.1f} ms  concurrency {concurrency:4d}: "
+                              f"{result['requests_per_s']:8.0f} req/s  p50 {result['p50_ms']:7.2f} ms"
+                              f"  p99 {result['p99_ms']:7.2f} ms  batch {result['mean_batch']:5.1f}")
+            finally:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        print(json.dumps({'pairs': args.pairs, 'drugs': args.drugs, 'cpu_count': os.cpu_count(),
+                          'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
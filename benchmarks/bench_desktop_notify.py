@@ -0,0 +1,176 @@
+"""
+Benchmark: desktop notifications per second, one subprocess per reminder (the
+old pushNotificationApp.py path) vs. the resident pipe helper and the D-Bus
+backend from desktop_notify.py.
+
+There is no notification daemon on a build machine. The process-based paths run
+a stand-in `notify-send` (a shell script that appends the message to a file);
+the shell helper still starts that command once per notification, but from a
+small shell rather than from the scheduler process. The D-Bus backend talks to
+a private dbus-daemon with a stub org.freedesktop.Notifications service in a
+child process (needs dbus-daemon and the optional jeepney package; skipped
+otherwise). No process is started per notification on that path.
+
+Every backend waits for each notification's status, so "blocks caller" is
+close to the end-to-end time. The checks at the end make sure every
+notification was shown, and that a failing notifier raises in the caller
+(FileNotFoundError for a missing notify-send). Exits non-zero otherwise.
+
+Usage:
+    python benchmarks/bench_desktop_notify.py [--notifications 500]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desktop_notify import _NOTIFY_SEND_HELPER, DBusNotifier, PipeHelperNotifier, SubprocessNotifier
+
+
+def fake_notify_send(directory):
+    """A notify-send that logs each message, and fails for messages containing FAIL."""
+    path = os.path.join(directory, 'notify-send')
+    log = os.path.join(directory, 'shown.log')
+    with open(path, 'w') as script:
+        script.write(f'#!/bin/sh\n[ "$1" = "--" ] && shift\n'
+                     f'case "$2" in *FAIL*) echo "Could not connect: no notification daemon" >&2; exit 1;; esac\n'
+                     f'echo "$2" >> "{log}"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path, log
+
+
+def notification_service(address, log):
+    """Stub org.freedesktop.Notifications: logs each Notify() body, errors for messages containing FAIL."""
+    from jeepney import HeaderFields, MessageType, new_error, new_method_return
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+
+    connection = open_dbus_connection(bus=address)
+    connection.send_and_get_reply(message_bus.RequestName('org.freedesktop.Notifications'))
+    shown = 0
+    with open(log, 'a') as out:
+        while True:
+            message = connection.receive()
+            if message.header.message_type != MessageType.method_call \
+                    or message.header.fields.get(HeaderFields.member) != 'Notify':
+                continue
+            body = message.body[4]
+            if 'FAIL' in body:
+                connection.send(new_error(message, 'org.freedesktop.DBus.Error.Failed', 's', ("stub failure",)))
+                continue
+            out.write(body + "\n")
+            out.flush()
+            shown += 1
+            connection.send(new_method_return(message, 'u', (shown,)))
+
+
+def start_bus(log):
+    """A private session bus with the stub service registered, as (address, service, daemon), or None."""
+    if not shutil.which('dbus-daemon'):
+        print("(D-Bus backend skipped: no dbus-daemon)")
+        return None
+    try:
+        import jeepney  # noqa: F401
+    except ImportError:
+        print("(D-Bus backend skipped: the optional jeepney package is not installed)")
+        return None
+
+    daemon = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    address = daemon.stdout.readline().strip()
+    service = multiprocessing.Process(target=notification_service, args=(address, log), daemon=True)
+    service.start()
+
+    from jeepney import DBusAddress, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+
+    bus = DBusAddress('/org/freedesktop/DBus', bus_name='org.freedesktop.DBus', interface='org.freedesktop.DBus')
+    with open_dbus_connection(bus=address) as connection:
+        deadline = time.monotonic() + 10
+        while not connection.send_and_get_reply(
+                new_method_call(bus, 'NameHasOwner', 's', ('org.freedesktop.Notifications',))).body[0]:
+            if time.monotonic() > deadline:
+                raise SystemExit("the stub notification service did not come up")
+            time.sleep(0.01)
+    return address, service, daemon
+
+
+def run(notifier, n):
+    blocked = 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        before = time.perf_counter()
+        notifier.notify("Time for Medication: Morning Dose", f"Take your 500 MG Tablet of Metformin HCL now. #{i}")
+        blocked += time.perf_counter() - before
+    return blocked / n, n / (time.perf_counter() - start)
+
+
+def expect_failure(name, notifier, error_type):
+    try:
+        notifier.notify("Time for Medication", "FAIL on purpose")
+    except error_type:
+        return []
+    except Exception as e:
+        return [f"{name}: a failed notification raised {type(e).__name__}, expected {error_type.__name__}"]
+    return [f"{name}: a failed notification was reported as sent"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notifications', type=int, default=500)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        command, log = fake_notify_send(tmp)
+        backends = [
+            ('subprocess', SubprocessNotifier(lambda title, message: [command, '--', title, message], "sent"),
+             subprocess.CalledProcessError),
+            ('pipe helper', PipeHelperNotifier(['sh', '-c', _NOTIFY_SEND_HELPER.format(command=command)], "sent"),
+             RuntimeError),
+        ]
+        bus = start_bus(log)
+        if bus is not None:
+            from jeepney import DBusErrorResponse
+
+            backends.append(('D-Bus', DBusNotifier(bus=bus[0]), DBusErrorResponse))
+
+        try:
+            print(f"{'backend':<12} {'blocks caller':>14} {'end to end':>16}")
+            for name, notifier, error_type in backends:
+                open(log, 'w').close()
+                blocked, rate = run(notifier, args.notifications)
+                failures += expect_failure(name, notifier, error_type)
+                notifier.close()
+                with open(log) as shown:
+                    count = sum(1 for _ in shown)
+                if count != args.notifications:
+                    failures.append(f"{name}: {count} of {args.notifications} notifications were shown")
+                print(f"{name:<12} {blocked * 1e6:>11.1f} us {rate:>10.0f} notif/s")
+        finally:
+            if bus is not None:
+                _, service, daemon = bus
+                service.terminate()
+                service.join()
+                daemon.terminate()
+                daemon.wait()
+
+        missing = PipeHelperNotifier(['sh', '-c', _NOTIFY_SEND_HELPER.format(command=os.path.join(tmp, 'missing'))],
+                                     "sent")
+        failures += expect_failure('missing notify-send', missing, FileNotFoundError)
+        missing.close()
+
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK: every notification was shown and every failure reached the caller")
+
+
+if __name__ == '__main__':
+    main()
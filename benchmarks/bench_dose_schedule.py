@@ -0,0 +1,81 @@
+"""
+Benchmark: check_dose_schedule (sorted sweep over dose times) vs. comparing every
+pair of doses, for users with dozens of daily doses.
+
+Every interaction row gets a Separation_Minutes window (or none, for pairs that
+interact whenever they are co-prescribed); both implementations must flag the
+same pairs.
+
+Usage:
+    python benchmarks/bench_dose_schedule.py [--users 2000] [--max-doses 80]
+"""
+import argparse
+import itertools
+import random
+import time
+
+from bench_interaction_index import MedMindersDDIWarningSystem, build_lookup_table
+
+WINDOWS = [None, 30, 60, 120, 240, 360]
+
+
+def pairwise_dose_check(system, dose_schedule):
+    """Reference: compare every dose with every other dose."""
+    doses = [(str(dose['med_name']).strip(), int(dose['time_str'][:2]) * 60 + int(dose['time_str'][3:]))
+             for dose in dose_schedule]
+    flagged = set()
+    for (drug_a, minute_a), (drug_b, minute_b) in itertools.combinations(doses, 2):
+        if drug_a == drug_b:
+            continue
+        pair_key = system._create_pair_key(drug_a, drug_b)
+        if pair_key not in system.DDI_DB:
+            continue
+        window = system.DDI_DB[pair_key].get('Separation_Minutes')
+        gap = abs(minute_a - minute_b)
+        if window is None or window != window or min(gap, 24 * 60 - gap) < window:  # NaN: no window
+            flagged.add(frozenset((drug_a, drug_b)))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=2000)
+    parser.add_argument('--pairs', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--min-doses', type=int, default=20)
+    parser.add_argument('--max-doses', type=int, default=80)
+    parser.add_argument('--seed', type=int, default=41)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lookup_table = build_lookup_table(args.drugs, args.pairs, rng)
+    lookup_table['Separation_Minutes'] = [rng.choice(WINDOWS) for _ in range(len(lookup_table))]
+    system = MedMindersDDIWarningSystem(lookup_table)
+
+    schedules = []
+    for _ in range(args.users):
+        meds = rng.sample(names[:300], rng.randint(args.min_doses, args.max_doses) // 2)
+        schedules.append([{'med_name': med, 'time_str': f"{rng.randrange(24):02d}:{rng.choice([0, 15, 30, 45]):02d}"}
+                          for med in meds for _ in range(rng.choice([1, 2, 3]))])
+
+    start = time.perf_counter()
+    swept = [system.check_dose_schedule(schedule) for schedule in schedules]
+    sweep_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = [pairwise_dose_check(system, schedule) for schedule in schedules]
+    pairwise_s = time.perf_counter() - start
+
+    for results, expected in zip(swept, reference):
+        if {frozenset(result['Pair'].split(' + ')) for result in results} != expected:
+            raise SystemExit("MISMATCH between the sweep and the pairwise check")
+
+    doses = sum(len(schedule) for schedule in schedules) / len(schedules)
+    flagged = sum(len(results) for results in swept) / len(swept)
+    print(f"{args.users} users, {doses:.0f} doses/day and {flagged:.1f} flagged pairs on average, results identical")
+    print(f"pairwise doses   : {pairwise_s / args.users * 1e6:8.1f} us/user")
+    print(f"sorted sweep     : {sweep_s / args.users * 1e6:8.1f} us/user  ({pairwise_s / sweep_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: DrugNameMatcher (trigram index) vs. a linear edit-distance scan, on a
+synthetic drug vocabulary queried with OCR-style typos.
+
+Reports p50/p99 latency and top-1 / top-5 accuracy (did the intended drug come
+back). The linear scan only runs on a sample of the queries because it is slow.
+
+Usage:
+    python benchmarks/bench_fuzzy_matcher.py [--drugs 20000] [--queries 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ddi_fuzzy import DrugNameMatcher, _match_key
+
+SYLLABLES = ['ab', 'ac', 'al', 'am', 'an', 'ar', 'az', 'ben', 'cor', 'dex', 'di', 'do', 'fen', 'flu', 'gli',
+             'in', 'ir', 'ka', 'la', 'lo', 'mab', 'met', 'mi', 'mo', 'na', 'nib', 'ol', 'on', 'pam', 'pra',
+             'pril', 'ro', 'sar', 'ta', 'tan', 'ti', 'to', 'tri', 'va', 'vir', 'xa', 'zep', 'zol', 'zo']
+SUFFIXES = ['in', 'ine', 'ol', 'ole', 'am', 'ide', 'ate', 'one', 'il', 'an', 'ex', 'ax']
+OCR_CONFUSIONS = {'l': '1', 'o': '0', 'i': 'l', 'm': 'rn', 'e': 'c', 's': '5', 'b': '6', 'g': 'q'}
+
+
+def build_vocabulary(n_drugs, rng):
+    names = set()
+    while len(names) < n_drugs:
+        stem = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        names.add((stem + rng.choice(SUFFIXES)).capitalize())
+    return sorted(names)
+
+
+def inject_typos(name, rng):
+    chars = list(name.lower())
+    for _ in range(rng.choice([1, 1, 2])):
+        i = rng.randrange(len(chars))
+        kind = rng.choice(['substitute', 'delete', 'insert', 'transpose', 'ocr'])
+        if kind == 'substitute':
+            chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        elif kind == 'delete' and len(chars) > 4:
+            del chars[i]
+        elif kind == 'insert':
+            chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+        elif kind == 'transpose' and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif chars[i] in OCR_CONFUSIONS:
+            chars[i] = OCR_CONFUSIONS[chars[i]]
+    noisy = ''.join(chars)
+    return noisy.upper() if rng.random() < 0.2 else noisy
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def linear_scan(keys, names, query, k=5):
+    query = _match_key(query)
+    ranked = sorted(range(len(keys)), key=lambda i: edit_distance(query, keys[i]))[:k]
+    return [names[i] for i in ranked]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--linear-queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=19)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = build_vocabulary(args.drugs, rng)
+
+    start = time.perf_counter()
+    matcher = DrugNameMatcher(vocabulary)
+    build_s = time.perf_counter() - start
+
+    targets = [rng.choice(vocabulary) for _ in range(args.queries)]
+    queries = [inject_typos(target, rng) + rng.choice(['', ' 200mg', ' 10 MG Tablet']) for target in targets]
+
+    latencies, top1, top5 = [], 0, 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        matches = matcher.search(query, k=5)
+        latencies.append(time.perf_counter() - start)
+        names = [name for name, _ in matches]
+        top1 += bool(names) and names[0] == target
+        top5 += target in names
+
+    keys = [_match_key(name) for name in vocabulary]
+    linear_latencies, linear_top1 = [], 0
+    for query, target in list(zip(queries, targets))[:args.linear_queries]:
+        start = time.perf_counter()
+        names = linear_scan(keys, vocabulary, query)
+        linear_latencies.append(time.perf_counter() - start)
+        linear_top1 += names[0] == target
+
+    n = len(queries)
+    print(f"vocabulary: {len(vocabulary)} drugs (index built in {build_s:.2f}s), {n} typo queries")
+    print(f"trigram index: p50 {percentile(latencies, 0.5) * 1e3:6.3f} ms  p99 {percentile(latencies, 0.99) * 1e3:6.3f} ms"
+          f"  top-1 {top1 / n:6.1%}  top-5 {top5 / n:6.1%}")
+    print(f"linear scan  : p50 {percentile(linear_latencies, 0.5) * 1e3:6.1f} ms"
+          f"  top-1 {linear_top1 / len(linear_latencies):6.1%}  ({len(linear_latencies)} queries)")
+
+
+if __name__ == '__main__':
+    main()
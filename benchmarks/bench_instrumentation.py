@@ -0,0 +1,189 @@
+"""
+Benchmark and check: cost of the scheduler/dispatcher metrics and of the async
+logger, plus a scrape of the /metrics endpoint.
+
+1. run_pending() over many due jobs with and without a MetricsRegistry
+   (per-job overhead of the fire-lag histogram and friends).
+2. One log line per reminder: print(..., flush=True), as the scripts did,
+   vs. a logger call into reminder_log's AsyncLogWriter (with the lean records
+   start_async_logging sets up), as time the caller waits. Written to a file,
+   and to a pipe drained by a slow reader (about 4 MB/s, like a terminal or a
+   log shipper falling behind). On one CPU the writer thread's formatting
+   competes with the caller, so its time shows up in the caller's figure.
+3. A PushDispatcher run against mock_push_server.py with injected 503s, then
+   GET /metrics; exits non-zero if an expected series is missing or wrong.
+
+Usage:
+    python benchmarks/bench_instrumentation.py [--jobs 200000] [--lines 20000]
+"""
+import argparse
+import http.client
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_push_dispatch import REPO_ROOT, free_port, wait_ready
+from push_dispatch import PushDispatcher
+from reminder_engine import ReminderScheduler
+from reminder_log import AsyncLogWriter, lean_log_records
+from reminder_metrics import MetricsRegistry, serve_metrics
+
+
+def scheduler_cost(jobs, metrics):
+    clock = [1_700_000_000.0]
+    scheduler = ReminderScheduler(clock=lambda: clock[0], metrics=metrics)
+    for i in range(jobs):
+        scheduler.schedule_at(clock[0] + i % 600, int)
+    clock[0] += 900
+    start = time.perf_counter()
+    ran = scheduler.run_pending(clock[0] - 300)
+    ran += scheduler.run_pending()
+    assert ran == jobs, ran
+    return (time.perf_counter() - start) / jobs
+
+
+# Reads 4 KiB per millisecond
+SLOW_READER = "import sys, time\nwhile sys.stdin.buffer.read1(4096):\n    time.sleep(0.001)"
+
+
+class Sink:
+    def __init__(self, kind, directory):
+        self.process = None
+        if kind == 'file':
+            self.stream = open(os.path.join(directory, 'log'), 'w')
+        else:
+            self.process = subprocess.Popen([sys.executable, '-c', SLOW_READER], stdin=subprocess.PIPE, text=True)
+            self.stream = self.process.stdin
+
+    def close(self):
+        self.stream.close()
+        if self.process is not None:
+            self.process.wait()
+
+
+def print_cost(lines, sink):
+    start = time.perf_counter()
+    for i in range(lines):
+        print(f"[2026-01-01 08:00:00] PUSH API CALLED (Simulated) -> Target User: user_{i} | Title: Time for "
+              f"Medication | Message: Take your 500 MG Tablet of Metformin HCL now.", file=sink.stream, flush=True)
+    return (time.perf_counter() - start) / lines
+
+
+def logger_cost(lines, sink):
+    writer = AsyncLogWriter(sink.stream)
+    log = logging.getLogger(f"medminders.bench.{id(sink)}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(writer.handler)
+    start = time.perf_counter()
+    for i in range(lines):
+        log.info("PUSH API CALLED (Simulated) -> Target User: %s | Title: %s | Message: %s", f"user_{i}",
+                 "Time for Medication", "Take your 500 MG Tablet of Metformin HCL now.")
+    caller = (time.perf_counter() - start) / lines
+    writer.stop()
+    if writer.written != lines:
+        raise SystemExit(f"FAILED: async logger wrote {writer.written} of {lines} lines")
+    return caller, (time.perf_counter() - start) / lines
+
+
+def scrape(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request('GET', '/metrics')
+    response = connection.getresponse()
+    body = response.read().decode('utf-8')
+    connection.close()
+    if response.status != 200:
+        raise SystemExit(f"FAILED: /metrics answered HTTP {response.status}")
+    samples = {}
+    for line in body.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            samples[name] = float(value)
+    return samples
+
+
+def endpoint_check(pushes):
+    registry = MetricsRegistry()
+    push_port, metrics_port = free_port(), free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'mock_push_server.py'), '--port', str(push_port),
+         '--latency-ms', '5', '--error-rate', '0.2', '--seed', '1'], stdout=subprocess.DEVNULL)
+    http_server = serve_metrics(registry, port=metrics_port)
+    try:
+        wait_ready(push_port, server)
+        dispatcher = PushDispatcher(f"http://127.0.0.1:{push_port}/push", concurrency=16, backoff_base=0.01,
+                                    seed=1, metrics=registry).start()
+        clock = [1_700_000_000.0]
+        scheduler = ReminderScheduler(clock=lambda: clock[0], on_error=lambda job, error: None, metrics=registry)
+        for i in range(pushes):
+            scheduler.schedule_at(clock[0] + i % 60, dispatcher.submit, f"user_{i}", "Time for Medication", "Take it.")
+        scheduler.schedule_at(clock[0], int, "not a number")  # one failing job
+        clock[0] += 90
+        scheduler.run_pending()
+        dispatcher.close()
+        samples = scrape(metrics_port)
+    finally:
+        http_server.shutdown()
+        server.terminate()
+        server.wait()
+
+    expected = {
+        'reminder_fire_lag_seconds_count': pushes + 1,
+        'reminder_jobs_per_tick_count': 1,
+        'reminder_jobs_per_tick_sum': pushes + 1,
+        'reminder_job_errors_total{type="ValueError"}': 1,
+        'reminder_jobs_scheduled': 0,
+        'push_queue_depth': 0,
+        'push_retry_queue_depth': 0,
+    }
+    failures = [f"{name} = {samples.get(name)}, expected {value}" for name, value in expected.items()
+                if samples.get(name) != value]
+    requests = samples.get('push_dispatch_latency_seconds_count', 0)
+    errors = samples.get('push_errors_total{type="HTTP 503"}', 0)
+    if requests != pushes + errors or not errors:
+        failures.append(f"{requests:.0f} push requests for {pushes} pushes and {errors:.0f} 503s")
+    # Every job ran 90 s after the first was due: lag lands in the (60, 300] s buckets
+    if samples.get('reminder_fire_lag_seconds_bucket{le="30"}', 0) != 0:
+        failures.append("fire lag under 30 s recorded for jobs that were 30-90 s late")
+    return samples, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=200_000)
+    parser.add_argument('--lines', type=int, default=20_000)
+    parser.add_argument('--pushes', type=int, default=500)
+    args = parser.parse_args()
+
+    plain = scheduler_cost(args.jobs, None)
+    measured = scheduler_cost(args.jobs, MetricsRegistry())
+    print(f"run_pending, {args.jobs} jobs: {plain * 1e6:.2f} us/job without metrics, {measured * 1e6:.2f} us/job "
+          f"with (+{(measured - plain) * 1e6:.2f} us)")
+
+    lean_log_records()
+    print(f"log line per reminder ({args.lines} lines):")
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in ('file', 'slow pipe'):
+            sink = Sink(kind, directory)
+            printed = print_cost(args.lines, sink)
+            caller, total = logger_cost(args.lines, sink)
+            sink.close()
+            print(f"  {kind:<10} print(flush=True) {printed * 1e6:7.2f} us, async logger {caller * 1e6:6.2f} us "
+                  f"on the caller ({total * 1e6:.2f} us until written)")
+
+    samples, failures = endpoint_check(args.pushes)
+    within_minute = samples.get('reminder_fire_lag_seconds_bucket{le="60"}', 0)
+    errors = samples.get('push_errors_total{type="HTTP 503"}', 0)
+    print(f"/metrics: {within_minute:.0f} of {samples.get('reminder_fire_lag_seconds_count', 0):.0f} jobs fired "
+          f"within 60 s of schedule, {samples.get('push_dispatch_latency_seconds_count', 0):.0f} push requests, "
+          f"{errors:.0f} HTTP 503s")
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK: /metrics reports every expected series")
+
+
+if __name__ == '__main__':
+    main()
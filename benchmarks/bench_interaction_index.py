@@ -0,0 +1,108 @@
+"""
+Benchmark: integer-ID neighbor index vs. the original pairwise pair-key loop.
+
+Builds a synthetic interaction table, screens polypharmacy regimens (20-40 meds)
+with both implementations, checks that the results are identical and prints the
+per-regimen timings.
+
+Usage:
+    python benchmarks/bench_interaction_index.py [--drugs 20000] [--pairs 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from drug_to_drug import MedMindersDDIWarningSystem
+
+
+def pairwise_check(system, medication_list):
+    """The original check_for_interactions loop, kept here as the baseline."""
+    medication_set = set(str(m).strip() for m in medication_list)
+    interactions_found = []
+
+    drugs = list(medication_set)
+    for i in range(len(drugs)):
+        for j in range(i + 1, len(drugs)):
+            drug_a = drugs[i]
+            drug_b = drugs[j]
+            pair_key = system._create_pair_key(drug_a, drug_b)
+
+            if pair_key in system.DDI_DB:
+                interaction_data = system.DDI_DB[pair_key]
+                severity = interaction_data['Severity_Level']
+                description = interaction_data['Interaction_Description']
+
+                interactions_found.append({
+                    'Pair': f"{drug_a} + {drug_b}",
+                    'Severity_Numeric': severity,
+                    'Severity_Text': system.severity_map.get(severity, "UNKNOWN"),
+                    'Description': description
+                })
+
+    return interactions_found
+
+
+def build_lookup_table(n_drugs, n_pairs, rng):
+    names = [f"Drug{i:06d}" for i in range(n_drugs)]
+    pairs = set()
+    while len(pairs) < n_pairs:
+        a, b = rng.sample(names, 2)
+        pairs.add((min(a, b), max(a, b)))
+
+    pairs = sorted(pairs)
+    return names, pd.DataFrame({
+        'DDI_Pair': [f"{a} | {b}" for a, b in pairs],
+        'Severity_Level': [rng.randint(0, 3) for _ in pairs],
+        'Interaction_Description': [f"Synthetic interaction {a}/{b}" for a, b in pairs],
+    })
+
+
+def time_per_call(fn, system, regimens):
+    start = time.perf_counter()
+    for regimen in regimens:
+        fn(system, regimen)
+    return (time.perf_counter() - start) / len(regimens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=20000)
+    parser.add_argument('--pairs', type=int, default=200000)
+    parser.add_argument('--regimens', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lookup_table = build_lookup_table(args.drugs, args.pairs, rng)
+
+    start = time.perf_counter()
+    system = MedMindersDDIWarningSystem(lookup_table)
+    build_s = time.perf_counter() - start
+
+    # Mostly known drugs plus a few names the table has never seen
+    regimens = []
+    for _ in range(args.regimens):
+        regimen = rng.sample(names, rng.randint(20, 40))
+        regimen += [f"Unlisted{rng.randint(0, 999)}" for _ in range(rng.randint(0, 3))]
+        regimens.append(regimen)
+
+    for regimen in regimens:
+        if pairwise_check(system, regimen) != system.check_for_interactions(regimen):
+            raise SystemExit(f"MISMATCH for regimen {regimen}")
+
+    pairwise_s = time_per_call(pairwise_check, system, regimens)
+    indexed_s = time_per_call(MedMindersDDIWarningSystem.check_for_interactions, system, regimens)
+
+    print(f"table: {args.drugs} drugs, {len(lookup_table)} pairs (system build {build_s:.2f}s)")
+    print(f"regimens: {len(regimens)} x 20-40 meds, results identical")
+    print(f"pairwise loop : {pairwise_s * 1e6:9.1f} us/regimen")
+    print(f"neighbor index: {indexed_s * 1e6:9.1f} us/regimen  ({pairwise_s / indexed_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
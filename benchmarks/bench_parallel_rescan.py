@@ -0,0 +1,196 @@
+"""
+Benchmark: rescan_population throughput and memory by worker count.
+
+Memory is the summed PSS (proportional set size, Linux) of the parent and all
+worker processes: pages of the compiled database that several workers map are
+split between them, so a flat total means the table is shared, not copied per
+worker. It is sampled every --sample-interval seconds for the whole rescan (and
+at the first result), and reported as the median and the peak.
+
+Each worker count runs in a fresh process that loads the regimens and the
+database, so no row inherits the heap an earlier one left behind. With 1 worker
+the rescan runs in-process. "worker USS" is the memory only a worker process
+maps (median over the samples, averaged over the workers): what each added
+worker costs on top of the shared pages. That is its copy of the interpreter
+state it writes to, the working memory of one chunk, and the parent's heap pages
+that the parent rewrites while the worker is alive (workers are forked). On a
+machine with fewer cores than workers, throughput cannot scale; the memory
+columns still show what adding workers costs.
+
+Every run must give the warnings (status code and critical pair) of an
+in-process check_for_interactions_batch with full results in the same process.
+Set ordering ties these to the process's string hash seed, so the comparison
+does not cross processes.
+
+Usage:
+    python benchmarks/bench_parallel_rescan.py [--patients 200000] [--workers 1,2,4]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from bench_suite import synthetic_regimens, synthetic_table
+from ddi_rescan import _chunks, rescan_population
+from drug_to_drug import MedMindersDDIWarningSystem, compile_lookup_table
+
+
+def memory_mb(pid):
+    """(PSS, USS) of a process in MB; USS is the memory only that process maps."""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('Pss', 'Private_Clean', 'Private_Dirty'):
+                    fields[name] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return fields.get('Pss', 0.0), fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0)
+
+
+def descendants(pid):
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+    found, frontier = [], [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        found += children
+        frontier = children
+    return found
+
+
+def digest_warnings(digest, warnings):
+    for warning in warnings:
+        digest.update(f"{warning['status_code']}\t{warning.get('critical_pair')}\n".encode())
+
+
+def sample():
+    """Summed PSS of this process and its descendants, and the mean USS of the descendants."""
+    children = [memory_mb(pid) for pid in descendants(os.getpid())]
+    total = memory_mb(os.getpid())[0] + sum(pss for pss, _ in children)
+    return total, (sum(uss for _, uss in children) / len(children) if children else None)
+
+
+def sample_memory(samples, stop, interval):
+    while not stop.wait(interval):
+        samples.append(sample())
+
+
+def save_regimens(regimens, path, chunk_size):
+    with open(path, 'wb') as f:
+        for start in range(0, len(regimens), chunk_size):
+            pickle.dump(regimens[start:start + chunk_size], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_regimens(path):
+    """Yields the regimens saved by save_regimens, one chunk in memory at a time."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+def run(workers, database, regimens_path, chunk_size, interval, stream):
+    """One row, in a process of its own: throughput, memory samples and whether the warnings matched."""
+    regimens = load_regimens(regimens_path) if stream else list(load_regimens(regimens_path))
+    system = MedMindersDDIWarningSystem(database)
+    digest, screened = hashlib.blake2b(), 0
+    samples, stop = [], threading.Event()
+    sampler = threading.Thread(target=sample_memory, args=(samples, stop, interval))
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        for n, (_, _, warnings) in enumerate(rescan_population(system, regimens, processes=workers,
+                                                               chunk_size=chunk_size)):
+            digest_warnings(digest, warnings)
+            screened += len(warnings)
+            if n == 0:
+                samples.append(sample())  # Always at least one sample, however short the run
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+
+    expected = hashlib.blake2b()
+    for _, regimens in _chunks(load_regimens(regimens_path), chunk_size):
+        digest_warnings(expected, system.check_for_interactions_batch(regimens)[1])
+    return {
+        'patients_per_s': screened / elapsed,
+        'samples': samples,
+        'matches': digest.hexdigest() == expected.hexdigest(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pairs', type=int, default=1_000_000)
+    parser.add_argument('--drugs', type=int, default=8000)
+    parser.add_argument('--patients', type=int, default=200_000)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=37)
+    parser.add_argument('--sample-interval', type=float, default=0.25, help="seconds between PSS samples")
+    parser.add_argument('--stream', action='store_true',
+                        help="feed the rescan a generator over the saved regimens instead of a list in memory")
+    parser.add_argument('--run', nargs=3, metavar=('WORKERS', 'DATABASE', 'REGIMENS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        workers, database, regimens_path = args.run
+        print(json.dumps(run(int(workers), database, regimens_path, args.chunk_size, args.sample_interval,
+                             args.stream)))
+        return
+
+    rng = np.random.default_rng(args.seed)
+    table = synthetic_table(args.pairs, args.drugs, 0.8, rng)
+    regimens = synthetic_regimens(args.patients, args.drugs, 0.8, 2, 60, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = compile_lookup_table(table, os.path.join(tmp, 'ddi.db'))
+        regimens_path = os.path.join(tmp, 'regimens.pkl')
+        save_regimens(regimens, regimens_path, args.chunk_size)
+        del table, regimens
+        print(f"{args.patients} patients, {args.pairs} pairs ({os.path.getsize(database) / 2 ** 20:.0f} MB compiled),"
+              f" {os.cpu_count()} CPUs, regimens {'streamed' if args.stream else 'in a list'}")
+
+        mismatches = []
+        for workers in [int(w) for w in args.workers.split(',')]:
+            command = [sys.executable, os.path.abspath(__file__), '--run', str(workers), database, regimens_path,
+                       '--chunk-size', str(args.chunk_size), '--sample-interval', str(args.sample_interval)]
+            if args.stream:
+                command.append('--stream')
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            if not result['matches']:
+                mismatches.append(workers)
+
+            totals = [total for total, _ in result['samples']]
+            worker_uss = [mean_uss for _, mean_uss in result['samples'] if mean_uss is not None]
+            pss = f"median {statistics.median(totals):6.1f} MB  peak {max(totals):6.1f} MB" if totals else "    n/a"
+            uss = f"  worker USS {statistics.median(worker_uss):5.1f} MB" if worker_uss else ""
+            print(f"{workers} workers: {result['patients_per_s']:9.0f} patients/s  total PSS {pss}{uss}")
+
+    if mismatches:
+        raise SystemExit(f"MISMATCH with {', '.join(map(str, mismatches))} workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: push delivery through PushDispatcher vs. the inline, one-at-a-time
+call the scheduler used to make, against mock_push_server.py with an injected
+round-trip latency.
+
+Reports notifications per second for the inline baseline and for the
+dispatcher at several concurrency levels, and how long submit() holds up the
+scheduler thread per notification.
+
+Usage:
+    python benchmarks/bench_push_dispatch.py [--latency-ms 100] [--concurrency 16,64,256] [--notifications 5000]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from push_dispatch import PushDispatcher
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("mock_push_server exited during startup")
+        try:
+            return server_stats(port)
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("mock_push_server did not come up")
+
+
+def server_stats(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        connection.request('GET', '/stats')
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def inline_rate(port, n):
+    """The old path: one blocking request after another (with keep-alive, to be fair)."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    body = json.dumps({'to': 'user_12345', 'notification': {'title': 'Time for Medication', 'body': 'Take it.'}})
+    start = time.perf_counter()
+    for _ in range(n):
+        connection.request('POST', '/push', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"push failed with HTTP {response.status}")
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return n / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--concurrency', default='16,64,256')
+    parser.add_argument('--notifications', type=int, default=5000)
+    parser.add_argument('--inline', type=int, default=30, help="requests for the inline baseline")
+    args = parser.parse_args()
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, 'mock_push_server.py'),
+                                '--port', str(port), '--latency-ms', str(args.latency_ms)],
+                               stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+        print(f"mock push server: {args.latency_ms:.0f} ms per request")
+        print(f"inline            : {inline_rate(port, args.inline):8.1f} notifications/s")
+
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            dispatcher = PushDispatcher(f"http://127.0.0.1:{port}/push", concurrency=concurrency).start()
+            start = time.perf_counter()
+            submit_s = 0.0
+            for i in range(args.notifications):
+                before = time.perf_counter()
+                dispatcher.submit(f"user_{i}", "Time for Medication", "Take your 500 MG Tablet of Metformin HCL now.")
+                submit_s += time.perf_counter() - before
+            dispatcher.drain()
+            elapsed = time.perf_counter() - start
+            stats = dispatcher.stats()
+            dispatcher.close()
+            if stats['sent'] != args.notifications:
+                raise SystemExit(f"only {stats['sent']} of {args.notifications} notifications were delivered")
+            print(f"dispatcher x{concurrency:<4}: {args.notifications / elapsed:8.1f} notifications/s"
+                  f"  submit {submit_s / args.notifications * 1e6:6.1f} us"
+                  f"  latency {stats['mean_latency_ms']:6.1f} ms")
+        print(f"server saw at most {server_stats(port)['max_in_flight']} requests in flight")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
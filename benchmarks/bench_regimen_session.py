@@ -0,0 +1,72 @@
+"""
+Benchmark: applying one-drug regimen changes through RegimenSession vs. re-running
+check_for_interactions + generate_final_warning over the full list each time.
+
+Usage:
+    python benchmarks/bench_regimen_session.py [--size 40] [--changes 20000]
+"""
+import argparse
+import random
+import time
+
+from bench_interaction_index import MedMindersDDIWarningSystem, build_lookup_table
+from drug_to_drug import RegimenSession
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=2000)
+    parser.add_argument('--pairs', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=40, help="regimen size the changes hover around")
+    parser.add_argument('--changes', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lookup_table = build_lookup_table(args.drugs, args.pairs, rng)
+    system = MedMindersDDIWarningSystem(lookup_table)
+
+    # A stream of single-drug changes that keeps the regimen near --size
+    regimen = rng.sample(names, args.size)
+    changes = []
+    current = list(regimen)
+    for _ in range(args.changes):
+        if len(current) >= args.size and rng.random() < 0.5:
+            drug = rng.choice(current)
+            current.remove(drug)
+            changes.append(('remove', drug))
+        else:
+            drug = rng.choice([name for name in rng.sample(names, 5) if name not in current] or names[:1])
+            if drug not in current:
+                current.append(drug)
+            changes.append(('add', drug))
+
+    start = time.perf_counter()
+    current = list(regimen)
+    full_warnings = []
+    for action, drug in changes:
+        if action == 'add':
+            current.append(drug)
+        else:
+            current.remove(drug)
+        full_warnings.append(system.generate_final_warning(system.check_for_interactions(current)))
+    full_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session = RegimenSession(system, regimen)
+    session_codes = []
+    for action, drug in changes:
+        getattr(session, action)(drug)
+        session_codes.append(session.current_warning()['status_code'])
+    session_s = time.perf_counter() - start
+
+    if session_codes != [warning['status_code'] for warning in full_warnings]:
+        raise SystemExit("MISMATCH between RegimenSession and full re-checks")
+
+    print(f"{len(changes)} single-drug changes around a {args.size}-drug regimen, status codes identical")
+    print(f"full re-check  : {full_s / len(changes) * 1e6:8.1f} us/change")
+    print(f"RegimenSession : {session_s / len(changes) * 1e6:8.1f} us/change  ({full_s / session_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
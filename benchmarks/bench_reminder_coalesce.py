@@ -0,0 +1,94 @@
+"""
+Benchmark: push volume with and without ReminderCoalescer over one simulated
+day for a synthetic population.
+
+Each user takes 2-8 medications; most doses land on common slots (breakfast,
+lunch, dinner, bedtime), the rest on random quarter hours. Both runs replay the
+same day on a virtual clock and count the pushes sent in total and in the
+busiest minute, plus the scheduler-side cost per reminder.
+
+Usage:
+    python benchmarks/bench_reminder_coalesce.py [--users 100000]
+"""
+import argparse
+import collections
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_coalesce import ReminderCoalescer
+from reminder_engine import ReminderScheduler
+
+COMMON_SLOTS = ['07:30', '08:00', '12:00', '18:00', '20:00', '21:00']
+
+
+def population(users, common, rng):
+    entries = []
+    for user in range(users):
+        user_id = f"user_{user}"
+        for med in range(rng.randint(2, 8)):
+            if rng.random() < common:
+                time_str = rng.choice(COMMON_SLOTS)
+            else:
+                time_str = f"{rng.randrange(24):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+            entries.append((time_str, 'UTC', {'user_id': user_id, 'med_name': f"Med {med}",
+                                              'dosage': '10 MG Tablet', 'time_of_day': 'Daily'}))
+    return entries
+
+
+def render(reminders):
+    return "Time for Medication", ", ".join(reminder['med_name'] for reminder in reminders)
+
+
+def simulate(entries, coalesce, start):
+    clock = [start]
+    per_minute = collections.Counter()
+
+    def send(user_id, title, message):
+        per_minute[int(clock[0] // 60)] += 1
+
+    scheduler = ReminderScheduler(clock=lambda: clock[0])
+    if coalesce:
+        coalescer = ReminderCoalescer(scheduler, send, render)
+        callback = coalescer.add
+    else:
+        def callback(reminder):
+            send(reminder['user_id'], *render([reminder]))
+    scheduler.add_daily_jobs((time_str, tz, callback, (reminder,)) for time_str, tz, reminder in entries)
+
+    elapsed = 0.0
+    for _ in range(24 * 60):
+        clock[0] += 60
+        tick = time.perf_counter()
+        scheduler.run_pending()
+        elapsed += time.perf_counter() - tick
+    return sum(per_minute.values()), max(per_minute.values()), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--common', type=float, default=0.7, help="share of doses on the common slots")
+    parser.add_argument('--seed', type=int, default=59)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = population(args.users, args.common, rng)
+    start = 1_700_006_400.0  # midnight UTC
+
+    print(f"{args.users} users, {len(entries)} reminders/day")
+    baseline = None
+    for name, coalesce in (('one push per reminder', False), ('coalesced per minute', True)):
+        pushes, peak, elapsed = simulate(entries, coalesce, start)
+        if pushes == 0:
+            raise SystemExit("no pushes were sent")
+        baseline = baseline or (pushes, peak)
+        print(f"{name:<22}: {pushes:>8} pushes/day ({pushes / baseline[0]:5.1%}), busiest minute {peak:>7} "
+              f"({peak / baseline[1]:5.1%}), {elapsed / len(entries) * 1e6:5.2f} us/reminder")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: ReminderScheduler (min-heap) vs. the `schedule` library with 10k-1M
+daily reminder jobs.
+
+For each size both schedulers get the same jobs (random HH:MM daily reminders)
+and the script measures:
+
+    register    - adding all jobs (heap bulk: one add_daily_jobs call, each job in
+                  one of ZONES)
+    idle tick   - one run_pending() with nothing due (the old loop paid this every second)
+    cancel      - per cancelled job
+    fire        - running 1000 jobs that are due
+    wakeups/day - how often the process wakes up in a day: once a second for the
+                  polling loop, once per distinct fire time for the heap
+
+Usage:
+    python benchmarks/bench_reminder_engine.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schedule
+from reminder_engine import ReminderScheduler
+
+ZONES = ['America/New_York', 'America/Chicago', 'America/Denver', 'America/Los_Angeles',
+         'Europe/London', 'Europe/Berlin', 'Asia/Kolkata', 'Australia/Sydney']
+
+
+def noop(*args):
+    pass
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_schedule(times, cancel_picks, fire_picks):
+    sched = schedule.Scheduler()
+
+    def register():
+        return [sched.every().day.at(time_str).do(noop) for time_str in times]
+
+    register_s, jobs = timed(register)
+    idle_s, _ = timed(sched.run_pending)
+
+    start = time.perf_counter()
+    for i in cancel_picks:
+        sched.cancel_job(jobs[i])
+    cancel_s = (time.perf_counter() - start) / len(cancel_picks)
+
+    past = datetime.datetime.now() - datetime.timedelta(seconds=1)
+    for i in fire_picks:
+        jobs[i].next_run = past
+    fire_s, _ = timed(sched.run_pending)
+    return register_s, idle_s, cancel_s, fire_s
+
+
+def bench_heap(times, cancel_picks, fire_picks, bulk=False):
+    scheduler = ReminderScheduler()
+
+    def register():
+        return [scheduler.daily_at(time_str, noop) for time_str in times]
+
+    def register_bulk():
+        return scheduler.add_daily_jobs((time_str, ZONES[i % len(ZONES)], noop, ())
+                                        for i, time_str in enumerate(times))
+
+    register_s, jobs = timed(register_bulk if bulk else register)
+    idle_s, _ = timed(scheduler.run_pending)
+
+    start = time.perf_counter()
+    for i in cancel_picks:
+        scheduler.cancel(jobs[i])
+    cancel_s = (time.perf_counter() - start) / len(cancel_picks)
+
+    now = time.time()
+    for i in fire_picks:
+        scheduler.reschedule(jobs[i], now - 1)
+    fire_s, ran = timed(scheduler.run_pending, now)
+    assert ran == len(fire_picks), ran
+    return register_s, idle_s, cancel_s, fire_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--cancels', type=int, default=100)
+    parser.add_argument('--fires', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=47)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'jobs':>9} {'scheduler':<10} {'register':>10} {'idle tick':>12} {'cancel/job':>12} "
+          f"{'fire 1000':>11} {'wakeups/day':>12}")
+    for n in [int(size) for size in args.sizes.split(',')]:
+        times = [f"{rng.randrange(24):02d}:{rng.randrange(60):02d}" for _ in range(n)]
+        picks = rng.sample(range(n), args.cancels + args.fires)
+        cancel_picks, fire_picks = picks[:args.cancels], picks[args.cancels:]
+
+        zoned_slots = len({(time_str, i % len(ZONES)) for i, time_str in enumerate(times)})
+        for name, bench, wakeups in (('schedule', bench_schedule, 86400),
+                                     ('heap', bench_heap, len(set(times))),
+                                     ('heap bulk', lambda *a: bench_heap(*a, bulk=True), zoned_slots)):
+            register_s, idle_s, cancel_s, fire_s = bench(times, cancel_picks, fire_picks)
+            print(f"{n:>9} {name:<10} {register_s:>9.2f}s {idle_s * 1e3:>10.3f}ms {cancel_s * 1e6:>10.1f}us "
+                  f"{fire_s * 1e3:>9.1f}ms {wakeups:>12}")
+
+
+if __name__ == '__main__':
+    main()
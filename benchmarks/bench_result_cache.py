@@ -0,0 +1,97 @@
+"""
+Benchmark: check_for_interactions + generate_final_warning with no result cache,
+a MemoryResultCache and a SQLiteResultCache, on a patient stream where a small
+set of common regimens repeats (Zipf-distributed, drugs in random order).
+Every cached run must return exactly the uncached results, pair orientation
+included.
+
+The "warm" pass opens the same SQLite file again with a fresh system, which is
+what another worker process gets from the shared cache; the tiered run puts a
+per-process LRU in front of it. Each configuration reports the best of --repeat
+runs, each with a fresh system and cache (the cold SQLite run clears the file).
+
+Usage:
+    python benchmarks/bench_result_cache.py [--patients 100000] [--min-drugs 3 --max-drugs 12]
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from bench_interaction_index import MedMindersDDIWarningSystem, build_lookup_table
+from ddi_cache import MemoryResultCache, SQLiteResultCache, TieredResultCache
+
+
+def screen_all(system, regimens):
+    start = time.perf_counter()
+    results = []
+    for regimen in regimens:
+        interactions = system.check_for_interactions(regimen)
+        system.generate_final_warning(interactions)
+        results.append(interactions)
+    return time.perf_counter() - start, results
+
+
+def best_of(repeat, make_system, regimens):
+    """Fastest of `repeat` screen_all runs, each on a fresh system and cache."""
+    runs = [screen_all(make_system(), regimens) for _ in range(repeat)]
+    return min(elapsed for elapsed, _ in runs), runs[-1][1]
+
+
+def cleared(cache):
+    cache.clear()
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=2000)
+    parser.add_argument('--pairs', type=int, default=50000)
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--distinct-regimens', type=int, default=5000)
+    parser.add_argument('--min-drugs', type=int, default=3)
+    parser.add_argument('--max-drugs', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=23)
+    parser.add_argument('--repeat', type=int, default=3, help="report the best of this many runs")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lookup_table = build_lookup_table(args.drugs, args.pairs, rng)
+    common = [rng.sample(names, rng.randint(args.min_drugs, args.max_drugs)) for _ in range(args.distinct_regimens)]
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(common))))
+    regimens = [rng.sample(regimen, len(regimen)) for regimen in rng.choices(common, cum_weights=weights,
+                                                                              k=args.patients)]
+
+    uncached_s, expected = best_of(args.repeat, lambda: MedMindersDDIWarningSystem(lookup_table), regimens)
+    print(f"{len(regimens)} patients over {len(common)} distinct regimens")
+    print(f"no cache       : {len(regimens) / uncached_s:10.0f} patients/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = os.path.join(tmp, 'ddi_results.sqlite')
+        runs = [
+            ('memory LRU', lambda: MemoryResultCache(max_entries=2000)),
+            ('SQLite', lambda: cleared(SQLiteResultCache(sqlite_path, max_entries=2000))),
+            ('SQLite, warm', lambda: SQLiteResultCache(sqlite_path, max_entries=2000)),
+            ('memory + SQLite', lambda: TieredResultCache(MemoryResultCache(max_entries=2000),
+                                                          SQLiteResultCache(sqlite_path, max_entries=2000))),
+        ]
+        for label, make_cache in runs:
+            caches = []
+
+            def make_system():
+                caches.append(make_cache())
+                return MedMindersDDIWarningSystem(lookup_table, result_cache=caches[-1])
+
+            elapsed, results = best_of(args.repeat, make_system, regimens)
+            cache = caches[-1]
+            if results != expected:
+                raise SystemExit(f"MISMATCH with the {label} cache")
+            stats = cache.stats()
+            print(f"{label:<15}: {len(regimens) / elapsed:10.0f} patients/s  hit rate {stats['hit_rate']:6.1%}"
+                  f"  evictions {stats['evictions']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: classify_severities over a whole description column vs. the original
+row-by-row df['Interaction_Description'].apply(assign_severity).
+
+Usage:
+    python benchmarks/bench_severity_classifier.py [--rows 1000000] [--processes 4]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from drug_to_drug import SEVERITY_KEYWORDS, classify_severities
+
+
+def original_assign_severity(description):
+    """The original per-row classifier, kept here as the baseline."""
+    desc = str(description).lower()
+    if any(re.search(kw, desc) for kw in [r'contraindicated', r'severe', r'life.?threatening', r'fatal']):
+        return 3
+    if any(re.search(kw, desc) for kw in [r'major interaction', r'monitor closely', r'increased toxicity']):
+        return 2
+    if any(re.search(kw, desc) for kw in [r'moderate interaction', r'minor interaction', r'generally safe']):
+        return 1
+    return 0
+
+
+FILLER = (
+    "the concentration of the object drug may be increased when combined with the precipitant "
+    "resulting in reduced efficacy; consider dose adjustment and therapeutic drug level checks"
+).split()
+
+
+def build_descriptions(n_rows, rng):
+    keywords = [kw.replace('.?', rng.choice(['', ' ', '-'])) for tier in SEVERITY_KEYWORDS.values() for kw in tier]
+    descriptions = []
+    for _ in range(n_rows):
+        words = rng.sample(FILLER, rng.randint(8, 20))
+        for _ in range(rng.choice([0, 0, 1, 1, 2])):
+            words.insert(rng.randint(0, len(words)), rng.choice(keywords).upper() if rng.random() < 0.1 else
+                         rng.choice(keywords))
+        descriptions.append(' '.join(words).capitalize() + '.')
+    return pd.Series(descriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    column = build_descriptions(args.rows, random.Random(args.seed))
+
+    start = time.perf_counter()
+    expected = column.apply(original_assign_severity).to_numpy()
+    apply_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    serial = classify_severities(column)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = classify_severities(column, processes=args.processes)
+    pooled_s = time.perf_counter() - start
+
+    if not ((serial == expected).all() and (pooled == expected).all()):
+        raise SystemExit("MISMATCH between classify_severities and the per-row classifier")
+
+    print(f"rows: {args.rows}, tiers identical")
+    print(f"row-by-row apply          : {apply_s:7.2f}s")
+    print(f"classify_severities       : {serial_s:7.2f}s  ({apply_s / serial_s:.1f}x)")
+    print(f"classify_severities x{args.processes:<3}  : {pooled_s:7.2f}s  ({apply_s / pooled_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: cold start of drug_to_drug as a library.
+
+Runs each scenario in a fresh interpreter and reports wall time and RSS
+(Linux, read from /proc/self/statm):
+
+    import        - `import drug_to_drug` only
+    compiled      - import + MedMindersDDIWarningSystem(<compiled demo database>)
+    dataframe     - import + MedMindersDDIWarningSystem(build_demo_lookup_table())
+
+The import scenario must not pull in pandas or NumPy. Pass --max-import-ms /
+--max-import-rss-mb to turn the numbers into a regression check (exit code 1).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 50]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIO = """
+import json, os, sys, time
+sys.path.insert(0, {repo_root!r})
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+rss_before = rss_mb()
+start = time.perf_counter()
+import drug_to_drug
+if {scenario!r} == 'compiled':
+    drug_to_drug.MedMindersDDIWarningSystem({database!r})
+elif {scenario!r} == 'dataframe':
+    drug_to_drug.MedMindersDDIWarningSystem(drug_to_drug.build_demo_lookup_table())
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{
+    'ms': elapsed_ms,
+    'rss_mb': rss_mb() - rss_before,
+    'heavy_modules': [m for m in ('pandas', 'numpy') if m in sys.modules],
+}}))
+"""
+
+
+def run_scenario(scenario, database, runs):
+    samples = []
+    for _ in range(runs):
+        code = SCENARIO.format(repo_root=REPO_ROOT, scenario=scenario, database=database)
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'ms': statistics.median(sample['ms'] for sample in samples),
+        'rss_mb': statistics.median(sample['rss_mb'] for sample in samples),
+        'heavy_modules': samples[-1]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float)
+    parser.add_argument('--max-import-rss-mb', type=float)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from drug_to_drug import build_demo_lookup_table, compile_lookup_table
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = compile_lookup_table(build_demo_lookup_table(), os.path.join(tmp, 'demo.ddi'))
+        results = {scenario: run_scenario(scenario, database, args.runs)
+                   for scenario in ('import', 'compiled', 'dataframe')}
+
+    for scenario, result in results.items():
+        heavy = ', '.join(result['heavy_modules']) or '-'
+        print(f"{scenario:<10} {result['ms']:8.1f} ms  +{result['rss_mb']:6.1f} MB RSS  heavy modules: {heavy}")
+
+    failures = []
+    imported = results['import']
+    if imported['heavy_modules']:
+        failures.append(f"import pulled in {', '.join(imported['heavy_modules'])}")
+    if args.max_import_ms is not None and imported['ms'] > args.max_import_ms:
+        failures.append(f"import took {imported['ms']:.1f} ms (limit {args.max_import_ms} ms)")
+    if args.max_import_rss_mb is not None and imported['rss_mb'] > args.max_import_rss_mb:
+        failures.append(f"import added {imported['rss_mb']:.1f} MB RSS (limit {args.max_import_rss_mb} MB)")
+    if failures:
+        raise SystemExit("COLD START REGRESSION: " + "; ".join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark suite: DDI screening on synthetic interaction tables from 10k to 5M pairs.
+
+For every table size the suite generates a synthetic table and a patient
+population, then loads the table in a fresh subprocess per source (DataFrame
+and compiled database) and measures:
+
+    load      - time to a first answer and the RSS the load added
+    single    - p50/p99/mean latency of check_for_interactions + generate_final_warning
+    batch     - p50/p99 latency of check_for_interactions_batch per batch, and patients/s
+    hits      - share of patients flagged and mean interactions per patient
+
+Drug popularity is Zipf-like for both the table and the regimens (a few drugs such
+as anticoagulants interact with hundreds of others and show up in many regimens),
+and regimen sizes run from 2 to 60 drugs with most patients on a handful. That
+keeps the flagged share away from both extremes (near 0 with uniform drugs, near
+1 with tiny vocabularies); --zipf and --max-drugs move it.
+
+The report is one JSON document (stdout, or --output), so runs can be stored and
+compared across releases; progress goes to stderr. Tables of several million
+pairs need a few GB of RAM for the DataFrame source; --max-dataframe-pairs skips
+it above a size.
+
+Usage:
+    python benchmarks/bench_suite.py [--pairs 10000,100000,1000000] [--output report.json]
+    python benchmarks/bench_suite.py --pairs 5000000 --max-dataframe-pairs 1000000
+"""
+import argparse
+import datetime
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SUITE_VERSION = 1
+SEVERITY_WEIGHTS = [0.10, 0.40, 0.35, 0.15]  # levels 0-3
+
+
+def drug_names(n_drugs):
+    return [f"Drug{i:07d}" for i in range(n_drugs)]
+
+
+def drugs_for(n_pairs):
+    """Vocabulary size for a table: dense enough for hubs, sparse enough to be realistic."""
+    return max(1000, int(8 * n_pairs ** 0.5))
+
+
+def popularity(n_drugs, zipf):
+    import numpy as np
+
+    weights = 1.0 / np.arange(1, n_drugs + 1) ** zipf
+    return weights / weights.sum()
+
+
+def synthetic_table(n_pairs, n_drugs, zipf, rng):
+    """DataFrame with DDI_Pair / Severity_Level / Interaction_Description for n_pairs distinct pairs."""
+    import numpy as np
+    import pandas as pd
+
+    weights = popularity(n_drugs, zipf)
+    codes = np.zeros(0, dtype=np.int64)
+    while len(codes) < n_pairs:
+        draw = int((n_pairs - len(codes)) * 1.3) + 1000
+        a = rng.choice(n_drugs, size=draw, p=weights)
+        b = rng.integers(0, n_drugs, size=draw)
+        keep = a != b
+        lo, hi = np.minimum(a, b)[keep], np.maximum(a, b)[keep]
+        codes = np.unique(np.concatenate([codes, lo * n_drugs + hi]))
+    codes = rng.permutation(codes)[:n_pairs]
+
+    names = drug_names(n_drugs)
+    lo, hi = (codes // n_drugs).tolist(), (codes % n_drugs).tolist()
+    return pd.DataFrame({
+        'DDI_Pair': [f"{names[a]} | {names[b]}" for a, b in zip(lo, hi)],
+        'Severity_Level': rng.choice(4, size=n_pairs, p=SEVERITY_WEIGHTS),
+        'Interaction_Description': [f"Synthetic interaction {names[a]}/{names[b]}" for a, b in zip(lo, hi)],
+    })
+
+
+def synthetic_regimens(n_patients, n_drugs, zipf, min_drugs, max_drugs, rng):
+    """Medication lists with 2-60 (by default) distinct drugs, most patients on a few."""
+    import numpy as np
+
+    weights = popularity(n_drugs, zipf)
+    names = drug_names(n_drugs)
+    sizes = np.clip(min_drugs + rng.geometric(0.25, size=n_patients) - 1, min_drugs, max_drugs)
+    regimens = []
+    for size in sizes.tolist():
+        regimens.append([names[i] for i in rng.choice(n_drugs, size=size, replace=False, p=weights).tolist()])
+    return regimens
+
+
+# --- Worker (runs in a fresh process per table source) ---
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def percentiles(samples):
+    """p50/p99/mean in milliseconds; None for each when there are no samples."""
+    import numpy as np
+
+    if not len(samples):
+        return {'p50_ms': None, 'p99_ms': None, 'mean_ms': None}
+    samples = np.asarray(samples, dtype=np.float64)
+    return {
+        'p50_ms': float(np.percentile(samples, 50) * 1e3),
+        'p99_ms': float(np.percentile(samples, 99) * 1e3),
+        'mean_ms': float(samples.mean() * 1e3),
+    }
+
+
+def run_worker(source, regimens_path, single_calls, batch_size):
+    with open(regimens_path, 'rb') as f:
+        regimens = pickle.load(f)
+    if source.endswith('.pkl'):
+        with open(source, 'rb') as f:
+            source = pickle.load(f)
+
+    from drug_to_drug import MedMindersDDIWarningSystem
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    system = MedMindersDDIWarningSystem(source)
+    system.generate_final_warning(system.check_for_interactions(regimens[0]))
+    load_s = time.perf_counter() - start
+    load_rss = rss_mb() - rss_before
+
+    latencies, flagged, interactions = [], 0, 0
+    for regimen in regimens[:single_calls]:
+        start = time.perf_counter()
+        results = system.check_for_interactions(regimen)
+        system.generate_final_warning(results)
+        latencies.append(time.perf_counter() - start)
+        flagged += bool(results)
+        interactions += len(results)
+
+    batch_size = min(batch_size, len(regimens))  # --patients below --batch-size still makes one batch
+    system.check_for_interactions_batch(regimens[:batch_size])  # builds the pair table
+    batch_latencies = []
+    start_all = time.perf_counter()
+    for start in range(0, len(regimens) - batch_size + 1, batch_size):
+        t0 = time.perf_counter()
+        system.check_for_interactions_batch(regimens[start:start + batch_size])
+        batch_latencies.append(time.perf_counter() - t0)
+    batch_s = time.perf_counter() - start_all
+
+    n_single = len(latencies)
+    return {
+        'load_s': load_s,
+        'load_rss_mb': load_rss,
+        'peak_rss_mb': rss_mb(),
+        'single': dict(percentiles(latencies), calls=n_single),
+        'batch': dict(percentiles(batch_latencies), batch_size=batch_size, batches=len(batch_latencies),
+                      patients_per_s=len(batch_latencies) * batch_size / batch_s if batch_s else None),
+        'flagged_share': flagged / n_single,
+        'mean_interactions': interactions / n_single,
+    }
+
+
+def measure(source, regimens_path, args):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', source, regimens_path,
+               '--single-calls', str(args.single_calls), '--batch-size', str(args.batch_size)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pairs', default='10000,100000,1000000',
+                        help="comma-separated table sizes (pairs), e.g. 10000,100000,1000000,5000000")
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--min-drugs', type=int, default=2)
+    parser.add_argument('--max-drugs', type=int, default=60)
+    parser.add_argument('--zipf', type=float, default=0.8, help="drug popularity skew")
+    parser.add_argument('--single-calls', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--max-dataframe-pairs', type=int, default=None,
+                        help="only measure the compiled source for larger tables")
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--worker', nargs=2, metavar=('SOURCE', 'REGIMENS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.single_calls, args.batch_size)))
+        return
+
+    import numpy as np
+    from drug_to_drug import compile_lookup_table
+
+    rng = np.random.default_rng(args.seed)
+    report = {
+        'suite': 'ddi',
+        'suite_version': SUITE_VERSION,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('worker', 'output')},
+        'results': [],
+    }
+
+    for n_pairs in [int(size) for size in args.pairs.split(',')]:
+        n_drugs = drugs_for(n_pairs)
+        print(f"{n_pairs} pairs over {n_drugs} drugs: generating", file=sys.stderr)
+        table = synthetic_table(n_pairs, n_drugs, args.zipf, rng)
+        regimens = synthetic_regimens(args.patients, n_drugs, args.zipf, args.min_drugs, args.max_drugs, rng)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            regimens_path = os.path.join(tmp, 'regimens.pkl')
+            with open(regimens_path, 'wb') as f:
+                pickle.dump(regimens, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            sources = {}
+            if args.max_dataframe_pairs is None or n_pairs <= args.max_dataframe_pairs:
+                sources['dataframe'] = os.path.join(tmp, 'table.pkl')
+                with open(sources['dataframe'], 'wb') as f:
+                    pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            start = time.perf_counter()
+            sources['compiled'] = compile_lookup_table(table, os.path.join(tmp, 'table.ddi'))
+            compile_s = time.perf_counter() - start
+            del table
+
+            for name, source in sources.items():
+                print(f"  {name}: measuring", file=sys.stderr)
+                result = {'pairs': n_pairs, 'drugs': n_drugs, 'patients': args.patients, 'source': name}
+                if name == 'compiled':
+                    result['compile_s'] = compile_s
+                    result['file_mb'] = os.path.getsize(source) / 2 ** 20
+                result.update(measure(source, regimens_path, args))
+                report['results'].append(result)
+                print(f"  {name}: load {result['load_s']:.2f}s +{result['load_rss_mb']:.0f}MB"
+                      f"  single p50 {result['single']['p50_ms']:.3f}ms p99 {result['single']['p99_ms']:.3f}ms"
+                      f"  batch {result['batch']['patients_per_s']:.0f} patients/s"
+                      f"  flagged {result['flagged_share']:.0%}", file=sys.stderr)
+
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(document + '\n')
+    else:
+        print(document)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Check: push delivery through PushDispatcher against a misbehaving provider.
+
+mock_push_server.py is started with a rate limit (429 + Retry-After), a share of
+transient 503s, and device tokens that are gone (410). Every push to a valid
+user must be delivered exactly once, every push to a gone one must end up in
+the dead-letter store with its reason, and nothing may be dropped. Run once
+without and once with a client-side token bucket just under the provider's
+limit, to show how many 429s the bucket avoids.
+
+A third run overflows a small queue with non-blocking submits
+(block=False, dead_letter_when_full=True), as the server script does: no
+submit may wait, and every push must be either delivered or dead-lettered as
+"queue full".
+
+Exits non-zero on any violation.
+
+Usage:
+    python benchmarks/check_push_retries.py [--notifications 3000] [--provider-rate 400] [--error-rate 0.1]
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from bench_push_dispatch import REPO_ROOT, free_port, server_stats, wait_ready
+from push_dispatch import PushDispatcher
+
+
+def run(args, client_rate):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'mock_push_server.py'), '--port', str(port),
+         '--latency-ms', str(args.latency_ms), '--rate-limit', str(args.provider_rate),
+         '--error-rate', str(args.error_rate), '--seed', '1'], stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+        dispatcher = PushDispatcher(f"http://127.0.0.1:{port}/push", concurrency=args.concurrency,
+                                    rate_limit=client_rate, burst=args.provider_rate / 20, max_attempts=8,
+                                    seed=2).start()
+        invalid = set(range(0, args.notifications, args.notifications // args.invalid))
+        start = time.perf_counter()
+        for i in range(args.notifications):
+            user_id = f"invalid_{i}" if i in invalid else f"user_{i}"
+            dispatcher.submit(user_id, "Time for Medication", "Take your 500 MG Tablet of Metformin HCL now.")
+        dispatcher.drain()
+        elapsed = time.perf_counter() - start
+        stats = dispatcher.stats()
+        dead = dispatcher.dead_letters.entries(limit=args.notifications)
+        dispatcher.close()
+        server = server_stats(port)
+    finally:
+        process.terminate()
+        process.wait()
+
+    failures = []
+    expected = args.notifications - len(invalid)
+    if stats['sent'] != expected or server['delivered'] != expected:
+        failures.append(f"{stats['sent']} sent / {server['delivered']} delivered, expected {expected}")
+    if sorted(entry['payload']['to'] for entry in dead) != sorted(f"invalid_{i}" for i in invalid):
+        failures.append(f"{len(dead)} dead letters, expected the {len(invalid)} invalid_ users")
+    if any(entry['reason'] != "HTTP 410" for entry in dead):
+        failures.append("a dead letter has an unexpected reason")
+    if stats['dropped'] or stats['queued'] or stats['retry_queue']:
+        failures.append(f"leftovers: {stats}")
+
+    label = f"client bucket {client_rate:.0f}/s" if client_rate else "no client limit"
+    print(f"{label:<22} {elapsed:6.1f} s  {args.notifications / elapsed:6.0f} pushes/s  "
+          f"429s {server['statuses'].get('429', 0):>5}  503s {server['statuses'].get('503', 0):>4}  "
+          f"retries {stats['retried']:>5}  dead letters {stats['dead_lettered']}")
+    return failures
+
+
+def overflow(args, pushes=200, queue_size=10):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'mock_push_server.py'), '--port', str(port),
+         '--latency-ms', '100'], stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+        dispatcher = PushDispatcher(f"http://127.0.0.1:{port}/push", concurrency=2, queue_size=queue_size).start()
+        slowest = 0.0
+        for i in range(pushes):
+            start = time.perf_counter()
+            dispatcher.submit(f"user_{i}", "Time for Medication", "Take it.", block=False, dead_letter_when_full=True)
+            slowest = max(slowest, time.perf_counter() - start)
+        dispatcher.drain()
+        stats = dispatcher.stats()
+        dead = dispatcher.dead_letters.entries(limit=pushes)
+        dispatcher.close()
+        server = server_stats(port)
+    finally:
+        process.terminate()
+        process.wait()
+
+    failures = []
+    if slowest > 0.05:
+        failures.append(f"overflow: a non-blocking submit took {slowest * 1e3:.0f} ms")
+    if stats['sent'] + len(dead) != pushes or server['delivered'] != stats['sent']:
+        failures.append(f"overflow: {stats['sent']} sent + {len(dead)} dead letters for {pushes} pushes")
+    if any(entry['reason'] != "queue full" for entry in dead) or not dead:
+        failures.append("overflow: expected the overflow in the dead letters as 'queue full'")
+    print(f"{'overflow, block=False':<22} slowest submit {slowest * 1e3:.2f} ms  sent {stats['sent']}  "
+          f"dead letters {len(dead)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notifications', type=int, default=3000)
+    parser.add_argument('--invalid', type=int, default=60, help="pushes to unregistered devices")
+    parser.add_argument('--provider-rate', type=int, default=400, help="provider's pushes per second")
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    logging.getLogger('push_dispatch').setLevel(logging.ERROR)  # one warning per dead letter
+    results = [run(args, None), run(args, args.provider_rate * 0.95), overflow(args)]
+    failures = [failure for result in results for failure in result]
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK: every valid push delivered exactly once, every gone device and every overflow dead-lettered")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Check: MedMindersDDIWarningSystem.reload() under concurrent lookups.
+
+Reader threads screen random regimens (single and batch calls) while the main
+thread keeps swapping between two interaction tables, one of them also loaded
+from a compiled database. Every result must match what one of the tables gives
+on its own, never a mix of the two. The table versions differ in every
+description, so a check that straddled a swap would show up as a mismatch.
+
+Exits non-zero on any inconsistency or reader error.
+
+Usage:
+    python benchmarks/check_reload_consistency.py [--threads 8] [--reloads 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from bench_interaction_index import MedMindersDDIWarningSystem, build_lookup_table
+from ddi_cache import MemoryResultCache
+from ddi_canonical import DrugNameCanonicalizer
+from drug_to_drug import compile_lookup_table
+
+
+def result_key(results):
+    """Order-independent form of a check_for_interactions result."""
+    return frozenset((frozenset(r['Pair'].split(' + ')), r['Severity_Numeric'], r['Description']) for r in results)
+
+
+def reader(system, regimens, expected, stop, failures, counts, seed):
+    rng = random.Random(seed)
+    checks = 0
+    try:
+        while not stop.is_set():
+            if rng.random() < 0.1:
+                batch = rng.sample(range(len(regimens)), 20)
+                results, warnings = system.check_for_interactions_batch([regimens[r] for r in batch])
+                outcomes = zip(batch, results, warnings)
+            else:
+                r = rng.randrange(len(regimens))
+                results = system.check_for_interactions(regimens[r])
+                outcomes = [(r, results, system.generate_final_warning(results))]
+
+            for r, results, warning in outcomes:
+                key = result_key(results)
+                if key not in expected[r]:
+                    failures.append(f"regimen {r}: result matches neither table")
+                elif warning['status_code'] != expected[r][key]:
+                    failures.append(f"regimen {r}: warning does not match its results")
+                checks += 1
+    except Exception as exc:  # a reader crash is a failure too
+        failures.append(f"reader raised {exc!r}")
+    counts.append(checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drugs', type=int, default=3000)
+    parser.add_argument('--pairs', type=int, default=30000)
+    parser.add_argument('--regimens', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--reloads', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=29)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, table_a = build_lookup_table(args.drugs, args.pairs, rng)
+    _, table_b = build_lookup_table(args.drugs, args.pairs, rng)
+    table_b['Interaction_Description'] = table_b['Interaction_Description'] + ' (v2)'
+    # Mixed-case spellings make the canonicalizer do real work, and it has to be
+    # rebuilt on every reload
+    regimens = [[name.upper() if rng.random() < 0.3 else name for name in rng.sample(names, rng.randint(5, 30))]
+                for _ in range(args.regimens)]
+
+    # Expected result (and warning level) of every regimen under each table
+    expected = [{} for _ in regimens]
+    for table in (table_a, table_b):
+        system = MedMindersDDIWarningSystem(table)
+        system.canonicalizer = DrugNameCanonicalizer.for_system(system)
+        for r, regimen in enumerate(regimens):
+            results = system.check_for_interactions(regimen)
+            expected[r][result_key(results)] = system.generate_final_warning(results)['status_code']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_b = compile_lookup_table(table_b, os.path.join(tmp, 'table_b.ddi'))
+        system = MedMindersDDIWarningSystem(table_a, result_cache=MemoryResultCache(max_entries=200))
+        system.canonicalizer = DrugNameCanonicalizer.for_system(system)
+
+        stop = threading.Event()
+        failures, counts = [], []
+        readers = [threading.Thread(target=reader, args=(system, regimens, expected, stop, failures, counts, seed))
+                   for seed in range(args.threads)]
+        for thread in readers:
+            thread.start()
+
+        sources = [table_b, table_a, compiled_b, table_a]
+        start = time.perf_counter()
+        for n in range(args.reloads):
+            source = sources[n % len(sources)]
+            if n % 2:
+                system.reload(source)
+            else:
+                system.reload_async(source).result()
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    print(f"{args.reloads} reloads in {elapsed:.1f}s while {args.threads} threads ran {sum(counts)} checks")
+    if failures:
+        for failure in failures[:10]:
+            print("FAIL:", failure)
+        sys.exit(f"{len(failures)} inconsistent results")
+    print("OK: every result matched a single table version")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Check: ReminderCoalescer keeps delivering when one group's push fails, and
+groups reminders by the time they were due.
+
+1. Three users with reminders due at 08:00; one of them has a reminder without
+   the 'med_name' the renderer needs. The other two users still get one push
+   each, and the broken group is counted as failed, not as a push.
+2. The same with send() raising for one user.
+3. An exception that is not an Exception (KeyboardInterrupt-like) escapes
+   flush() while rendering the first group: the groups after it are kept and
+   sent on the next tick.
+4. A tick that starts late and runs across a minute boundary: two reminders
+   due at 08:00 for one user still make one push.
+
+Exits non-zero on any violation.
+
+Usage:
+    python benchmarks/check_reminder_coalesce.py
+"""
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_coalesce import ReminderCoalescer
+from reminder_engine import ReminderScheduler
+
+EIGHT_AM = 1_700_035_200.0  # 08:00 UTC
+
+
+class Interrupt(BaseException):
+    pass
+
+
+def render(reminders):
+    if any(reminder.get('med_name') == 'interrupt' for reminder in reminders):
+        raise Interrupt()
+    return "Time for Medication", ", ".join(reminder['med_name'] for reminder in reminders)
+
+
+def reminder(user_id, med_name=None):
+    entry = {'user_id': user_id, 'dosage': '10 MG Tablet'}
+    if med_name is not None:
+        entry['med_name'] = med_name
+    return entry
+
+
+def run(reminders, clock, failing_user=None):
+    sent = []
+
+    def send(user_id, title, message):
+        if user_id == failing_user:
+            raise ConnectionError("provider unreachable")
+        sent.append((user_id, message))
+
+    scheduler = ReminderScheduler(clock=clock)
+    coalescer = ReminderCoalescer(scheduler, send, render)
+    for entry in reminders:
+        scheduler.schedule_at(EIGHT_AM, coalescer.add, entry)
+    return scheduler, coalescer, sent
+
+
+def check_render_failure():
+    reminders = [reminder('alice', 'Metformin'), reminder('bob'), reminder('carol', 'Lisinopril'),
+                 reminder('alice', 'Vitamin D')]
+    scheduler, coalescer, sent = run(reminders, lambda: EIGHT_AM)
+    scheduler.run_pending()
+    failures = []
+    if sorted(sent) != [('alice', "Metformin, Vitamin D"), ('carol', "Lisinopril")]:
+        failures.append(f"render failure: sent {sent}, expected alice's and carol's pushes")
+    stats = coalescer.stats()
+    if (stats['pushes'], stats['failed']) != (2, 1):
+        failures.append(f"render failure: stats {stats}, expected 2 pushes and 1 failed reminder")
+    return failures
+
+
+def check_send_failure():
+    reminders = [reminder('alice', 'Metformin'), reminder('bob', 'Omeprazole'), reminder('carol', 'Lisinopril')]
+    scheduler, coalescer, sent = run(reminders, lambda: EIGHT_AM, failing_user='bob')
+    scheduler.run_pending()
+    failures = []
+    if sorted(user_id for user_id, _ in sent) != ['alice', 'carol']:
+        failures.append(f"send failure: sent {sent}, expected alice's and carol's pushes")
+    if coalescer.pushes != 2:
+        failures.append(f"send failure: {coalescer.pushes} pushes counted, expected 2")
+    return failures
+
+
+def check_escape():
+    reminders = [reminder('alice', 'interrupt'), reminder('bob', 'Omeprazole'), reminder('carol', 'Lisinopril')]
+    scheduler, coalescer, sent = run(reminders, lambda: EIGHT_AM)
+    failures = []
+    try:
+        scheduler.run_pending()
+        failures.append("escape: the interrupt did not reach the caller")
+    except Interrupt:
+        pass
+    if sent or coalescer.stats()['pushes']:
+        failures.append(f"escape: sent {sent} before the interrupt was handled")
+    scheduler.run_pending()
+    if sorted(user_id for user_id, _ in sent) != ['bob', 'carol']:
+        failures.append(f"escape: sent {sent} after the next tick, expected bob's and carol's pushes")
+    return failures
+
+
+def check_late_tick():
+    now = [EIGHT_AM + 58.5]
+
+    def clock():
+        now[0] += 0.5  # every call takes half a second: the tick runs into 08:01
+        return now[0]
+
+    scheduler, coalescer, sent = run([reminder('alice', 'Metformin'), reminder('alice', 'Vitamin D')], clock)
+    scheduler.run_pending()
+    scheduler.run_pending()
+    if sent != [('alice', "Metformin, Vitamin D")]:
+        return [f"late tick: sent {sent}, expected one push for both of alice's reminders"]
+    return []
+
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)  # the failures are expected; keep their logs out of the output
+    failures = check_render_failure() + check_send_failure() + check_escape() + check_late_tick()
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK: failed groups are isolated, unsent groups survive an escape, late ticks keep groups together")
+
+
+if __name__ == '__main__':
+    main()
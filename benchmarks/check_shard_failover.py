@@ -0,0 +1,178 @@
+"""
+Failover check for reminder_shards.py: kill a worker and watch its reminders
+fire from a peer within the lease timeout, with no reminder sent twice.
+
+Runs real worker processes against one shared SQLite store, on a virtual clock
+that runs --speed times faster than real time (all workers share it), so a
+quarter hour of 08:00-ish reminders plays out in about half a minute:
+
+    1. three workers split the partitions
+    2. one is killed with SIGKILL (no chance to release its leases)
+    3. a fourth worker joins later; only the partitions the hash ring moves to
+       it may change hands
+    4. every reminder in the window must have fired exactly once, and the
+       killed worker's reminders at most lease_ttl + renew interval late
+
+Exits non-zero on any violation.
+
+Usage:
+    python benchmarks/check_shard_failover.py [--users 3000] [--speed 30]
+"""
+import argparse
+import collections
+import datetime
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_engine import ReminderScheduler
+from reminder_shards import ShardStore, ShardWorker, partition_of
+
+BASE = datetime.datetime(2026, 1, 5, 7, 58, tzinfo=datetime.timezone.utc).timestamp()
+FIRST_SLOT = 8 * 60  # 08:00
+KILL_AT = BASE + 6 * 60  # 08:04
+
+
+def run_worker(args):
+    t0 = args.t0
+    clock = lambda: BASE + (time.time() - t0) * args.speed
+    scheduler = ReminderScheduler(clock=clock)
+    log = open(args.log, 'a', buffering=1)
+    worker = ShardWorker(ShardStore(args.database), scheduler, args.worker,
+                         lambda payload: log.write(f"{payload['job']} {clock():.3f}\n"),
+                         lease_ttl=args.ttl, horizon=600)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    worker.start()
+    try:
+        while True:
+            scheduler.run_pending()
+            time.sleep(0.005)
+    finally:
+        worker.stop()
+
+
+def owners(database):
+    with sqlite3.connect(database, timeout=30) as conn:
+        return dict(conn.execute("SELECT partition, owner FROM shard_leases"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--minutes', type=int, default=15, help="reminder slots from 08:00 on")
+    parser.add_argument('--speed', type=float, default=30.0, help="virtual seconds per real second")
+    parser.add_argument('--ttl', type=float, default=90.0, help="lease TTL in virtual seconds")
+    parser.add_argument('--seed', type=int, default=61)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--log', help=argparse.SUPPRESS)
+    parser.add_argument('--t0', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args)
+
+    last_slot = BASE + (args.minutes - 1 + 2) * 60
+    if last_slot <= KILL_AT:
+        raise SystemExit(f"FAILED: w2 is killed at 08:04, after the last reminder slot "
+                         f"({args.minutes} minutes from 08:00); failover would not be exercised. "
+                         f"Use --minutes 6 or more.")
+
+    rng = random.Random(args.seed)
+    jobs = {}
+    for user in range(args.users):
+        for _ in range(rng.randint(1, 3)):
+            minute = FIRST_SLOT + rng.randrange(args.minutes)
+            jobs[len(jobs)] = (f"user_{user}", BASE + (minute - 7 * 60 - 58) * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'shards.db')
+        store = ShardStore(database)
+        store.import_jobs(((user_id, datetime.datetime.fromtimestamp(due, datetime.timezone.utc).strftime('%H:%M'),
+                            'UTC', {'job': job}) for job, (user_id, due) in jobs.items()), now=BASE)
+        store.close()
+
+        t0 = time.time()
+        virtual = lambda: BASE + (time.time() - t0) * args.speed
+        processes = {}
+
+        def spawn(name):
+            processes[name] = subprocess.Popen(
+                [sys.executable, __file__, '--worker', name, '--database', database, '--t0', str(t0),
+                 '--speed', str(args.speed), '--ttl', str(args.ttl), '--log', os.path.join(tmp, f'{name}.log')])
+
+        def sleep_until(virtual_time):
+            time.sleep(max(0.0, (virtual_time - virtual()) / args.speed))
+
+        for name in ('w1', 'w2', 'w3'):
+            spawn(name)
+
+        sleep_until(KILL_AT)
+        killed_partitions = {p for p, owner in owners(database).items() if owner == 'w2'}
+        processes.pop('w2').kill()
+        killed_at = virtual()
+
+        sleep_until(BASE + 10 * 60)  # 08:08
+        before_join = owners(database)
+        spawn('w4')
+        sleep_until(BASE + 12 * 60)  # 08:10, leases settled
+        after_join = owners(database)
+
+        sleep_until(BASE + (FIRST_SLOT + args.minutes - 7 * 60 - 58) * 60 + 2 * args.ttl)
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+
+        fired = collections.defaultdict(list)
+        per_worker = {}
+        for name in ('w1', 'w2', 'w3', 'w4'):
+            with open(os.path.join(tmp, f'{name}.log')) as log:
+                lines = [line.split() for line in log]
+            per_worker[name] = len(lines)
+            for job, at in lines:
+                fired[int(job)].append((float(at), name))
+
+    failures = []
+    duplicates = {job: fires for job, fires in fired.items() if len(fires) > 1}
+    missing = set(jobs) - set(fired)
+    if duplicates:
+        failures.append(f"{len(duplicates)} reminders fired more than once, e.g. {next(iter(duplicates.items()))}")
+    if missing:
+        failures.append(f"{len(missing)} reminders never fired")
+
+    late_limit = args.ttl + args.ttl / 3 + args.speed  # lease expiry + renew interval + 1 s of real-time slack
+    orphaned = [(fires[0][0] - jobs[job][1]) for job, fires in fired.items()
+                if partition_of(jobs[job][0]) in killed_partitions and jobs[job][1] > killed_at]
+    worst = max(orphaned, default=0.0)
+    if killed_at >= last_slot:
+        failures.append("w2 was killed after the last reminder slot")
+    if not orphaned:
+        failures.append("none of the killed worker's reminders fired from a peer; failover was not exercised")
+    if worst > late_limit:
+        failures.append(f"a reminder of the killed worker fired {worst:.0f} s late (limit {late_limit:.0f} s)")
+
+    moved = {p for p in after_join if after_join[p] != before_join[p]}
+    if any(after_join[p] != 'w4' for p in moved):
+        failures.append("rebalancing moved partitions that did not go to the joining worker")
+
+    print(f"{len(jobs)} reminders, fired per worker: {per_worker}")
+    killed_clock = datetime.datetime.fromtimestamp(killed_at, datetime.timezone.utc)
+    print(f"killed w2 at {killed_clock:%H:%M:%S} holding {len(killed_partitions)} partitions; "
+          f"{len(orphaned)} of its reminders fired from peers, at most {worst:.0f} s late "
+          f"(lease TTL {args.ttl:.0f} s)")
+    print(f"w4 joined: {len(moved)} of {len(after_join)} partitions moved, all to w4")
+    print(f"duplicates: {len(duplicates)}, missing: {len(missing)}")
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Regimen result caches for MedMindersDDIWarningSystem.
+
+Many patients share identical regimens, so the interacting pairs found by
+check_for_interactions are cached under
+
+    (table version, frozenset of drug IDs)
+
+Unknown drugs have no ID and cannot interact, so they are left out: the same
+known drugs in any order, spelling variant or company share an entry. The table
+version is a content digest of the interaction table (computed once per load),
+and IDs are positions in that table's drug list, so once a different table is
+loaded old entries can no longer be hit and simply age out.
+
+An entry is a tuple of (lo_id, hi_id, severity, description) tuples. It says
+nothing about drug order: check_for_interactions builds fresh result dicts from
+it for every call, with each pair oriented the way that caller's own regimen
+would have it uncached.
+
+Backends:
+    MemoryResultCache  - per-process LRU (OrderedDict), bounded by entry count;
+                         a hit is one dict lookup on the key tuple
+    SQLiteResultCache  - on-disk LRU in SQLite (WAL), shared by every worker
+                         process that opens the same file
+    TieredResultCache  - a per-process cache in front of a shared one
+
+All count hits, misses and evictions (stats()).
+
+A SQLite read (tens of microseconds) costs more than screening a typical
+3-12 drug regimen from the in-memory index, so the shared backends only pay
+off where checks are expensive; on small regimens use MemoryResultCache alone.
+No cache is used unless one is passed in.
+
+Usage:
+    medminders.result_cache = MemoryResultCache()
+    medminders.result_cache = TieredResultCache(
+        MemoryResultCache(), SQLiteResultCache('/var/cache/medminders/ddi.sqlite'))
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def regimen_fingerprint(drug_ids):
+    """Order-independent fingerprint of a set of drug IDs."""
+    joined = ','.join(map(str, sorted(drug_ids)))
+    return hashlib.blake2b(joined.encode('ascii'), digest_size=16).hexdigest()
+
+
+class MemoryResultCache:
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        # No lock on the read path: get and move_to_end are each atomic, and an
+        # entry evicted in between only skips its refresh (hit/miss counts are
+        # approximate under concurrent use)
+        results = self._entries.get(key)
+        if results is None:
+            self.misses += 1
+            return None
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            pass
+        self.hits += 1
+        return results
+
+    def put(self, key, results):
+        results = tuple(results)
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SQLiteResultCache:
+    """
+    LRU result cache in a SQLite file shared across processes.
+
+    last_used is only refreshed when an entry is hit more than touch_interval
+    seconds after its last refresh, so hot entries do not turn every read into a
+    write. Eviction trims the least recently used entries in one statement once
+    the table grows 10% past max_entries.
+    """
+
+    def __init__(self, path, max_entries=1_000_000, touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._size_estimate = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ddi_results ("
+            " key TEXT PRIMARY KEY, results TEXT NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ddi_results_last_used ON ddi_results (last_used)")
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key_text(key):
+        table_version, drug_ids = key
+        return f"{table_version}:{regimen_fingerprint(drug_ids)}"
+
+    def get(self, key):
+        key = self._key_text(key)
+        conn = self._connection()
+        row = conn.execute("SELECT results, last_used FROM ddi_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > self.touch_interval:
+            with conn:
+                conn.execute("UPDATE ddi_results SET last_used = ? WHERE key = ?", (now, key))
+        return tuple(tuple(record) for record in json.loads(row[0]))
+
+    def put(self, key, results):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO ddi_results (key, results, last_used) VALUES (?, ?, ?)",
+                         (self._key_text(key), json.dumps(results), time.time()))
+
+        if self._size_estimate is None:
+            self._size_estimate = conn.execute("SELECT COUNT(*) FROM ddi_results").fetchone()[0]
+        else:
+            self._size_estimate += 1
+        if self._size_estimate > self.max_entries * 1.1:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        with conn:
+            size = conn.execute("SELECT COUNT(*) FROM ddi_results").fetchone()[0]
+            excess = size - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM ddi_results WHERE key IN"
+                    " (SELECT key FROM ddi_results ORDER BY last_used LIMIT ?)", (excess,))
+                self.evictions += excess
+        self._size_estimate = min(size, self.max_entries)
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM ddi_results")
+        self._size_estimate = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        entries = self._connection().execute("SELECT COUNT(*) FROM ddi_results").fetchone()[0]
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TieredResultCache:
+    """A fast per-process cache (first) in front of a shared one (second)."""
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def get(self, key):
+        results = self.first.get(key)
+        if results is None:
+            results = self.second.get(key)
+            if results is not None:
+                self.first.put(key, results)
+        return results
+
+    def put(self, key, results):
+        self.first.put(key, results)
+        self.second.put(key, results)
+
+    def clear(self):
+        self.first.clear()
+        self.second.clear()
+
+    def stats(self):
+        first = self.first.stats()
+        second = self.second.stats()
+        lookups = first['hits'] + first['misses']
+        hits = first['hits'] + second['hits']
+        return {
+            'entries': second['entries'],
+            'hits': hits,
+            'misses': lookups - hits,
+            'evictions': first['evictions'] + second['evictions'],
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'first': first,
+            'second': second,
+        }
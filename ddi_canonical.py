@@ -0,0 +1,166 @@
+"""
+Medication name canonicalization in front of the DDI lookup.
+
+The DDI table only matches exact drug spellings, while real input says "warfarin",
+"Coumadin" or "Warfarin Sodium 5mg". DrugNameCanonicalizer maps such strings to
+the table's own spelling:
+
+    1. case folding and punctuation clean-up
+    2. strength ("5mg", "500 MG", "0.5 mg/ml") and dosage-form ("tablet", "ER") stripping
+    3. one lookup in a table precomputed at construction time, covering every
+       vocabulary name, its salt-free form ("Metformin HCL" -> metformin) and
+       every brand name (BRAND_TO_GENERIC)
+
+Results sit behind a bounded LRU cache, since the same few thousand raw strings
+repeat constantly; cache_info() / hit_rate help size it.
+
+Usage:
+    canonicalizer = DrugNameCanonicalizer.for_system(medminders)
+    medminders.canonicalizer = canonicalizer
+"""
+import csv
+import re
+from functools import lru_cache
+
+# Brand name -> generic name (any case; both sides are normalized on load)
+BRAND_TO_GENERIC = {
+    'Coumadin': 'Warfarin',
+    'Jantoven': 'Warfarin',
+    'Zocor': 'Simvastatin',
+    'Advil': 'Ibuprofen',
+    'Motrin': 'Ibuprofen',
+    'Nurofen': 'Ibuprofen',
+    'Celexa': 'Citalopram',
+    'Cipramil': 'Citalopram',
+    'Bayer': 'Aspirin',
+    'Ecotrin': 'Aspirin',
+    'Diflucan': 'Fluconazole',
+    'Cardizem': 'Diltiazem',
+    'Tiazac': 'Diltiazem',
+    'Zestril': 'Lisinopril',
+    'Prinivil': 'Lisinopril',
+    'Maxalt': 'Rizatriptan',
+    'Tylenol': 'Paracetamol',
+    'Panadol': 'Paracetamol',
+    'Acetaminophen': 'Paracetamol',
+    'Amoxil': 'Amoxicillin',
+    'Glucophage': 'Metformin',
+    'Synthroid': 'Levothyroxine',
+    'Levoxyl': 'Levothyroxine',
+    'Lipitor': 'Atorvastatin',
+    'Norvasc': 'Amlodipine',
+    'Prilosec': 'Omeprazole',
+    'Zoloft': 'Sertraline',
+    'Lexapro': 'Escitalopram',
+    'Prozac': 'Fluoxetine',
+    'Plavix': 'Clopidogrel',
+    'Eliquis': 'Apixaban',
+    'Xarelto': 'Rivaroxaban',
+}
+
+SALT_WORDS = frozenset({
+    'sodium', 'potassium', 'calcium', 'magnesium', 'hydrochloride', 'hcl', 'hydrobromide', 'hbr',
+    'sulfate', 'sulphate', 'maleate', 'mesylate', 'besylate', 'tartrate', 'bitartrate', 'succinate',
+    'citrate', 'phosphate', 'acetate', 'fumarate', 'bromide', 'chloride', 'hyclate', 'propionate',
+    'dipropionate', 'valerate', 'lactate', 'gluconate', 'carbonate', 'nitrate', 'tosylate',
+    'xinafoate', 'monohydrate', 'dihydrate', 'trihydrate', 'anhydrous',
+})
+
+DOSAGE_FORM_WORDS = frozenset({
+    'tablet', 'tablets', 'tab', 'tabs', 'capsule', 'capsules', 'cap', 'caps', 'caplet', 'caplets',
+    'oral', 'solution', 'suspension', 'syrup', 'injection', 'injectable', 'cream', 'ointment', 'gel',
+    'drops', 'patch', 'inhaler', 'spray', 'chewable', 'film-coated', 'coated', 'extended-release',
+    'delayed-release', 'extended', 'delayed', 'release', 'er', 'xr', 'sr', 'xl', 'dr', 'ec', 'ir',
+})
+
+_STRENGTH = re.compile(
+    r'\d+(?:[.,]\d+)?\s*(?:mg|mcg|µg|ug|g|gm|ml|l|iu|units?|meq|%)'
+    r'(?:\s*/\s*\d*(?:[.,]\d+)?\s*(?:ml|l|h|hr|dose))?(?![a-z])'
+)
+_PUNCTUATION = re.compile(r'[^\w\s%./-]')
+
+
+def normalize_name(raw):
+    """Case-folded, strength- and dosage-form-free tokens of a medication string."""
+    text = _PUNCTUATION.sub(' ', str(raw).casefold())
+    text = _STRENGTH.sub(' ', text)
+    return tuple(
+        token for token in text.replace('/', ' ').split()
+        if token not in DOSAGE_FORM_WORDS and not token.replace('.', '').isdigit()
+    )
+
+
+def _strip_salts(tokens):
+    stripped = tuple(token for token in tokens if token not in SALT_WORDS)
+    # "Potassium Chloride" is a drug in its own right: never strip down to nothing
+    return stripped or tokens
+
+
+def load_brand_table(path):
+    """Reads a brand -> generic CSV with 'brand' and 'generic' columns."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row['brand']: row['generic'] for row in csv.DictReader(f)}
+
+
+class DrugNameCanonicalizer:
+    def __init__(self, vocabulary, brand_to_generic=None, cache_size=4096):
+        """
+        Args:
+            vocabulary: the DDI table's drug names, spelled as the table spells them.
+            brand_to_generic (dict): brand -> generic names; defaults to BRAND_TO_GENERIC.
+            cache_size (int): maximum number of raw strings kept in the LRU cache.
+        """
+        if brand_to_generic is None:
+            brand_to_generic = BRAND_TO_GENERIC
+        self.brand_to_generic = brand_to_generic
+        self.cache_size = cache_size
+
+        # Precomputed alias table: normalized tokens -> vocabulary spelling.
+        # Exact names win over salt-free forms, which win over brand names.
+        self.aliases = {}
+        vocabulary = list(vocabulary)
+        for name in vocabulary:
+            self.aliases[normalize_name(name)] = name
+        for name in vocabulary:
+            self.aliases.setdefault(_strip_salts(normalize_name(name)), name)
+        for brand, generic in brand_to_generic.items():
+            target = self._lookup(normalize_name(generic))
+            if target is not None:
+                self.aliases.setdefault(normalize_name(brand), target)
+
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    @classmethod
+    def for_system(cls, system, **kwargs):
+        """Canonicalizer over a MedMindersDDIWarningSystem's drug vocabulary."""
+        return cls(system.drug_names, **kwargs)
+
+    def with_vocabulary(self, vocabulary):
+        """A new canonicalizer with the same brand table and cache size over another vocabulary."""
+        return type(self)(vocabulary, brand_to_generic=self.brand_to_generic, cache_size=self.cache_size)
+
+    def _lookup(self, tokens):
+        name = self.aliases.get(tokens)
+        if name is None:
+            name = self.aliases.get(_strip_salts(tokens))
+        return name
+
+    def _canonicalize(self, raw):
+        """
+        Table spelling for a raw medication string. Strings that match nothing are
+        returned stripped, exactly as the lookup saw them before.
+        """
+        name = self._lookup(normalize_name(raw))
+        return name if name is not None else str(raw).strip()
+
+    def cache_info(self):
+        return self.canonicalize.cache_info()
+
+    @property
+    def hit_rate(self):
+        info = self.canonicalize.cache_info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+    def clear_cache(self):
+        self.canonicalize.cache_clear()
@@ -0,0 +1,253 @@
+"""
+Compiled, memory-mapped DDI database.
+
+compile_lookup_table (drug_to_drug.py) writes an InteractionIndex to a single
+binary file; CompiledInteractionIndex maps it read-only and serves lookups from
+the mapped pages without copying the tables. Every process that opens the same
+file shares the same physical pages.
+
+File layout (little-endian, every section 64-byte aligned):
+
+    header          magic, n_drugs, n_pairs, filter_shift, then (offset, size)
+                    for each section below
+    name_offsets    uint64[n_drugs + 1]  - drug ID -> slice of name_blob
+    name_blob       UTF-8 drug names
+    pair_codes      int64[n_pairs]       - sorted lo_id * n_drugs + hi_id
+    pair_severity   uint8[n_pairs]
+    desc_offsets    uint64[n_pairs + 1]  - pair row -> slice of desc_blob
+    desc_blob       UTF-8 interaction descriptions
+    pair_filter     bool[2 ** (64 - filter_shift)] - hashed pair membership bitmap
+    pair_separation uint16[n_pairs]      - Separation_Minutes window, 0 = none
+"""
+import hashlib
+import mmap
+import os
+import struct
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from drug_to_drug import separation_minutes
+
+MAGIC = b'MMDDI\x00\x00\x02'
+SECTIONS = ('name_offsets', 'name_blob', 'pair_codes', 'pair_severity', 'desc_offsets', 'desc_blob', 'pair_filter',
+            'pair_separation')
+HEADER = struct.Struct('<8s3Q' + 'QQ' * len(SECTIONS))
+ALIGNMENT = 64
+
+
+def _pack_strings(strings):
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+def pack_sections(index):
+    """The file sections (name -> bytes) for an InteractionIndex."""
+    pair_codes, pair_severity, pair_data, pair_filter, _ = index.pair_table()
+    if len(pair_severity) and (pair_severity.min() < 0 or pair_severity.max() > 255):
+        raise ValueError("Severity levels must fit in one byte (0-255) to be compiled.")
+
+    name_offsets, name_blob = _pack_strings(index.drug_names)
+    desc_offsets, desc_blob = _pack_strings(str(data['Interaction_Description']) for data in pair_data)
+    pair_separation = np.array([separation_minutes(data) or 0 for data in pair_data], dtype='<u2')
+    return {
+        'name_offsets': name_offsets.tobytes(),
+        'name_blob': name_blob,
+        'pair_codes': pair_codes.astype('<i8').tobytes(),
+        'pair_severity': pair_severity.astype(np.uint8).tobytes(),
+        'desc_offsets': desc_offsets.tobytes(),
+        'desc_blob': desc_blob,
+        'pair_filter': pair_filter.astype(bool).tobytes(),
+        'pair_separation': pair_separation.tobytes(),
+    }
+
+
+def sections_digest(sections):
+    """
+    Content digest over the packed sections. An in-memory index and the file
+    compiled from it get the same digest, in any process.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in SECTIONS:
+        digest.update(len(sections[name]).to_bytes(8, 'little'))
+        digest.update(sections[name])
+    return digest.hexdigest()
+
+
+def write_compiled(index, path):
+    """
+    Writes an InteractionIndex to path. The file is written next to path and then
+    renamed over it, so processes still mapping an older version are unaffected.
+    """
+    pair_codes, _, _, _, filter_shift = index.pair_table()
+    sections = pack_sections(index)
+
+    layout = []
+    offset = HEADER.size
+    for name in SECTIONS:
+        offset += -offset % ALIGNMENT
+        layout += [offset, len(sections[name])]
+        offset += len(sections[name])
+
+    tmp_path = f"{os.fspath(path)}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(index.drug_names), len(pair_codes), filter_shift, *layout))
+        for name, section_offset in zip(SECTIONS, layout[::2]):
+            f.write(b'\0' * (section_offset - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp_path, path)
+
+
+class _PairRows(Sequence):
+    """pair row -> interaction data dict, decoded from the mapped file on access."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table.pair_codes)
+
+    def __getitem__(self, row):
+        return self._table.interaction_data(row)
+
+
+class _CompiledDDIMapping(Mapping):
+    """Read-only DDI_DB view (pair key -> interaction data) over the mapped file."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table.pair_codes)
+
+    def __iter__(self):
+        names = self._table.drug_names
+        n_drugs = len(names)
+        for code in self._table.pair_codes.tolist():
+            lo, hi = divmod(code, n_drugs)
+            yield ' | '.join(sorted([names[lo], names[hi]]))
+
+    def __getitem__(self, pair_key):
+        drug_a, separator, drug_b = str(pair_key).partition(' | ')
+        row = self._table.find_row(drug_a, drug_b) if separator else -1
+        if row < 0 or ' | '.join(sorted([drug_a, drug_b])) != pair_key:
+            raise KeyError(pair_key)
+        return self._table.interaction_data(row)
+
+
+class CompiledInteractionIndex:
+    """
+    Interaction index served from a file written by write_compiled.
+
+    Exposes the same interface as drug_to_drug.InteractionIndex (drug_ids,
+    drug_names, DDI_DB, find_pairs, pair_table). Only the drug name -> ID dict
+    is built in process memory; pair codes, severities, descriptions and the
+    filter bitmap stay in the shared mapping.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n_drugs, n_pairs, self.filter_shift, *layout = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            if magic[:5] == MAGIC[:5]:
+                raise ValueError(f"{self.path} was compiled in an older format; compile it again.")
+            raise ValueError(f"{self.path} is not a compiled DDI database.")
+        self._sections = {name: (layout[2 * i], layout[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+
+        self.name_offsets = self._array('name_offsets', np.uint64)
+        self.pair_codes = self._array('pair_codes', np.int64)
+        self.pair_severity = self._array('pair_severity', np.uint8)
+        self.desc_offsets = self._array('desc_offsets', np.uint64)
+        self.pair_filter = self._array('pair_filter', bool)
+        self.pair_separation = self._array('pair_separation', np.uint16)
+
+        name_start = self._sections['name_blob'][0]
+        offsets = self.name_offsets.tolist()
+        self.drug_names = [
+            self._mmap[name_start + offsets[i]:name_start + offsets[i + 1]].decode('utf-8') for i in range(n_drugs)
+        ]
+        self.drug_ids = {name: drug_id for drug_id, name in enumerate(self.drug_names)}
+        self.DDI_DB = _CompiledDDIMapping(self)
+        self._table_version = None
+
+    @property
+    def table_version(self):
+        """Same contract as InteractionIndex.table_version."""
+        if self._table_version is None:
+            with memoryview(self._mmap) as view:
+                self._table_version = sections_digest(
+                    {name: view[offset:offset + size] for name, (offset, size) in self._sections.items()})
+        return self._table_version
+
+    def _array(self, section, dtype):
+        offset, size = self._sections[section]
+        return np.frombuffer(self._mmap, dtype=np.dtype(dtype).newbyteorder('<'),
+                             count=size // np.dtype(dtype).itemsize, offset=offset)
+
+    def description(self, row):
+        desc_start = self._sections['desc_blob'][0]
+        return self._mmap[desc_start + int(self.desc_offsets[row]):desc_start + int(self.desc_offsets[row + 1])] \
+            .decode('utf-8')
+
+    def interaction_data(self, row):
+        data = {
+            'Severity_Level': int(self.pair_severity[row]),
+            'Interaction_Description': self.description(row),
+        }
+        separation = int(self.pair_separation[row])
+        if separation:
+            data['Separation_Minutes'] = separation
+        return data
+
+    def find_row(self, drug_a, drug_b):
+        """Pair row for two drug names, or -1 if the pair is not in the table."""
+        id_a = self.drug_ids.get(drug_a)
+        id_b = self.drug_ids.get(drug_b)
+        if id_a is None or id_b is None or id_a == id_b:
+            return -1
+        code = min(id_a, id_b) * len(self.drug_names) + max(id_a, id_b)
+        row = int(np.searchsorted(self.pair_codes, code))
+        return row if row < len(self.pair_codes) and self.pair_codes[row] == code else -1
+
+    def find_pairs(self, drugs):
+        """Same contract as InteractionIndex.find_pairs."""
+        known = [(position, self.drug_ids[drug]) for position, drug in enumerate(drugs) if drug in self.drug_ids]
+        if len(known) < 2 or not len(self.pair_codes):
+            return []
+
+        positions, ids = np.array(known, dtype=np.int64).T
+        first, second = np.triu_indices(len(known), 1)
+        a = ids[first]
+        b = ids[second]
+        codes = np.minimum(a, b) * len(self.drug_names) + np.maximum(a, b)
+        rows = np.minimum(np.searchsorted(self.pair_codes, codes), len(self.pair_codes) - 1)
+        hit = np.flatnonzero(self.pair_codes[rows] == codes)
+
+        return [
+            (int(positions[first[h]]), int(positions[second[h]]), self.interaction_data(int(rows[h])))
+            for h in hit.tolist()
+        ]
+
+    def interactions_with(self, drug, others):
+        """Same contract as InteractionIndex.interactions_with."""
+        drug_id = self.drug_ids.get(drug)
+        if drug_id is None or not len(self.pair_codes):
+            return []
+        others = [other for other in others if other in self.drug_ids and other != drug]
+        if not others:
+            return []
+
+        ids = np.array([self.drug_ids[other] for other in others], dtype=np.int64)
+        codes = np.minimum(ids, drug_id) * len(self.drug_names) + np.maximum(ids, drug_id)
+        rows = np.minimum(np.searchsorted(self.pair_codes, codes), len(self.pair_codes) - 1)
+        hit = np.flatnonzero(self.pair_codes[rows] == codes)
+        return [(others[h], self.interaction_data(int(rows[h]))) for h in hit.tolist()]
+
+    def pair_table(self):
+        """Same contract as InteractionIndex.pair_table, backed by the mapped file."""
+        return self.pair_codes, self.pair_severity, _PairRows(self), self.pair_filter, self.filter_shift
@@ -0,0 +1,86 @@
+"""
+Fuzzy resolution of noisy medication names (e.g. OCR output from lib/gemini-ocr.ts)
+against the DDI drug vocabulary.
+
+DrugNameMatcher keeps a trigram inverted index over the vocabulary: a query only
+touches the posting lists of its own trigrams, and one np.bincount over them gives
+every candidate's trigram overlap. Candidates are scored with the Dice coefficient
+2 * |shared trigrams| / (|query trigrams| + |name trigrams|), so a lookup stays
+well under a millisecond for a 20k-drug vocabulary instead of a linear
+edit-distance scan.
+
+Usage:
+    matcher = DrugNameMatcher.for_system(medminders)
+    matcher.search("Ibuprofin 200mg", k=3)   # [('Ibuprofen', 0.71), ...]
+    matcher.resolve("Ibuprofin 200mg")       # 'Ibuprofen' (or None below min_score)
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from ddi_canonical import normalize_name
+
+
+def _match_key(name):
+    return ' '.join(normalize_name(name))
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DrugNameMatcher:
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary: drug names as the DDI table spells them.
+        """
+        self.names = list(vocabulary)
+        self._exact = {}
+        postings = defaultdict(list)
+        sizes = []
+        for name_id, name in enumerate(self.names):
+            key = _match_key(name)
+            self._exact.setdefault(key, name_id)
+            grams = _trigrams(key)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(name_id)
+
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = np.array(sizes, dtype=np.float64)
+
+    @classmethod
+    def for_system(cls, system):
+        """Matcher over a MedMindersDDIWarningSystem's drug vocabulary."""
+        return cls(system.drug_names)
+
+    def search(self, query, k=5):
+        """
+        Top-k vocabulary names for a noisy query, as (name, score) pairs with the
+        best first. Scores are in (0, 1]; an exact (normalized) match scores 1.0.
+        """
+        key = _match_key(query)
+        exact_id = self._exact.get(key)
+        grams = _trigrams(key)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists or k <= 0:
+            return [(self.names[exact_id], 1.0)] if exact_id is not None and k > 0 else []
+
+        overlap = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        scores = 2.0 * overlap / (len(grams) + self._sizes)
+        if exact_id is not None:
+            scores[exact_id] = 1.0
+
+        k = min(k, len(self.names))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.names[i], float(scores[i])) for i in top.tolist() if scores[i] > 0]
+
+    def resolve(self, query, min_score=0.5):
+        """Best vocabulary name for query, or None if nothing scores min_score or more."""
+        matches = self.search(query, k=1)
+        if matches and matches[0][1] >= min_score:
+            return matches[0][0]
+        return None
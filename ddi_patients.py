@@ -0,0 +1,129 @@
+"""
+Reverse (drug -> patients) index over the stored regimens, for "who is affected"
+alerts when a new interaction is published.
+
+PatientDrugIndex keeps every patient's regimen under its lookup (canonical) drug
+names and, per drug, the set of patients taking it. The patients affected by a
+new pair are the intersection of the two drugs' posting sets, which walks the
+smaller set only: milliseconds even for common drugs in a population of
+millions, instead of re-running check_for_interactions for everybody.
+
+Keep it next to the regimen store and call set_regimen / remove_patient whenever
+a regimen changes.
+
+Usage:
+    index = PatientDrugIndex(medminders)
+    index.set_regimen('user-17', ['Warfarin', 'Fluconazole 150mg'])
+    index.affected_by('Warfarin', 'Fluconazole')             # ['user-17']
+    index.alerts_for_new_interaction('Warfarin', 'Fluconazole', 3, "...")
+"""
+class PatientDrugIndex:
+    def __init__(self, system, regimens=None):
+        """
+        Args:
+            system: MedMindersDDIWarningSystem whose canonicalizer decides the
+                lookup names (and whose table the alerts are checked against).
+            regimens (dict): optional patient ID -> medication list to load.
+        """
+        self.system = system
+        self._regimens = {}   # patient ID -> set of lookup names
+        self._postings = {}   # lookup name -> set of patient IDs
+        for patient_id, medication_list in (regimens or {}).items():
+            self.set_regimen(patient_id, medication_list)
+
+    def __len__(self):
+        return len(self._regimens)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._regimens
+
+    def regimen(self, patient_id):
+        """The patient's lookup drug names (empty if unknown)."""
+        return set(self._regimens.get(patient_id, ()))
+
+    def set_regimen(self, patient_id, medication_list):
+        """Stores (or replaces) a patient's regimen; only changed drugs touch the postings."""
+        drugs = self.system._medication_set(medication_list)
+        previous = self._regimens.get(patient_id, set())
+        for drug in previous - drugs:
+            self._unpost(drug, patient_id)
+        for drug in drugs - previous:
+            self._postings.setdefault(drug, set()).add(patient_id)
+        self._regimens[patient_id] = drugs
+
+    def add_drug(self, patient_id, drug):
+        drug = self.system.canonical_name(drug)
+        self._regimens.setdefault(patient_id, set()).add(drug)
+        self._postings.setdefault(drug, set()).add(patient_id)
+
+    def remove_drug(self, patient_id, drug):
+        drug = self.system.canonical_name(drug)
+        drugs = self._regimens.get(patient_id)
+        if drugs is None or drug not in drugs:
+            return False
+        drugs.discard(drug)
+        self._unpost(drug, patient_id)
+        return True
+
+    def remove_patient(self, patient_id):
+        drugs = self._regimens.pop(patient_id, None)
+        if drugs is None:
+            return False
+        for drug in drugs:
+            self._unpost(drug, patient_id)
+        return True
+
+    def _unpost(self, drug, patient_id):
+        patients = self._postings[drug]
+        patients.discard(patient_id)
+        if not patients:
+            del self._postings[drug]
+
+    # --- Queries ---
+
+    def patients_with(self, drug):
+        """Patient IDs whose regimen contains drug."""
+        return set(self._postings.get(self.system.canonical_name(drug), ()))
+
+    def affected_by(self, drug_a, drug_b):
+        """Patient IDs taking both drugs, i.e. everybody a new drug_a/drug_b interaction affects."""
+        patients_a = self._postings.get(self.system.canonical_name(drug_a), set())
+        patients_b = self._postings.get(self.system.canonical_name(drug_b), set())
+        if len(patients_b) < len(patients_a):
+            patients_a, patients_b = patients_b, patients_a
+        return [patient_id for patient_id in patients_a if patient_id in patients_b]
+
+    def alerts_for_new_interaction(self, drug_a, drug_b, severity, description):
+        """
+        Per-patient alerts for a newly published drug_a/drug_b interaction.
+
+        Each affected patient's warning is generate_final_warning over their current
+        interactions plus the new one, so the status code is whichever is worse for
+        that patient. Works before and after the table with the new row is loaded.
+        Regimens are screened once per distinct drug set, not once per patient.
+
+        Returns:
+            {patient ID: {'result': the new interaction's result dict,
+                          'warning': the patient's generate_final_warning dict}}
+        """
+        system = self.system
+        drug_a, drug_b = system.canonical_name(drug_a), system.canonical_name(drug_b)
+        pair_labels = (f"{drug_a} + {drug_b}", f"{drug_b} + {drug_a}")
+        new_result = {
+            'Pair': f"{drug_a} + {drug_b}",
+            'Severity_Numeric': severity,
+            'Severity_Text': system.severity_map.get(severity, "UNKNOWN"),
+            'Description': description
+        }
+
+        alerts = {}
+        warnings = {}  # frozenset of the regimen's drugs -> warning
+        for patient_id in self.affected_by(drug_a, drug_b):
+            drugs = frozenset(self._regimens[patient_id])
+            warning = warnings.get(drugs)
+            if warning is None:
+                results = [result for result in system.check_for_interactions(drugs)
+                           if result['Pair'] not in pair_labels]
+                warning = warnings[drugs] = system.generate_final_warning(results + [new_result])
+            alerts[patient_id] = {'result': new_result, 'warning': warning}
+        return alerts
@@ -0,0 +1,121 @@
+"""
+Parallel full-population DDI rescan.
+
+Worker processes never receive the interaction table itself: each one opens the
+same compiled database (ddi_compiled.py) in its pool initializer, and the kernel
+maps the file's pages once for all of them. Only chunks of medication lists go
+out and warnings (optionally full results) come back; without with_results a
+worker only builds each patient's critical interaction. Throughput scales with
+cores until the input / output pickling becomes the bottleneck.
+
+What a worker does add is its own memory: the interpreter state it writes to
+and one chunk in flight (about 20 MB with 5000-patient chunks). Workers are
+forked, so they also keep a private copy of every page of the caller's heap that
+the caller writes to while they run, and pickling a chunk out of a list held in
+memory writes to the pages of that list. Streaming medication_lists from a
+generator keeps that cost away; a 200k-patient list roughly doubles what each
+worker adds.
+
+Usage:
+    for start, results, warnings in rescan_population(medminders, medication_lists, processes=8):
+        ...   # warnings[k] belongs to medication_lists[start + k]
+"""
+import itertools
+import os
+import tempfile
+from collections import deque
+
+_worker_system = None
+
+
+def _init_worker(database_path, canonicalizer_config):
+    global _worker_system
+    from drug_to_drug import MedMindersDDIWarningSystem
+
+    # Opened by path: CompiledInteractionIndex maps the file, so the table is
+    # neither pickled to the worker nor rebuilt in it.
+    _worker_system = MedMindersDDIWarningSystem(database_path)
+    if canonicalizer_config is not None:
+        from ddi_canonical import DrugNameCanonicalizer
+
+        brand_to_generic, cache_size = canonicalizer_config
+        _worker_system.canonicalizer = DrugNameCanonicalizer(
+            _worker_system.drug_names, brand_to_generic=brand_to_generic, cache_size=cache_size)
+
+
+def _screen_chunk(medication_lists, with_results):
+    return _worker_system.check_for_interactions_batch(medication_lists, with_results=with_results)
+
+
+def _chunks(medication_lists, chunk_size):
+    iterator = iter(medication_lists)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def rescan_population(system, medication_lists, processes=None, chunk_size=5000, with_results=False):
+    """
+    Screens a whole population across a process pool, streaming results back in
+    input order.
+
+    At most two chunks per worker are in flight, so medication_lists can be a
+    generator over a regimen store larger than memory; that is also cheaper per
+    worker than a list held in memory (see the module docstring).
+
+    Args:
+        system: MedMindersDDIWarningSystem, or the path of a compiled database.
+            A system built from a DataFrame is compiled to a temporary file first.
+            The system's canonicalizer (if any) is rebuilt in every worker.
+        medication_lists: iterable of medication lists.
+        processes (int): worker count (default: os.cpu_count()); 1 screens in-process.
+        chunk_size (int): medication lists per task.
+        with_results (bool): also return every patient's interaction list
+            (more to pickle back).
+
+    Yields:
+        (start, results, warnings) per chunk: results (None unless with_results)
+        and warnings are the check_for_interactions_batch output for
+        medication_lists[start:start + len(warnings)].
+    """
+    from drug_to_drug import MedMindersDDIWarningSystem
+
+    if not isinstance(system, MedMindersDDIWarningSystem):
+        system = MedMindersDDIWarningSystem(system)
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1:
+        for start, chunk in _chunks(medication_lists, chunk_size):
+            yield (start, *system.check_for_interactions_batch(chunk, with_results=with_results))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    index, canonicalizer = system.snapshot
+    canonicalizer_config = None
+    if canonicalizer is not None:
+        canonicalizer_config = (canonicalizer.brand_to_generic, canonicalizer.cache_size)
+
+    with tempfile.TemporaryDirectory(prefix='ddi-rescan-') as tmp:
+        database_path = getattr(index, 'path', None)
+        if database_path is None:
+            from ddi_compiled import write_compiled
+
+            database_path = os.path.join(tmp, 'ddi.db')
+            write_compiled(index, database_path)
+
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(database_path, canonicalizer_config)) as pool:
+            in_flight = deque()
+            for start, chunk in _chunks(medication_lists, chunk_size):
+                in_flight.append((start, pool.submit(_screen_chunk, chunk, with_results)))
+                if len(in_flight) >= 2 * processes:
+                    start, future = in_flight.popleft()
+                    yield (start, *future.result())
+            while in_flight:
+                start, future = in_flight.popleft()
+                yield (start, *future.result())
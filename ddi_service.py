@@ -0,0 +1,242 @@
+"""
+Long-lived DDI screening service for the web app.
+
+An asyncio HTTP/1.1 server (standard library only, keep-alive) around one
+MedMindersDDIWarningSystem, so the interaction table is loaded once instead of
+per request. Concurrent requests are coalesced by a MicroBatcher: while a batch
+is being screened on the worker thread, new requests queue up and go out
+together as the next batch (up to max_batch) the moment it finishes. On an idle
+service the first request waits at most the batching window (default 1 ms) for
+company. Each batch is one check_for_interactions_batch call, and each request
+gets its own answer back. If that call raises, the batch is screened again one
+request at a time, so only the request that caused the error fails.
+
+Endpoints:
+    POST /check    {"medications": ["Warfarin", "Fluconazole"]}
+                   -> {"results": [...check_for_interactions...],
+                       "warning": {...generate_final_warning...}}
+    GET  /health   -> {"status": "ok", "drugs": <vocabulary size>, "batches": ..., "requests": ...}
+
+Usage:
+    python ddi_service.py [--database ddi.db] [--port 8765] [--window-ms 1] [--max-batch 64]
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class MicroBatcher:
+    """Collects concurrent screening requests into small batches."""
+
+    def __init__(self, system, window=0.001, max_batch=64):
+        """
+        Args:
+            system: MedMindersDDIWarningSystem to screen with.
+            window (float): seconds the first request waits for company when no
+                batch is in flight (0 still coalesces requests that arrive in
+                the same event loop iteration).
+            max_batch (int): a batch is screened as soon as it has this many requests.
+        """
+        self.system = system
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []    # (medication list, future)
+        self._timer = None
+        self._in_flight = 0     # batches handed to the screening thread
+        # One screening thread: batches queue up behind each other while the event
+        # loop keeps accepting and parsing requests
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ddi-batch')
+        self.batches = 0
+        self.requests = 0
+
+    async def check(self, medication_list):
+        """(results, warning) for one medication list, screened with whatever else arrives."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((medication_list, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None and not self._in_flight:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if batch:
+            self.batches += 1
+            self.requests += len(batch)
+            self._in_flight += 1
+            screening = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._screen, [medication_list for medication_list, _ in batch])
+            screening.add_done_callback(lambda done: self._deliver(batch, done))
+
+    def _screen(self, medication_lists):
+        """One (results, warning) pair, or the exception it raised, per medication list."""
+        if len(medication_lists) > 1:  # the vectorized path only pays off for several regimens
+            try:
+                return list(zip(*self.system.check_for_interactions_batch(medication_lists)))
+            except Exception:
+                pass  # screen them one by one below, so one bad request does not fail the others
+        return [self._screen_one(medication_list) for medication_list in medication_lists]
+
+    def _screen_one(self, medication_list):
+        try:
+            results = self.system.check_for_interactions(medication_list)
+            return results, self.system.generate_final_warning(results)
+        except Exception as e:
+            return e
+
+    def _deliver(self, batch, done):
+        self._in_flight -= 1
+        if done.exception() is not None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(done.exception())
+        else:
+            for (_, future), outcome in zip(batch, done.result()):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+        # Whatever queued up during this batch goes out right away
+        if self._pending and not self._in_flight:
+            self._flush()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def _json_default(value):
+    if hasattr(value, 'item'):  # NumPy scalars from DataFrame-built tables
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class DDIService:
+    def __init__(self, system, window=0.001, max_batch=64):
+        self.system = system
+        self.batcher = MicroBatcher(system, window=window, max_batch=max_batch)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = request_line.split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "Malformed request line."}, False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "Invalid Content-Length."}, False)
+                    return
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': "Body too large."}, False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    print(f"An unexpected error occurred handling {method} {path}: {e!r}. Continuing.", flush=True)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal server error."}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok', 'drugs': len(self.system.drug_names),
+                                   'batches': self.batcher.batches, 'requests': self.batcher.requests}
+        if path != '/check':
+            return HTTPStatus.NOT_FOUND, {'error': f"No route for {path}."}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Use POST."}
+
+        try:
+            medications = json.loads(body)['medications']
+            if not isinstance(medications, list) or not all(isinstance(name, str) for name in medications):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return HTTPStatus.BAD_REQUEST, {'error': 'Expected a JSON body like {"medications": ["Warfarin"]}.'}
+
+        results, warning = await self.batcher.check(medications)
+        return HTTPStatus.OK, {'results': results, 'warning': warning}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=_json_default).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8765, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"DDI service listening on http://{host}:{port} ({len(self.system.drug_names)} drugs)", flush=True)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher.close()
+
+
+def main(argv=None):
+    from drug_to_drug import MedMindersDDIWarningSystem, build_demo_lookup_table
+
+    parser = argparse.ArgumentParser(description="MedMinders DDI screening service.")
+    parser.add_argument('--database', help="Compiled DDI database to serve (default: the demo table).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window-ms', type=float, default=1.0,
+                        help="How long a request to an idle service waits for others to batch with.")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--canonicalize', action='store_true', help="Canonicalize medication names before lookup.")
+    args = parser.parse_args(argv)
+
+    system = MedMindersDDIWarningSystem(args.database or build_demo_lookup_table())
+    if args.canonicalize:
+        from ddi_canonical import DrugNameCanonicalizer
+
+        system.canonicalizer = DrugNameCanonicalizer.for_system(system)
+    service = DDIService(system, window=args.window_ms / 1000, max_batch=args.max_batch)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nDDI service stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Desktop notification backends for pushNotificationApp.py.
+
+The original script forked a fresh `notify-send` / `osascript` process for
+every reminder and waited for it, which blocks the scheduler and copies the
+Python process's page tables on each fork. Here the platform is probed once
+(default_notifier()) and the chosen backend stays alive:
+
+    DBusNotifier          Linux: one session-bus connection, Notify() calls to
+                          org.freedesktop.Notifications. No process is started
+                          per notification.
+    PipeHelperNotifier    one resident helper process fed over its stdin pipe,
+                          which answers every notification with a status line:
+                          a JavaScript-for-Automation loop under osascript on
+                          macOS (no process per notification), and on Linux
+                          without jeepney a small shell loop that still runs
+                          notify-send per notification, but forks it from the
+                          shell instead of from the scheduler process.
+    SubprocessNotifier    the old behaviour, one blocking process per call.
+    ConsoleNotifier       fallback when no native notifier is available.
+
+Every backend has notify(title, message) -> status text, raises on failure
+(FileNotFoundError if the notifier command is missing), and close().
+
+Optional dependency: jeepney (`pip install jeepney`) for DBusNotifier. Without
+it Linux falls back to the notify-send helper.
+"""
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import threading
+from functools import lru_cache
+
+APP_NAME = "MedMinders"
+
+log = logging.getLogger(__name__)
+
+# Both helpers read notifications as pairs of lines (title, message), show each
+# one and answer it with a line of its own: "ok", or "error <exit status> <text>".
+_OSASCRIPT_HELPER = r"""
+ObjC.import('Foundation');
+var app = Application.currentApplication();
+app.includeStandardAdditions = true;
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+function report(line) {
+    stdout.writeData($(line + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+}
+var buffer = '';
+while (true) {
+    var data = stdin.availableData;
+    if (data.length == 0) break;
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    var lines = buffer.split('\n');
+    buffer = lines.pop();
+    if (lines.length % 2 == 1) buffer = lines.pop() + '\n' + buffer;
+    for (var i = 0; i < lines.length; i += 2) {
+        try {
+            app.displayNotification(lines[i + 1], {withTitle: lines[i]});
+            report('ok');
+        } catch (e) {
+            report('error 1 ' + String(e).replace(/\s+/g, ' '));
+        }
+    }
+}
+"""
+
+_NOTIFY_SEND_HELPER = (
+    'set -f; while IFS= read -r title && IFS= read -r message; do '
+    'if error=$({command} -- "$title" "$message" 2>&1 >/dev/null); then echo ok; '
+    'else echo "error $? $(echo $error)"; fi; '
+    'done'
+)
+
+
+class ConsoleNotifier:
+    name = "console"
+
+    def notify(self, title, message):
+        return "Fallback Console Message Sent (Native notification unavailable)"
+
+    def close(self):
+        pass
+
+
+class SubprocessNotifier:
+    """One process per notification (the original behaviour)."""
+
+    name = "subprocess"
+
+    def __init__(self, make_argv, status):
+        """
+        Args:
+            make_argv: called as make_argv(title, message) -> argv list.
+            status (str): status text returned after a successful call.
+        """
+        self.make_argv = make_argv
+        self.status = status
+
+    def notify(self, title, message):
+        subprocess.run(self.make_argv(title, message), check=True, capture_output=True)
+        return self.status
+
+    def close(self):
+        pass
+
+
+class PipeHelperNotifier:
+    """
+    A resident helper process that reads (title, message) line pairs on stdin
+    and writes one status line per notification on stdout. notify() waits for
+    that line, so a failed notification raises in the caller. The helper is
+    restarted once if it has died.
+    """
+
+    name = "pipe helper"
+
+    def __init__(self, argv, status):
+        self.argv = argv
+        self.status = status
+        self._lock = threading.Lock()
+        self._process = None
+
+    def _start(self):
+        self._process = subprocess.Popen(self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         text=True, encoding='utf-8', bufsize=1)
+
+    def _discard(self):
+        for pipe in (self._process.stdin, self._process.stdout):
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                pass
+        self._process.wait()
+        self._process = None
+
+    def notify(self, title, message):
+        line = f"{_one_line(title)}\n{_one_line(message)}\n"
+        with self._lock:
+            for attempt in (1, 2):
+                if self._process is None or self._process.poll() is not None:
+                    if self._process is not None:
+                        self._discard()
+                    self._start()
+                try:
+                    self._process.stdin.write(line)
+                    reply = self._process.stdout.readline()
+                except BrokenPipeError:
+                    reply = ''
+                if reply:
+                    break
+                self._discard()
+                if attempt == 2:
+                    raise RuntimeError(f"Notification helper {self.argv[0]!r} exited without answering.")
+
+        status, _, detail = reply.rstrip('\n').partition(' ')
+        if status == 'ok':
+            return self.status
+        exit_status, _, detail = detail.partition(' ')
+        if exit_status == '127':
+            raise FileNotFoundError(detail or "Notifier command not found.")
+        raise RuntimeError(f"Notifier command failed with exit status {exit_status}: {detail}")
+
+    def close(self):
+        """Lets the helper finish what it has read, then waits for it to exit."""
+        with self._lock:
+            if self._process is not None:
+                self._discard()
+
+
+class DBusNotifier:
+    """org.freedesktop.Notifications over one persistent session-bus connection (requires jeepney)."""
+
+    name = "D-Bus"
+
+    def __init__(self, timeout=5.0, bus='SESSION'):
+        """
+        Args:
+            timeout (float): seconds to wait for each Notify() reply.
+            bus (str): 'SESSION' or a D-Bus address to connect to.
+        """
+        from jeepney import DBusAddress
+        from jeepney.io.blocking import open_dbus_connection
+
+        self.timeout = timeout
+        self._address = DBusAddress('/org/freedesktop/Notifications', bus_name='org.freedesktop.Notifications',
+                                    interface='org.freedesktop.Notifications')
+        self._connection = open_dbus_connection(bus=bus)
+        self._lock = threading.Lock()
+
+    def notify(self, title, message):
+        from jeepney import DBusErrorResponse, MessageType, new_method_call
+
+        call = new_method_call(self._address, 'Notify', 'susssasa{sv}i',
+                               (APP_NAME, 0, '', title, message, [], {}, -1))
+        with self._lock:
+            reply = self._connection.send_and_get_reply(call, timeout=self.timeout)
+        if reply.header.message_type == MessageType.error:
+            raise DBusErrorResponse(reply)  # e.g. no notification daemon on the bus
+        return "Linux Notification Sent via D-Bus"
+
+    def close(self):
+        self._connection.close()
+
+
+def _one_line(text):
+    return str(text).replace('\r', ' ').replace('\n', ' ')
+
+
+def probe_notifier(system=None):
+    """Picks the best available backend for this machine (see the module docstring)."""
+    system = system or platform.system()
+    if system == "Darwin" and shutil.which('osascript'):
+        return PipeHelperNotifier(['osascript', '-l', 'JavaScript', '-e', _OSASCRIPT_HELPER],
+                                  "macOS Notification Sent via osascript helper")
+    if system == "Linux":
+        if os.environ.get('DBUS_SESSION_BUS_ADDRESS'):
+            try:
+                return DBusNotifier()
+            except ImportError:
+                log.info("Install the optional jeepney package to send notifications over D-Bus.")
+            except Exception as e:  # no session bus after all: fall through to notify-send
+                log.info("D-Bus notifications unavailable (%s); trying notify-send.", e)
+        if shutil.which('notify-send'):
+            return PipeHelperNotifier(['sh', '-c', _NOTIFY_SEND_HELPER.format(command='notify-send')],
+                                      "Linux Notification Sent via notify-send helper")
+    return ConsoleNotifier()
+
+
+@lru_cache(maxsize=None)
+def default_notifier():
+    """The backend for this process, probed on first use."""
+    return probe_notifier()
@@ -1,12 +1,20 @@
-import pandas as pd
-import numpy as np
-import re
+"""
+MedMinders drug-to-drug interaction (DDI) screening.
+
+Importing this module has no side effects and does not import pandas or NumPy;
+pandas is only needed to build lookup tables from DataFrames, NumPy only for the
+batch, column-wide and compiled-database paths. The demo runs with:
 
-# Assuming necessary imports (e.g., sklearn) are available if needed for the full script
+    python drug_to_drug.py                        # demo report
+    python drug_to_drug.py compile table.csv out  # compile a Drug_1/Drug_2/Interaction_Description CSV
+"""
+import argparse
+import os
+import re
+import threading
 
-# Re-using the essential parts of the data setup for demonstration
-# --- DATA SETUP (from previous turns) ---
-data = {
+# --- DATA SETUP (demo interaction data) ---
+DEMO_INTERACTIONS = {
     'Drug_1': ['Warfarin', 'Simvastatin', 'Ibuprofen', 'Citalopram', 'Aspirin'],
     'Drug_2': ['Fluconazole', 'Diltiazem', 'Lisinopril', 'Rizatriptan', 'Warfarin'],
     'Interaction_Description': [
@@ -17,33 +25,324 @@ data = {
         "Increased risk of bleeding. Monitor patient closely."
     ]
 }
-df = pd.DataFrame(data)
+
+
+# Severity keywords per tier. A description gets the highest tier with any match.
+SEVERITY_KEYWORDS = {
+    3: [r'contraindicated', r'severe', r'life.?threatening', r'fatal'],
+    2: [r'major interaction', r'monitor closely', r'increased toxicity'],
+    1: [r'moderate interaction', r'minor interaction', r'generally safe'],
+}
+_SEVERITY_TIER_PATTERNS = [
+    (tier, re.compile('|'.join(keywords))) for tier, keywords in sorted(SEVERITY_KEYWORDS.items(), reverse=True)
+]
+_SEVERITY_KEYWORD_PATTERNS = [
+    (tier, re.compile(keyword)) for tier, keywords in SEVERITY_KEYWORDS.items() for keyword in keywords
+]
 
 
 def assign_severity(description):
     desc = str(description).lower()
-    if any(re.search(kw, desc) for kw in [r'contraindicated', r'severe', r'life.?threatening', r'fatal']):
-        return 3
-    if any(re.search(kw, desc) for kw in [r'major interaction', r'monitor closely', r'increased toxicity']):
-        return 2
-    if any(re.search(kw, desc) for kw in [r'moderate interaction', r'minor interaction', r'generally safe']):
-        return 1
+    for tier, pattern in _SEVERITY_TIER_PATTERNS:
+        if pattern.search(desc):
+            return tier
     return 0
 
 
-df['Severity_Level'] = df['Interaction_Description'].apply(assign_severity)
-df['Drug_A'] = np.minimum(df['Drug_1'], df['Drug_2'])
-df['Drug_B'] = np.maximum(df['Drug_1'], df['Drug_2'])
-df['DDI_Pair'] = df['Drug_A'] + ' | ' + df['Drug_B']
-DDI_Lookup_Table = df[['DDI_Pair', 'Severity_Level', 'Interaction_Description']].drop_duplicates()
+def _classify_severity_chunk(descriptions):
+    import numpy as np
+
+    lowered = [str(description).lower() for description in descriptions]
+    lengths = np.fromiter((len(desc) + 1 for desc in lowered), dtype=np.int64, count=len(lowered))
+    row_starts = np.zeros(len(lowered), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=row_starts[1:])
+
+    # One buffer per chunk, rows joined on '\n' (no keyword can match across it).
+    # Every compiled keyword then scans the whole buffer with sre's literal-prefix
+    # search, instead of ten re.search calls per row.
+    text = '\n'.join(lowered)
+    severities = np.zeros(len(lowered), dtype=np.int8)
+    for tier, pattern in _SEVERITY_KEYWORD_PATTERNS:
+        positions = np.fromiter((match.start() for match in pattern.finditer(text)), dtype=np.int64)
+        if len(positions):
+            rows = np.searchsorted(row_starts, positions, side='right') - 1
+            severities[rows] = np.maximum(severities[rows], tier)
+    return severities
+
+
+def classify_severities(descriptions, chunk_size=250_000, processes=None):
+    """
+    Column-wide assign_severity: returns an int8 array with the same tier
+    (3 > 2 > 1 > 0) assign_severity gives each description.
+
+    Args:
+        descriptions: any iterable of descriptions (e.g. a DataFrame column).
+        chunk_size (int): rows classified per chunk.
+        processes (int): if > 1, chunks are spread across a process pool.
+    """
+    import numpy as np
+
+    descriptions = list(descriptions)
+    chunks = [descriptions[i:i + chunk_size] for i in range(0, len(descriptions), chunk_size)]
+    if not chunks:
+        return np.zeros(0, dtype=np.int8)
+
+    if processes and processes > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return np.concatenate(list(pool.map(_classify_severity_chunk, chunks)))
+    return np.concatenate([_classify_severity_chunk(chunk) for chunk in chunks])
+
+
+def build_lookup_table(df):
+    """
+    Builds the DDI lookup table (DDI_Pair, Severity_Level, Interaction_Description)
+    from a DataFrame of raw Drug_1 / Drug_2 / Interaction_Description rows.
+
+    An optional Separation_Minutes column (minimum minutes between the two drugs'
+    doses; empty = never safe together) is carried over for check_dose_schedule.
+    """
+    import numpy as np
+
+    df = df.copy()
+    df['Severity_Level'] = classify_severities(df['Interaction_Description'])
+    df['Drug_A'] = np.minimum(df['Drug_1'], df['Drug_2'])
+    df['Drug_B'] = np.maximum(df['Drug_1'], df['Drug_2'])
+    df['DDI_Pair'] = df['Drug_A'] + ' | ' + df['Drug_B']
+    columns = ['DDI_Pair', 'Severity_Level', 'Interaction_Description']
+    if 'Separation_Minutes' in df.columns:
+        columns.append('Separation_Minutes')
+    return df[columns].drop_duplicates()
+
+
+def build_demo_lookup_table():
+    import pandas as pd
+
+    return build_lookup_table(pd.DataFrame(DEMO_INTERACTIONS))
 
 
 # --- END DATA SETUP ---
 
+MINUTES_PER_DAY = 24 * 60
+
+
+def _create_pair_key(drug1, drug2):
+    d1 = str(drug1).strip()
+    d2 = str(drug2).strip()
+    return ' | '.join(sorted([d1, d2]))
+
+
+def separation_minutes(interaction_data):
+    """
+    The pair's separation window in minutes, or None if the pair interacts no
+    matter when the doses are taken (no window, empty/NaN or non-positive value).
+    Windows are capped at a day.
+    """
+    minutes = interaction_data.get('Separation_Minutes')
+    if minutes is None or minutes != minutes or minutes <= 0:  # minutes != minutes: NaN
+        return None
+    return min(int(minutes), MINUTES_PER_DAY)
+
+
+def _dose_minute(time_str):
+    hours, _, minutes = str(time_str).strip().partition(':')
+    return (int(hours) * 60 + int(minutes or 0)) % MINUTES_PER_DAY
+
+
+def _pair_hash(codes, shift):
+    import numpy as np
+
+    return (codes.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(shift)
+
+
+class InteractionIndex:
+    """
+    In-memory interaction index over a DDI_DB dict (pair key -> interaction data).
+
+    Every drug is interned to an integer ID once, with a per-drug neighbor dict
+    (other drug ID -> interaction data). Only pairs that the pair-key lookup could
+    ever have matched are indexed, so regimen checks return exactly what the old
+    pairwise loop returned.
+    """
+
+    def __init__(self, ddi_db):
+        self.DDI_DB = ddi_db
+        self.drug_ids = {}
+        self.drug_names = []
+        self.neighbors = []
+        self._pair_table = None
+        self._table_version = None
+
+        for pair_key, interaction_data in ddi_db.items():
+            drug_a, separator, drug_b = str(pair_key).partition(' | ')
+            if not separator or drug_a == drug_b:
+                continue
+            if _create_pair_key(drug_a, drug_b) != pair_key:
+                continue
+
+            id_a = self._intern_drug(drug_a)
+            id_b = self._intern_drug(drug_b)
+            self.neighbors[id_a][id_b] = interaction_data
+            self.neighbors[id_b][id_a] = interaction_data
+
+    @property
+    def table_version(self):
+        """
+        Content digest of the indexed table (computed on first use). Equal tables
+        get equal versions in every process, compiled or not.
+        """
+        if self._table_version is None:
+            from ddi_compiled import pack_sections, sections_digest
+
+            self._table_version = sections_digest(pack_sections(self))
+        return self._table_version
+
+    def _intern_drug(self, drug_name):
+        drug_id = self.drug_ids.get(drug_name)
+        if drug_id is None:
+            drug_id = len(self.drug_names)
+            self.drug_ids[drug_name] = drug_id
+            self.drug_names.append(drug_name)
+            self.neighbors.append({})
+        return drug_id
+
+    def find_pairs(self, drugs):
+        """
+        Returns (i, j, interaction_data) for every interacting pair drugs[i], drugs[j]
+        with i < j, in the order the pairwise loop visited them. drugs must be unique.
+        """
+        # Regimen position of every drug the index knows about (drug ID -> position)
+        positions = {}
+        for position, drug in enumerate(drugs):
+            drug_id = self.drug_ids.get(drug)
+            if drug_id is not None:
+                positions[drug_id] = position
+
+        # Intersect each drug's neighbors with the regimen and keep each pair once
+        hits = []
+        for drug_id, i in positions.items():
+            neighbors = self.neighbors[drug_id]
+            for other_id in neighbors.keys() & positions.keys():
+                j = positions[other_id]
+                if j > i:
+                    hits.append((i, j, neighbors[other_id]))
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return hits
+
+    def interactions_with(self, drug, others):
+        """
+        Returns (other, interaction_data) for every drug in others (an iterable of
+        names) that interacts with drug, in the order of others.
+        """
+        drug_id = self.drug_ids.get(drug)
+        if drug_id is None:
+            return []
+        neighbors = self.neighbors[drug_id]
+        hits = []
+        for other in others:
+            other_id = self.drug_ids.get(other)
+            if other_id in neighbors:
+                hits.append((other, neighbors[other_id]))
+        return hits
+
+    def pair_table(self):
+        """
+        Sorted int64 pair codes (lo_id * n_drugs + hi_id) for every indexed pair,
+        with the severities and interaction data aligned to them. Built on first use.
+
+        The table also carries a hashed membership bitmap for the batch path:
+        almost every regimen pair misses, and a single gather rejects most of them
+        before the binary search.
+
+        Returns:
+            (pair_codes, pair_severity, pair_data, pair_filter, filter_shift)
+        """
+        import numpy as np
+
+        if self._pair_table is None:
+            n_drugs = len(self.drug_names)
+            entries = sorted(
+                (drug_id * n_drugs + other_id, interaction_data)
+                for drug_id, neighbors in enumerate(self.neighbors)
+                for other_id, interaction_data in neighbors.items()
+                if drug_id < other_id
+            )
+            pair_data = [interaction_data for _, interaction_data in entries]
+            pair_severity = np.array(
+                [interaction_data['Severity_Level'] for interaction_data in pair_data], dtype=np.int64)
+            pair_codes = np.array([code for code, _ in entries], dtype=np.int64)
+
+            filter_bits = min(25, max(10, (len(entries) * 32).bit_length()))
+            filter_shift = 64 - filter_bits
+            pair_filter = np.zeros(1 << filter_bits, dtype=bool)
+            pair_filter[_pair_hash(pair_codes, filter_shift)] = True
+
+            self._pair_table = (pair_codes, pair_severity, pair_data, pair_filter, filter_shift)
+        return self._pair_table
+
+
+def compile_lookup_table(lookup_table, path):
+    """
+    Writes a lookup table as a compiled DDI database (see ddi_compiled.py).
+
+    MedMindersDDIWarningSystem(path) then serves lookups straight from a read-only
+    mmap of the file, so worker processes share its pages instead of each one
+    building its own dict of dicts.
+    """
+    from ddi_compiled import write_compiled
+
+    index = InteractionIndex(lookup_table.set_index('DDI_Pair').to_dict('index'))
+    write_compiled(index, path)
+    return path
+
+
+def _load_index(lookup_table):
+    if isinstance(lookup_table, (str, os.PathLike)):
+        from ddi_compiled import CompiledInteractionIndex
+
+        return CompiledInteractionIndex(lookup_table)
+    return InteractionIndex(lookup_table.set_index('DDI_Pair').to_dict('index'))
+
+
+def _medication_set(medication_list, canonicalizer):
+    if canonicalizer is None:
+        return set(str(m).strip() for m in medication_list)
+    canonicalize = canonicalizer.canonicalize
+    return set(canonicalize(m) for m in medication_list)
+
 
 class MedMindersDDIWarningSystem:
-    def __init__(self, lookup_table):
-        self.DDI_DB = lookup_table.set_index('DDI_Pair').to_dict('index')
+    """
+    DDI screening over an interaction table that can be replaced while serving.
+
+    The index and canonicalizer form one immutable snapshot, stored as a tuple in
+    a single attribute. Every call reads that attribute once and works on what it
+    got, so reload() can swap a new snapshot in at any time: in-flight calls
+    finish on the old one, later calls see the new one, and readers never lock.
+    """
+
+    def __init__(self, lookup_table, canonicalizer=None, result_cache=None):
+        """
+        Args:
+            lookup_table: DataFrame with 'DDI_Pair', 'Severity_Level' and
+                'Interaction_Description' columns, or the path of a database
+                written by compile_lookup_table.
+            canonicalizer: optional ddi_canonical.DrugNameCanonicalizer applied to
+                every medication name before lookup (it can also be set later,
+                e.g. DrugNameCanonicalizer.for_system(system)).
+            result_cache: optional ddi_cache.MemoryResultCache / SQLiteResultCache
+                for the interacting pairs of check_for_interactions, keyed by
+                table version and the regimen's set of drug IDs. Results are
+                built per call either way, in the caller's own drug order.
+        """
+        self.result_cache = result_cache
+        self._snapshot = (_load_index(lookup_table), canonicalizer)
+        if result_cache is not None:
+            self._snapshot[0].table_version  # Hash the table now, not in the first check
+        self._reload_lock = threading.Lock()
+        self._reload_executor = None
         self.severity_map = {
             3: "🔴 CRITICAL",
             2: "⚠️ MAJOR",
@@ -51,36 +350,162 @@ class MedMindersDDIWarningSystem:
             0: "✅ SAFE/UNKNOWN"
         }
 
+    @property
+    def snapshot(self):
+        """
+        The live (index, canonicalizer) pair. Pass it to encode_regimens and
+        screen_batch to keep several calls on one table across a reload.
+        """
+        return self._snapshot
+
+    @property
+    def index(self):
+        return self._snapshot[0]
+
+    @property
+    def canonicalizer(self):
+        return self._snapshot[1]
+
+    @canonicalizer.setter
+    def canonicalizer(self, canonicalizer):
+        with self._reload_lock:
+            self._snapshot = (self._snapshot[0], canonicalizer)
+
+    @property
+    def DDI_DB(self):
+        return self.index.DDI_DB
+
+    @property
+    def drug_ids(self):
+        return self.index.drug_ids
+
+    @property
+    def drug_names(self):
+        return self.index.drug_names
+
     def _create_pair_key(self, drug1, drug2):
-        d1 = str(drug1).strip()
-        d2 = str(drug2).strip()
-        return ' | '.join(sorted([d1, d2]))
+        return _create_pair_key(drug1, drug2)
+
+    def canonical_name(self, medication, snapshot=None):
+        """The name a medication is looked up under."""
+        canonicalizer = (snapshot or self._snapshot)[1]
+        if canonicalizer is None:
+            return str(medication).strip()
+        return canonicalizer.canonicalize(medication)
+
+    def _medication_set(self, medication_list):
+        return _medication_set(medication_list, self.canonicalizer)
+
+    # --- Hot reload ---
+
+    def reload(self, lookup_table, canonicalizer=None):
+        """
+        Builds an index over a new interaction table and swaps it in atomically.
+
+        Checks running during the build keep using the current snapshot. The
+        current canonicalizer is rebuilt over the new vocabulary unless a new one
+        is given. Cached results need no flush: their keys carry the old table
+        version, so they can no longer be hit.
+
+        Args:
+            lookup_table: a DataFrame or compiled database path, as for __init__.
+
+        Returns:
+            The new index.
+        """
+        with self._reload_lock:
+            index = _load_index(lookup_table)
+            if canonicalizer is None and self._snapshot[1] is not None:
+                canonicalizer = self._snapshot[1].with_vocabulary(index.drug_names)
+            if self.result_cache is not None:
+                index.table_version  # Hash the table now, not in the first check
+            self._snapshot = (index, canonicalizer)
+        return index
+
+    def reload_async(self, lookup_table, canonicalizer=None):
+        """
+        reload() on a background thread. Returns a concurrent.futures.Future that
+        resolves to the new index once it is live; reloads run one at a time.
+        """
+        if self._reload_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with self._reload_lock:
+                if self._reload_executor is None:
+                    self._reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ddi-reload')
+        return self._reload_executor.submit(self.reload, lookup_table, canonicalizer)
+
+    # --- Single-regimen screening ---
 
     def check_for_interactions(self, medication_list):
-        medication_set = set(str(m).strip() for m in medication_list)
+        index, canonicalizer = self._snapshot
+        medication_set = _medication_set(medication_list, canonicalizer)
         interactions_found = []
 
         drugs = list(medication_set)
-        for i in range(len(drugs)):
-            for j in range(i + 1, len(drugs)):
-                drug_a = drugs[i]
-                drug_b = drugs[j]
-                pair_key = self._create_pair_key(drug_a, drug_b)
-
-                if pair_key in self.DDI_DB:
-                    interaction_data = self.DDI_DB[pair_key]
-                    severity = interaction_data['Severity_Level']
-                    description = interaction_data['Interaction_Description']
-
-                    interactions_found.append({
-                        'Pair': f"{drug_a} + {drug_b}",
-                        'Severity_Numeric': severity,
-                        'Severity_Text': self.severity_map.get(severity, "UNKNOWN"),
-                        'Description': description
-                    })
+        if self.result_cache is not None:
+            for i, j, severity, description in self._cached_pairs(index, drugs):
+                interactions_found.append({
+                    'Pair': f"{drugs[i]} + {drugs[j]}",
+                    'Severity_Numeric': severity,
+                    'Severity_Text': self.severity_map.get(severity, "UNKNOWN"),
+                    'Description': description
+                })
+            return interactions_found
+
+        for i, j, interaction_data in index.find_pairs(drugs):
+            severity = interaction_data['Severity_Level']
+            description = interaction_data['Interaction_Description']
+
+            interactions_found.append({
+                'Pair': f"{drugs[i]} + {drugs[j]}",
+                'Severity_Numeric': severity,
+                'Severity_Text': self.severity_map.get(severity, "UNKNOWN"),
+                'Description': description
+            })
 
         return interactions_found
 
+    def _cached_pairs(self, index, drugs):
+        """
+        index.find_pairs(drugs) through the result cache, as (i, j, severity,
+        description) in find_pairs order.
+
+        Entries are keyed by (table version, frozenset of drug IDs) and hold
+        (lo_id, hi_id, severity, description) tuples, so a hit is a set lookup
+        with no hashing or serialization, and the positions i < j are worked out
+        from this caller's own drug order.
+        """
+        drug_ids = index.drug_ids
+        positions = {}
+        for position, drug in enumerate(drugs):
+            drug_id = drug_ids.get(drug)
+            if drug_id is not None:
+                positions[drug_id] = position
+        if len(positions) < 2:
+            return []
+
+        cache_key = (index.table_version, frozenset(positions))
+        records = self.result_cache.get(cache_key)
+        if records is None:
+            records = []
+            for i, j, interaction_data in index.find_pairs(drugs):
+                id_i, id_j = drug_ids[drugs[i]], drug_ids[drugs[j]]
+                records.append((min(id_i, id_j), max(id_i, id_j), interaction_data['Severity_Level'],
+                                interaction_data['Interaction_Description']))
+            records = tuple(records)
+            self.result_cache.put(cache_key, records)
+        if not records:
+            return []
+
+        hits = []
+        for id_a, id_b, severity, description in records:
+            i, j = positions[id_a], positions[id_b]
+            hits.append((i, j, severity, description) if i < j else (j, i, severity, description))
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return hits
+
     def generate_final_warning(self, results):
         """
         Aggregates all results and determines the final UI message.
@@ -112,34 +537,381 @@ class MedMindersDDIWarningSystem:
         }
         return warning
 
+    # --- Dose-time-aware screening ---
 
-# --- Demonstration with the Updated UI Message ---
-medminders = MedMindersDDIWarningSystem(DDI_Lookup_Table)
+    def check_dose_schedule(self, dose_schedule):
+        """
+        check_for_interactions for a daily dose schedule, honoring separation windows.
+
+        Pairs whose table row carries a Separation_Minutes window are only flagged
+        if some dose of one drug falls within that many minutes of a dose of the
+        other (around the clock, so 23:30 and 00:15 are 45 minutes apart); pairs
+        without a window are flagged as before. Windowed hits also report the
+        closest gap as 'Dose_Gap_Minutes'.
+
+        The windowed pairs are resolved with one sweep over the doses sorted by
+        time: each dose is only compared with the doses that follow it within
+        the largest window, not with every other dose.
+
+        Args:
+            dose_schedule: dicts with 'med_name' and 'time_str' ("HH:MM"), one per
+                daily dose, as in pushNotificationApp.MEDICATION_SCHEDULES.
+        """
+        index, canonicalizer = self._snapshot
+        doses = [(canonicalizer.canonicalize(dose['med_name']) if canonicalizer is not None
+                  else str(dose['med_name']).strip(), _dose_minute(dose['time_str']))
+                 for dose in dose_schedule]
+        drugs = list(dict.fromkeys(drug for drug, _ in doses))
+
+        # Interacting pairs among the drugs, split by whether timing matters
+        hits = []
+        windows = {}  # drug -> {other drug: window}
+        for i, j, interaction_data in index.find_pairs(drugs):
+            window = separation_minutes(interaction_data)
+            hits.append((i, j, interaction_data, window))
+            if window is not None:
+                windows.setdefault(drugs[i], {})[drugs[j]] = window
+                windows.setdefault(drugs[j], {})[drugs[i]] = window
+
+        gaps = {}  # (drug, other drug) -> closest gap, both orientations
+        if windows:
+            timed = sorted((minute, drug) for drug, minute in doses if drug in windows)
+            widest = max(max(partners.values()) for partners in windows.values())
+            n = len(timed)
+            wrapped = timed + [(minute + MINUTES_PER_DAY, drug) for minute, drug in timed]
+            end = 0
+            for start, (minute, drug) in enumerate(timed):
+                end = max(end, start + 1)
+                while end < start + n and wrapped[end][0] - minute < widest:
+                    end += 1
+                partners = windows[drug]
+                for other_minute, other in wrapped[start + 1:end]:
+                    gap = other_minute - minute
+                    if gap < partners.get(other, 0) and gap < gaps.get((drug, other), MINUTES_PER_DAY):
+                        gaps[(drug, other)] = gaps[(other, drug)] = gap
+
+        interactions_found = []
+        for i, j, interaction_data, window in hits:
+            if window is not None and (drugs[i], drugs[j]) not in gaps:
+                continue
+            severity = interaction_data['Severity_Level']
+            result = {
+                'Pair': f"{drugs[i]} + {drugs[j]}",
+                'Severity_Numeric': severity,
+                'Severity_Text': self.severity_map.get(severity, "UNKNOWN"),
+                'Description': interaction_data['Interaction_Description']
+            }
+            if window is not None:
+                result['Dose_Gap_Minutes'] = gaps[(drugs[i], drugs[j])]
+            interactions_found.append(result)
+        return interactions_found
+
+    # --- Batch screening (whole patient populations) ---
+
+    def encode_regimens(self, medication_lists, snapshot=None):
+        """
+        Turns medication lists into a ragged (CSR-style) array of drug IDs.
+
+        Each row holds the regimen's unique lookup names in the same order
+        check_for_interactions walks them; names missing from the table are -1.
+        IDs belong to the snapshot's index (default: the live one).
+
+        Returns:
+            (indptr, drug_ids, drug_lists): drug_lists[p] are the names behind row p.
+        """
+        import numpy as np
+
+        index, canonicalizer = snapshot or self._snapshot
+        drug_lists = [list(_medication_set(medication_list, canonicalizer)) for medication_list in medication_lists]
+        lengths = np.fromiter((len(drugs) for drugs in drug_lists), dtype=np.int64, count=len(drug_lists))
+        indptr = np.zeros(len(drug_lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        drug_ids = np.fromiter(
+            (index.drug_ids.get(drug, -1) for drugs in drug_lists for drug in drugs),
+            dtype=np.int64, count=int(indptr[-1]))
+        return indptr, drug_ids, drug_lists
+
+    def screen_batch(self, indptr, drug_ids, max_block_pairs=4_000_000, snapshot=None):
+        """
+        Screens many regimens in one vectorized pass.
+
+        Regimens are given as a ragged array: row p is drug_ids[indptr[p]:indptr[p + 1]]
+        (the indptr/indices of a scipy.sparse CSR patient x drug matrix work as-is).
+        IDs are positions in the snapshot's drug_names (default: the live snapshot);
+        -1 marks an unknown drug. Rows should not repeat an ID.
+
+        Returns a dict of NumPy arrays:
+            patient, first, second - hit p is the pair at row positions first < second
+                                     of patient p, sorted the way check_for_interactions
+                                     reports them
+            pair                   - index of the hit in the pair table
+            severity               - numeric severity of each hit
+            max_severity           - per patient, the generate_final_warning status code
+                                     (-1 if the patient has no interactions at all)
+            critical               - per patient, index of the generate_final_warning
+                                     critical hit (-1 if none)
+        """
+        import numpy as np
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        drug_ids = np.asarray(drug_ids, dtype=np.int64)
+        index = (snapshot or self._snapshot)[0]
+        pair_codes, pair_severity, _, pair_filter, filter_shift = index.pair_table()
+        n_patients = len(indptr) - 1
+        n_drugs = len(index.drug_names)
+
+        patients, firsts, seconds, pairs = [], [], [], []
+        lengths = np.diff(indptr)
+        for k in np.unique(lengths) if len(pair_codes) else []:
+            if k < 2:
+                continue
+            first, second = np.triu_indices(k, 1)
+            rows = np.flatnonzero(lengths == k)
+            block_rows = max(1, max_block_pairs // len(first))
+
+            for start in range(0, len(rows), block_rows):
+                block = rows[start:start + block_rows]
+                regimen_ids = drug_ids[indptr[block][:, None] + np.arange(k)]
+                a = regimen_ids[:, first]
+                b = regimen_ids[:, second]
+                lo = np.minimum(a, b)
+                codes = lo * n_drugs + np.maximum(a, b)
+
+                cand_row, cand_pair = np.nonzero((lo >= 0) & pair_filter[_pair_hash(codes, filter_shift)])
+                cand_codes = codes[cand_row, cand_pair]
+                slots = np.searchsorted(pair_codes, cand_codes)
+                np.minimum(slots, len(pair_codes) - 1, out=slots)
+                hit = pair_codes[slots] == cand_codes
+
+                patients.append(block[cand_row[hit]])
+                firsts.append(first[cand_pair[hit]])
+                seconds.append(second[cand_pair[hit]])
+                pairs.append(slots[hit])
+
+        empty = np.zeros(0, dtype=np.int64)
+        patient = np.concatenate(patients) if patients else empty
+        first = np.concatenate(firsts) if firsts else empty
+        second = np.concatenate(seconds) if seconds else empty
+        pair = np.concatenate(pairs) if pairs else empty
+
+        order = np.lexsort((second, first, patient))
+        patient, first, second, pair = patient[order], first[order], second[order], pair[order]
+        severity = pair_severity[pair]
 
+        # generate_final_warning keeps the first hit carrying the max severity
+        max_severity = np.full(n_patients, -1, dtype=np.int64)
+        np.maximum.at(max_severity, patient, severity)
+        critical = np.full(n_patients, -1, dtype=np.int64)
+        candidates = np.flatnonzero(severity == max_severity[patient])
+        critical_patients, first_candidate = np.unique(patient[candidates], return_index=True)
+        critical[critical_patients] = candidates[first_candidate]
+
+        return {
+            'patient': patient,
+            'first': first,
+            'second': second,
+            'pair': pair,
+            'severity': severity,
+            'max_severity': max_severity,
+            'critical': critical,
+        }
+
+    def check_for_interactions_batch(self, medication_lists, with_results=True):
+        """
+        Batch equivalent of calling check_for_interactions and generate_final_warning
+        for every medication list.
+
+        Args:
+            medication_lists: list of medication lists.
+            with_results (bool): build every patient's interactions list. With
+                False only each patient's critical interaction is built, which is
+                all the warning needs.
+
+        Returns:
+            (results, warnings): one interactions list and one warning dict per patient,
+            identical to the single-regimen path. results is None without with_results.
+        """
+        snapshot = self._snapshot
+        indptr, drug_ids, drug_lists = self.encode_regimens(medication_lists, snapshot=snapshot)
+        screened = self.screen_batch(indptr, drug_ids, snapshot=snapshot)
+        pair_data = snapshot[0].pair_table()[2]
+        patient, first, second, pair = (screened[key].tolist() for key in ('patient', 'first', 'second', 'pair'))
+
+        def interaction(hit):
+            interaction_data = pair_data[pair[hit]]
+            severity = interaction_data['Severity_Level']
+            drugs = drug_lists[patient[hit]]
+            return {
+                'Pair': f"{drugs[first[hit]]} + {drugs[second[hit]]}",
+                'Severity_Numeric': severity,
+                'Severity_Text': self.severity_map.get(severity, "UNKNOWN"),
+                'Description': interaction_data['Interaction_Description']
+            }
+
+        # The warning only depends on the critical hit, which screen_batch already found
+        critical_hits = screened['critical'].tolist()
+        if not with_results:
+            return None, [self.generate_final_warning([interaction(hit)] if hit >= 0 else []) for hit in critical_hits]
+
+        interactions = [interaction(hit) for hit in range(len(patient))]
+        results = [[] for _ in drug_lists]
+        for p, item in zip(patient, interactions):
+            results[p].append(item)
+        warnings = [self.generate_final_warning([interactions[hit]] if hit >= 0 else []) for hit in critical_hits]
+
+        return results, warnings
+
+
+class RegimenSession:
+    """
+    A single patient's regimen, re-screened incrementally as it changes.
+
+    add() only checks the new drug against the drugs already in the session, and
+    the running max severity / critical pair is kept per severity level, so
+    current_warning() never rescans the results the way generate_final_warning does.
+
+    current_warning() equals generate_final_warning(session.results); results are
+    listed in the order their pairs were found (existing drug first).
+    """
+
+    def __init__(self, system, medication_list=()):
+        self.system = system
+        self._drugs = {}          # drug -> {partner drug: pair}, in insertion order
+        self._interactions = {}   # pair (drug_a, drug_b) -> result, in insertion order
+        self._by_severity = {}    # severity -> {pair: result}, non-empty levels only
+        # name passed to add() -> the canonical name it was stored under, so that
+        # remove() still finds it after the canonicalizer changes (hot reload)
+        self._stored_names = {}
+        for medication in medication_list:
+            self.add(medication)
+
+    @property
+    def drugs(self):
+        return list(self._drugs)
+
+    @property
+    def results(self):
+        return list(self._interactions.values())
+
+    def __contains__(self, drug):
+        return self._stored_name(drug) in self._drugs
+
+    def _stored_name(self, drug):
+        stored = self._stored_names.get(drug)
+        return stored if stored is not None else self.system.canonical_name(drug)
+
+    def __len__(self):
+        return len(self._drugs)
+
+    def add(self, drug):
+        """
+        Adds a drug and returns the interactions it introduced (empty if the drug
+        was already in the regimen).
+        """
+        snapshot = self.system.snapshot
+        name, drug = drug, self.system.canonical_name(drug, snapshot)
+        if drug in self._drugs:
+            self._stored_names[name] = drug
+            return []
+
+        new_results = []
+        partners = {}
+        for other, interaction_data in snapshot[0].interactions_with(drug, self._drugs):
+            severity = interaction_data['Severity_Level']
+            result = {
+                'Pair': f"{other} + {drug}",
+                'Severity_Numeric': severity,
+                'Severity_Text': self.system.severity_map.get(severity, "UNKNOWN"),
+                'Description': interaction_data['Interaction_Description']
+            }
+            pair = (other, drug)
+            partners[other] = pair
+            self._drugs[other][drug] = pair
+            self._interactions[pair] = result
+            self._by_severity.setdefault(severity, {})[pair] = result
+            new_results.append(result)
+
+        self._drugs[drug] = partners
+        self._stored_names[name] = self._stored_names[drug] = drug
+        return new_results
+
+    def remove(self, drug):
+        """Removes a drug (if present) and every interaction it was part of."""
+        drug = self._stored_name(drug)
+        partners = self._drugs.pop(drug, None)
+        if partners is None:
+            return False
+        self._stored_names = {name: stored for name, stored in self._stored_names.items() if stored != drug}
+
+        for other, pair in partners.items():
+            del self._drugs[other][drug]
+            result = self._interactions.pop(pair)
+            level = self._by_severity[result['Severity_Numeric']]
+            del level[pair]
+            if not level:
+                del self._by_severity[result['Severity_Numeric']]
+        return True
+
+    def current_warning(self):
+        if not self._by_severity:
+            return self.system.generate_final_warning([])
+        # The first pair found at the highest level is the one max() would pick
+        most_severe = next(iter(self._by_severity[max(self._by_severity)].values()))
+        return self.system.generate_final_warning([most_severe])
+
+
+# --- Demonstration with the Updated UI Message ---
 # Regimen 1: Critical (Severity 3) - Should show the generic warning
 patient_meds_1 = ['Warfarin', 'Fluconazole', 'Citalopram', 'Rizatriptan']
 # Regimen 2: Moderate (Severity 1) - Should NOW show the generic warning
 patient_meds_2 = ['Amoxicillin', 'Paracetamol', 'Ibuprofen', 'Lisinopril']
 
-# 1. Test Case 1: Critical Risk (Severity 3)
-print("=" * 50)
-print(f"CHECKING REGIMEN 1: {patient_meds_1}")
-results_1 = medminders.check_for_interactions(patient_meds_1)
-warning_1 = medminders.generate_final_warning(results_1)
-
-print(f"Max Severity Level Detected: {warning_1['status_code']} ({medminders.severity_map[warning_1['status_code']]})")
-print(f"\n--- MEDMINDERS UI DISPLAY ---")
-print(warning_1['ui_message'])
-print(f"Detail: Most critical pair is {warning_1['critical_pair']}")
-
-# 2. Test Case 2: Moderate Risk (Severity 1)
-print("\n" + "=" * 50)
-print(f"CHECKING REGIMEN 2: {patient_meds_2}")
-results_2 = medminders.check_for_interactions(patient_meds_2)
-warning_2 = medminders.generate_final_warning(results_2)
-
-print(f"Max Severity Level Detected: {warning_2['status_code']} ({medminders.severity_map[warning_2['status_code']]})")
-print(f"\n--- MEDMINDERS UI DISPLAY ---")
-# The crucial change: this now displays the requested message for Severity 1
-print(warning_2['ui_message'])
-print(f"Detail: The pair is {warning_2['critical_pair']}")
+
+def run_demo(medminders):
+    # 1. Test Case 1: Critical Risk (Severity 3)
+    print("=" * 50)
+    print(f"CHECKING REGIMEN 1: {patient_meds_1}")
+    results_1 = medminders.check_for_interactions(patient_meds_1)
+    warning_1 = medminders.generate_final_warning(results_1)
+
+    print(f"Max Severity Level Detected: {warning_1['status_code']} ({medminders.severity_map[warning_1['status_code']]})")
+    print(f"\n--- MEDMINDERS UI DISPLAY ---")
+    print(warning_1['ui_message'])
+    print(f"Detail: Most critical pair is {warning_1['critical_pair']}")
+
+    # 2. Test Case 2: Moderate Risk (Severity 1)
+    print("\n" + "=" * 50)
+    print(f"CHECKING REGIMEN 2: {patient_meds_2}")
+    results_2 = medminders.check_for_interactions(patient_meds_2)
+    warning_2 = medminders.generate_final_warning(results_2)
+
+    print(f"Max Severity Level Detected: {warning_2['status_code']} ({medminders.severity_map[warning_2['status_code']]})")
+    print(f"\n--- MEDMINDERS UI DISPLAY ---")
+    # The crucial change: this now displays the requested message for Severity 1
+    print(warning_2['ui_message'])
+    print(f"Detail: The pair is {warning_2['critical_pair']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MedMinders drug-to-drug interaction screening.")
+    commands = parser.add_subparsers(dest='command')
+    demo = commands.add_parser('demo', help="Print the demo report (default).")
+    demo.add_argument('--database', help="Run the demo against a compiled database instead of the demo table.")
+    compile_cmd = commands.add_parser('compile', help="Compile a raw interaction CSV into a DDI database file.")
+    compile_cmd.add_argument('csv', help="CSV with Drug_1, Drug_2 and Interaction_Description columns.")
+    compile_cmd.add_argument('output', help="Path of the compiled database to write.")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compile':
+        import pandas as pd
+
+        lookup_table = build_lookup_table(pd.read_csv(args.csv))
+        compile_lookup_table(lookup_table, args.output)
+        print(f"Compiled {len(lookup_table)} interactions into {args.output}")
+        return
+
+    run_demo(MedMindersDDIWarningSystem(getattr(args, 'database', None) or build_demo_lookup_table()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Local stand-in for a push provider (APNs/FCM), for testing push_dispatch.py
+offline.
+
+An asyncio HTTP/1.1 keep-alive server that accepts POST /push, waits the
+configured latency (plus random jitter) and answers 200 with a message id, so
+dispatch throughput can be measured against a realistic round trip without
+touching a real provider. It can also misbehave the way providers do:
+
+    --rate-limit N    more than N pushes in one second get 429 with Retry-After: 1
+    --error-rate F    a fraction F of pushes get 503 (transient)
+    "to" starting with "invalid_"    410 Gone (an unregistered device; permanent)
+
+Endpoints:
+    POST /push    {"to": "user_12345", "notification": {...}} -> {"message_id": 17}
+    GET  /stats   -> {"received": ..., "delivered": ..., "statuses": {...}, "max_in_flight": ...}
+
+Usage:
+    python mock_push_server.py [--port 8787] [--latency-ms 100] [--jitter-ms 20]
+                               [--rate-limit 500] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import json
+import random
+from http import HTTPStatus
+
+
+class MockPushServer:
+    def __init__(self, latency=0.1, jitter=0.0, seed=None, rate_limit=None, error_rate=0.0):
+        """
+        Args:
+            latency (float): seconds each push request takes.
+            jitter (float): up to this many extra seconds, uniformly at random.
+            rate_limit (int): pushes accepted per second; the rest get 429.
+            error_rate (float): fraction of pushes answered with 503.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._window = (None, 0)  # (second, pushes accepted in it)
+        self.received = 0
+        self.delivered = 0
+        self.statuses = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = request_line.split(' ', 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._route(method, path, body)
+                if path == '/push':
+                    self.statuses[status.value] = self.statuses.get(status.value, 0) + 1
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                data = json.dumps(payload).encode('utf-8')
+                retry_after = "Retry-After: 1\r\n" if status == HTTPStatus.TOO_MANY_REQUESTS else ""
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n{retry_after}"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/stats':
+            return HTTPStatus.OK, {'received': self.received, 'delivered': self.delivered,
+                                   'statuses': self.statuses, 'in_flight': self.in_flight,
+                                   'max_in_flight': self.max_in_flight}
+        if path != '/push':
+            return HTTPStatus.NOT_FOUND, {'error': f"No route for {path}."}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Use POST."}
+        try:
+            target = str(json.loads(body)['to'])
+        except (ValueError, KeyError, TypeError):
+            return HTTPStatus.BAD_REQUEST, {'error': 'Expected a JSON body like {"to": "user_12345", ...}.'}
+
+        self.received += 1
+        if self.rate_limit is not None:
+            second = int(asyncio.get_running_loop().time())
+            accepted = self._window[1] if self._window[0] == second else 0
+            if accepted >= self.rate_limit:
+                return HTTPStatus.TOO_MANY_REQUESTS, {'error': "Rate limit exceeded."}
+            self._window = (second, accepted + 1)
+        if target.startswith('invalid_'):
+            return HTTPStatus.GONE, {'error': "Device token is no longer registered."}
+
+        message_id = self.received
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        finally:
+            self.in_flight -= 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': "Temporarily unavailable."}
+        self.delivered += 1
+        return HTTPStatus.OK, {'message_id': message_id}
+
+    async def serve(self, host='127.0.0.1', port=8787):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"Mock push server listening on http://{host}:{port}/push "
+              f"({self.latency * 1e3:.0f} ms latency)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock APNs/FCM push endpoint with injected latency.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, help="pushes accepted per second; the rest get 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of pushes answered with 503")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = MockPushServer(args.latency_ms / 1000, args.jitter_ms / 1000, args.seed,
+                            rate_limit=args.rate_limit, error_rate=args.error_rate)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nMock push server stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,433 @@
+"""
+Asynchronous push delivery for the reminder scripts.
+
+The scheduler thread only enqueues: PushDispatcher.submit() puts the
+notification on a bounded queue and returns. An asyncio event loop on a
+background thread drains the queue with `concurrency` workers, each holding one
+keep-alive HTTP/1.1 connection to the push endpoint, so a 100 ms round trip
+costs 100 ms per worker instead of 100 ms of the scheduler's time per reminder.
+When the queue is full, submit() blocks (or gives up after its timeout), which
+pushes back on the producer instead of growing memory without bound. A producer
+that must never wait (the scheduler thread) submits with block=False and
+dead_letter_when_full=True: overflow then goes straight to the dead letters.
+
+Delivery failures are sorted into three kinds:
+
+    rate limited (429)   every worker pauses for Retry-After and the push is
+                         retried; this does not use up its attempts, but a push
+                         rate limited max_rate_limited times is dead-lettered
+    transient (5xx, connection errors, timeouts)
+                         retried with exponential backoff and full jitter
+    permanent (other 4xx, e.g. 410 for an unregistered device)
+                         written to the dead-letter store at once
+
+Retries wait in one timer heap drained by a single coroutine, not in sleeping
+threads or tasks. A push still failing after max_attempts goes to the dead
+letters, and so does one that hits an unexpected error (a malformed response,
+a failing dead-letter write...) rather than taking its worker down. Each
+provider (APNs, FCM, ...) gets its own PushDispatcher, so each has its own rate
+limit, connections and retry heap.
+
+Standard library only. APNs requires HTTP/2, which needs a third-party client
+(httpx[http2] / h2); this module speaks HTTP/1.1, which FCM's HTTP v1 API,
+gateways and mock_push_server.py all accept.
+
+Usage:
+    dispatcher = PushDispatcher("http://127.0.0.1:8787/push", concurrency=64)
+    dispatcher.start()
+    dispatcher.submit("user_12345", "Time for Medication", "Take your 500 MG Tablet of Metformin HCL now.")
+    dispatcher.close()   # waits for queued notifications to go out
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from reminder_metrics import LATENCY_BUCKETS
+
+log = logging.getLogger(__name__)
+
+
+class PushConnection:
+    """One keep-alive HTTP/1.1 connection, (re)opened on demand."""
+
+    def __init__(self, host, port, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """
+        Sends one request and reads the response.
+
+        Returns:
+            (status, headers dict with lower-case names, body bytes)
+        """
+        try:
+            return await asyncio.wait_for(self._exchange(method, path, body, headers or {}), self.timeout)
+        except BaseException:
+            self.close()  # the connection may hold half a response
+            raise
+
+    async def _exchange(self, method, path, body, headers):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        self._writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await self._writer.drain()
+
+        status_line, *header_lines = (await self._reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(status_line.split(' ', 2)[1])
+        response_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get('content-length') or 0)
+        response_body = await self._reader.readexactly(length) if length else b''
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, response_headers, response_body
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` sends per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def reserve(self):
+        """
+        Takes one token, going into debt if there is none.
+
+        Returns:
+            Seconds the caller must wait before sending (0.0 if it may send now).
+        """
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+        self._updated = now
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class DeadLetterStore:
+    """Pushes that could not be delivered, in SQLite (in memory unless given a path)."""
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters ("
+            " id INTEGER PRIMARY KEY, provider TEXT NOT NULL, payload TEXT NOT NULL, reason TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL, failed_at REAL NOT NULL)")
+        self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+    def add(self, provider, payload, reason, attempts):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO dead_letters (provider, payload, reason, attempts, failed_at) VALUES (?, ?, ?, ?, ?)",
+                (provider, json.dumps(payload), reason, attempts, time.time()))
+
+    def entries(self, limit=100):
+        """The most recent dead letters as dicts."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT provider, payload, reason, attempts, failed_at FROM dead_letters ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [{'provider': provider, 'payload': json.loads(payload), 'reason': reason, 'attempts': attempts,
+                 'failed_at': failed_at} for provider, payload, reason, attempts, failed_at in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class PushDispatcher:
+    """Delivers push notifications from a bounded queue on a background event loop."""
+
+    def __init__(self, endpoint, concurrency=64, queue_size=10_000, timeout=10.0, headers=None, provider='push',
+                 rate_limit=None, burst=None, max_attempts=6, backoff_base=0.5, backoff_cap=60.0,
+                 dead_letters=None, seed=None, metrics=None, max_rate_limited=50):
+        """
+        Args:
+            endpoint (str): push URL, e.g. "http://127.0.0.1:8787/push".
+            concurrency (int): connections (and requests in flight) to the endpoint.
+            queue_size (int): notifications that may wait for a connection before
+                submit() blocks.
+            timeout (float): seconds for one request, connecting included.
+            headers (dict): extra request headers, e.g. {"Authorization": "Bearer ..."}.
+            provider (str): name recorded with dead letters and in stats().
+            rate_limit (float): sends per second allowed by the provider (None: unlimited).
+            burst (float): token-bucket size (default: one second's worth).
+            max_attempts (int): failed tries per push (429s not counted) before it
+                is dead-lettered.
+            max_rate_limited (int): 429 answers per push before it is dead-lettered,
+                so a provider that keeps refusing cannot hold a push forever.
+            backoff_base (float): the n-th retry waits up to backoff_base * 2**n
+                seconds (uniformly at random), capped at backoff_cap.
+            dead_letters: DeadLetterStore for undeliverable pushes (default: in memory).
+            metrics: optional MetricsRegistry to report request latency, errors
+                by type and queue depths into.
+        """
+        url = urlsplit(endpoint)
+        if url.scheme != 'http':
+            raise ValueError(f"Unsupported push endpoint {endpoint!r} (expected http://host:port/path).")
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.path = url.path or '/'
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+        self.provider = provider
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.max_attempts = max_attempts
+        self.max_rate_limited = max_rate_limited
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.dead_letters = dead_letters if dead_letters is not None else DeadLetterStore()
+        self._rng = random.Random(seed)
+        self._slots = threading.Semaphore(queue_size)
+        self._outstanding = 0
+        self._idle = threading.Condition()
+        self._loop = None
+        self._queue = None
+        self._retries = []  # timer heap: (due loop time, seq, queue item)
+        self._retry_seq = itertools.count()
+        self._retry_wakeup = None
+        self._paused_until = 0.0  # loop time before which nothing is sent (Retry-After)
+        self._stopping = None
+        self._started = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.dead_lettered = 0
+        self.dropped = 0
+        self.retried = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.throttled_s = 0.0
+        self.latency_total = 0.0
+        self.requests = 0
+        self._latency = self._errors = None
+        if metrics is not None:
+            self._latency = metrics.histogram('push_dispatch_latency_seconds',
+                                              'Seconds for one push request to the provider.', LATENCY_BUCKETS)
+            self._errors = metrics.counter('push_errors_total', 'Failed push requests, by HTTP status or exception.',
+                                           label='type')
+            metrics.gauge('push_queue_depth', 'Pushes submitted and not yet sent or dead-lettered.',
+                          lambda: self._outstanding)
+            metrics.gauge('push_retry_queue_depth', 'Pushes waiting for a retry.', lambda: len(self._retries))
+
+    # --- Producer side (any thread) ---
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name='push-dispatch',
+                                        daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def submit(self, user_id, title, message, block=True, timeout=None, dead_letter_when_full=False):
+        """
+        Queues one notification. Returns False (and counts it as dropped) if the
+        queue stayed full for `timeout` seconds, or at once when block is False.
+        With dead_letter_when_full, a dropped push is also written to the
+        dead-letter store (reason "queue full") for a later replay.
+        """
+        if self._thread is None:
+            raise RuntimeError("PushDispatcher is not running; call start() before submit().")
+        payload = {'to': user_id, 'notification': {'title': title, 'body': message}}
+        if not self._slots.acquire(block, timeout):
+            self.dropped += 1
+            if dead_letter_when_full:
+                self._abandon(payload, "queue full", 0)
+            return False
+        with self._idle:
+            self._outstanding += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (payload, 0, 0))
+        return True
+
+    def drain(self, timeout=None):
+        """Waits until every submitted notification was delivered or dead-lettered. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, drain=True, timeout=None):
+        if self._thread is None:
+            return
+        if drain:
+            self.drain(timeout)
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        return {
+            'provider': self.provider,
+            'sent': self.sent,
+            'dead_lettered': self.dead_lettered,
+            'dropped': self.dropped,
+            'queued': self._outstanding,
+            'retry_queue': len(self._retries),
+            'retried': self.retried,
+            'rate_limited': self.rate_limited,
+            'server_errors': self.server_errors,
+            'throttled_s': self.throttled_s,
+            'mean_latency_ms': self.latency_total / self.requests * 1e3 if self.requests else 0.0,
+        }
+
+    # --- Event loop side ---
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        self._retry_wakeup = asyncio.Event()
+        tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self._retry_timer()))
+        self._started.set()
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self):
+        connection = PushConnection(self.host, self.port, self.timeout)
+        try:
+            while True:
+                payload, attempts, tries = await self._queue.get()
+                if tries == 0:
+                    self._slots.release()  # left the bounded queue; retries do not count against it
+                wait = self._paused_until - self._loop.time()
+                if self.bucket is not None:
+                    wait = max(wait, self.bucket.reserve())
+                if wait > 0:
+                    self.throttled_s += wait
+                    await asyncio.sleep(wait)
+                try:
+                    finished = await self._deliver(connection, payload, attempts, tries + 1)
+                except Exception as e:
+                    # Anything _deliver does not expect must not end this worker:
+                    # the push would be lost and drain() would wait for it forever
+                    finished = True
+                    self._abandon(payload, f"unexpected {type(e).__name__}: {e}", tries + 1)
+                if finished:
+                    with self._idle:
+                        self._outstanding -= 1
+                        if self._outstanding == 0:
+                            self._idle.notify_all()
+        finally:
+            connection.close()
+
+    async def _deliver(self, connection, payload, attempts, tries):
+        """
+        One try (the tries-th; attempts counts the earlier failures that were not
+        429s). Returns True once the push is finished with (sent or dead-lettered).
+        """
+        start = time.perf_counter()
+        retry_after = None
+        try:
+            status, headers, _ = await connection.request('POST', self.path, json.dumps(payload).encode('utf-8'),
+                                                          self.headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            reason = f"{type(e).__name__}: {e}"
+            if self._errors is not None:
+                self._errors.inc(type(e).__name__)
+        else:
+            if 200 <= status < 300:
+                self.sent += 1
+                return True
+            reason = f"HTTP {status}"
+            if self._errors is not None:
+                self._errors.inc(reason)
+            if status == 429:
+                self.rate_limited += 1
+                if tries - attempts >= self.max_rate_limited:  # every uncounted try was a 429
+                    return self._dead_letter(payload, f"{reason} x{tries - attempts}", tries)
+                retry_after = _retry_after(headers) or self.backoff_base
+                self._paused_until = max(self._paused_until, self._loop.time() + retry_after)
+            elif status >= 500:
+                self.server_errors += 1
+            else:
+                return self._dead_letter(payload, reason, tries)  # not worth retrying
+        finally:
+            elapsed = time.perf_counter() - start
+            self.requests += 1
+            self.latency_total += elapsed
+            if self._latency is not None:
+                self._latency.observe(elapsed)
+
+        if retry_after is None:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                return self._dead_letter(payload, reason, tries)
+        delay = self._rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (tries - 1)))
+        self._schedule_retry((payload, attempts, tries), max(delay, retry_after or 0.0))
+        return False
+
+    def _dead_letter(self, payload, reason, attempts):
+        self.dead_letters.add(self.provider, payload, reason, attempts)
+        self.dead_lettered += 1
+        log.warning("Push to %s failed permanently after %d attempt(s) (%s); moved to dead letters.",
+                    payload['to'], attempts, reason,
+                    extra={'user_id': payload['to'], 'provider': self.provider, 'reason': reason})
+        return True
+
+    def _abandon(self, payload, reason, attempts):
+        """Dead-letters a push after an unexpected error, logging it if even that fails."""
+        try:
+            self._dead_letter(payload, reason, attempts)
+        except Exception as e:
+            log.error("Push to %s was lost (%s); the dead-letter store failed too: %s", payload['to'], reason, e,
+                      extra={'user_id': payload['to'], 'provider': self.provider, 'reason': reason})
+
+    def _schedule_retry(self, item, delay):
+        self.retried += 1
+        due = self._loop.time() + delay
+        heapq.heappush(self._retries, (due, next(self._retry_seq), item))
+        if self._retries[0][0] == due:
+            self._retry_wakeup.set()  # the timer is sleeping towards a later deadline
+
+    async def _retry_timer(self):
+        """Moves retries whose backoff has passed back onto the queue."""
+        while True:
+            now = self._loop.time()
+            while self._retries and self._retries[0][0] <= now:
+                _, _, item = heapq.heappop(self._retries)
+                self._queue.put_nowait(item)
+            timeout = self._retries[0][0] - now if self._retries else None
+            self._retry_wakeup.clear()
+            try:
+                await asyncio.wait_for(self._retry_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _retry_after(headers):
+    """Seconds from a Retry-After header (the delta-seconds form), or None."""
+    try:
+        return max(0.0, float(headers.get('retry-after', '')))
+    except ValueError:
+        return None
@@ -0,0 +1,95 @@
+"""
+Coalesces reminders that come due for the same user in the same minute into a
+single push.
+
+ReminderCoalescer.add is used as the job callback instead of sending right
+away: it files the reminder under (user, time bucket), and one flush job on the
+scheduler renders and sends each group after every job due in that tick has
+run. With hold=0 (the default) nothing is delayed; jobs are only grouped with
+those firing in the same run_pending pass, which is what daily HH:MM reminders
+do. A positive hold also catches stragglers a few seconds later.
+
+Usage:
+    coalescer = ReminderCoalescer(scheduler, send_push_notification_api, render_medication_notification)
+    scheduler.daily_at("08:00", coalescer.add, med_data)
+"""
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ReminderCoalescer:
+    def __init__(self, scheduler, send, render, bucket=60.0, hold=0.0):
+        """
+        Args:
+            scheduler: ReminderScheduler the reminders fire on (flushes run on it too).
+            send: called as send(user_id, title, message) once per group.
+            render: called as render(list of reminder dicts) -> (title, message).
+            bucket (float): seconds of fire time that count as "the same time".
+            hold (float): seconds a group waits for more reminders before it is sent.
+        """
+        self.scheduler = scheduler
+        self.send = send
+        self.render = render
+        self.bucket = bucket
+        self.hold = hold
+        self._groups = {}  # (user_id, bucket) -> (deadline, [reminders]), oldest first
+        self._flush_job = None
+        self.reminders = 0
+        self.pushes = 0
+        self.failed = 0
+
+    def add(self, reminder):
+        """Job callback: queues one reminder dict (with a 'user_id' key) for its user's next push."""
+        now = self.scheduler.clock()
+        # Bucket by the time the job was due, so reminders due together stay together after a late tick
+        due = self.scheduler.fire_time if self.scheduler.fire_time is not None else now
+        key = (reminder.get('user_id', 'unknown_user'), int(due // self.bucket))
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = (now + self.hold, [])
+            if self._flush_job is None:
+                self._flush_job = self.scheduler.schedule_at(group[0], self.flush)
+        group[1].append(reminder)
+        self.reminders += 1
+
+    def flush(self, force=False):
+        """
+        Sends every group whose hold has expired (all of them with force=True).
+        A group that fails to render or send is logged and dropped; the others
+        still go out.
+        """
+        self._flush_job = None
+        now = self.scheduler.clock()
+        groups, self._groups = self._groups, {}
+        try:
+            for key, (deadline, reminders) in list(groups.items()):
+                if deadline > now and not force:
+                    break  # groups are in deadline order: this one and the rest wait
+                del groups[key]
+                try:
+                    title, message = self.render(reminders)
+                    self.send(key[0], title, message)
+                except Exception as e:
+                    self.failed += len(reminders)
+                    log.error("An unexpected error occurred sending %d reminders to %s: %s. Continuing.",
+                              len(reminders), key[0], e, extra={'user_id': key[0], 'error_type': type(e).__name__})
+                    continue
+                self.pushes += 1
+        finally:
+            # Groups not sent yet (held, or left over if something escaped) go back ahead of any added meanwhile
+            if groups:
+                groups.update(self._groups)
+                self._groups = groups
+            if self._groups and self._flush_job is None:
+                self._flush_job = self.scheduler.schedule_at(next(iter(self._groups.values()))[0], self.flush)
+
+    def stats(self):
+        """Reminders in, pushes out, reminders lost to failed pushes, and the fraction of pushes saved by coalescing."""
+        sent = self.reminders - self.failed - sum(len(reminders) for _, reminders in self._groups.values())
+        return {
+            'reminders': self.reminders,
+            'pushes': self.pushes,
+            'failed': self.failed,
+            'reduction': 1 - self.pushes / sent if sent else 0.0,
+        }
@@ -0,0 +1,315 @@
+"""
+Reminder scheduling engine: a min-heap of jobs ordered by their next fire time.
+
+Replaces the `while True: schedule.run_pending(); time.sleep(1)` loop of the push
+notification scripts. That loop wakes up every second and checks every job on
+each tick; ReminderScheduler only looks at the top of its heap and sleeps until
+the earliest deadline (or until a job that fires sooner is added).
+
+    insert      O(log n)   heap push
+    cancel      O(1)       the heap entry is left behind and skipped when it surfaces;
+                           the heap is rebuilt once stale entries outnumber live jobs
+    reschedule  O(log n)   push a new entry, the old one goes stale
+    next due    O(1)       heap top
+
+Time comes from an injectable clock (seconds since the epoch, default time.time),
+so the engine can be driven with a virtual clock: run_pending(now) fires whatever
+is due at now without sleeping.
+
+With metrics=MetricsRegistry() (reminder_metrics.py) the scheduler records how
+late each job fires against its scheduled time, how many jobs each tick runs,
+callback errors by exception class and the number of live jobs.
+
+While a callback runs, scheduler.fire_time holds the time its job was scheduled
+for, which stays put however late the tick is.
+
+Daily jobs run at a wall-clock time in their own time zone (zoneinfo). Fire times
+are kept in UTC epoch seconds in the heap, so only the job that just fired gets
+its next time computed. Across DST changes a reminder keeps its wall-clock time:
+a time skipped by a spring-forward transition fires at the shifted time (02:30
+becomes 03:30) and a time repeated in the fall fires once, at its first
+occurrence. Jobs sharing a (time, zone) slot share one trigger, which computes
+the slot's next fire time once for all of them.
+
+Usage:
+    scheduler = ReminderScheduler()
+    scheduler.daily_at("08:00", send_medication_notification, med_data)
+    scheduler.every(45, cycle_medication_notifications)
+    scheduler.run_forever()
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from reminder_metrics import COUNT_BUCKETS, LAG_BUCKETS
+
+log = logging.getLogger(__name__)
+
+
+class Job:
+    """A scheduled callback. Returned by ReminderScheduler; pass it to cancel()/reschedule()."""
+
+    __slots__ = ('callback', 'args', 'when', 'trigger', 'cancelled', '_version')
+
+    def __init__(self, callback, args, when, trigger=None):
+        self.callback = callback
+        self.args = args
+        self.when = when          # next fire time (epoch seconds)
+        self.trigger = trigger    # previous fire time -> next fire time, None for one-shot jobs
+        self.cancelled = False
+        self._version = 0         # bumped on reschedule; older heap entries are stale
+
+    def __repr__(self):
+        name = getattr(self.callback, '__name__', repr(self.callback))
+        return f"<Job {name} at {datetime.fromtimestamp(self.when):%Y-%m-%d %H:%M:%S}>"
+
+
+def _every(interval):
+    def trigger(previous):
+        return previous + interval
+    return trigger
+
+
+@lru_cache(maxsize=None)
+def daily_trigger(time_str, tz=None):
+    """
+    Trigger for a daily job at time_str ('HH:MM') in time zone tz (a zoneinfo key
+    such as 'America/New_York', or None for the process's local time). Returns
+    the next occurrence strictly after the previous fire time.
+
+    One trigger is shared by every job in the slot and remembers its last answer,
+    since all of them ask for the same next fire time in turn.
+    """
+    hour, minute = parse_time_str(time_str)
+    zone = ZoneInfo(tz) if tz is not None else None
+    memo = (None, None)
+
+    def trigger(previous):
+        nonlocal memo
+        if memo[0] == previous:
+            return memo[1]
+        moment = datetime.fromtimestamp(previous, zone)
+        candidate = moment.replace(hour=hour, minute=minute, second=0, microsecond=0, fold=0)
+        if candidate.timestamp() <= previous:
+            candidate = (moment + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0,
+                                                             fold=0)
+        following = candidate.timestamp()
+        memo = (previous, following)
+        return following
+
+    return trigger
+
+
+def parse_time_str(time_str):
+    """'HH:MM' -> (hour, minute)."""
+    hours, _, minutes = str(time_str).strip().partition(':')
+    hour, minute = int(hours), int(minutes or 0)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time of day: {time_str!r} (expected HH:MM)")
+    return hour, minute
+
+
+class ReminderScheduler:
+    def __init__(self, clock=time.time, on_error=None, metrics=None):
+        """
+        Args:
+            clock: zero-argument callable returning the current time in epoch seconds.
+            on_error: called as on_error(job, exception) when a callback raises;
+                defaults to logging the error (the scheduler keeps running).
+            metrics: optional MetricsRegistry to report fire lag, jobs per tick,
+                errors and the live job count into.
+        """
+        self.clock = clock
+        self.on_error = on_error or self._log_error
+        self._fire_lag = self._jobs_per_tick = self._job_errors = None
+        if metrics is not None:
+            self._fire_lag = metrics.histogram('reminder_fire_lag_seconds',
+                                               'Seconds between a job\'s scheduled and actual fire time.', LAG_BUCKETS)
+            self._jobs_per_tick = metrics.histogram('reminder_jobs_per_tick',
+                                                    'Jobs run by one run_pending() pass that ran any.', COUNT_BUCKETS)
+            self._job_errors = metrics.counter('reminder_job_errors_total',
+                                               'Job callbacks that raised, by exception class.', label='type')
+            metrics.gauge('reminder_jobs_scheduled', 'Live jobs in the scheduler.', lambda: self._live)
+        self._heap = []                 # (when, seq, version, job)
+        self._seq = itertools.count()   # FIFO order for jobs due at the same time
+        self._live = 0
+        self._wakeup = threading.Condition(threading.RLock())
+        self._running = False
+        self.fire_time = None           # scheduled fire time of the job whose callback is running
+
+    def __len__(self):
+        return self._live
+
+    # --- Registration ---
+
+    def schedule_at(self, when, callback, *args, trigger=None):
+        """Runs callback(*args) at when (epoch seconds), then at trigger(when) and so on if given."""
+        job = Job(callback, args, when, trigger)
+        with self._wakeup:
+            self._push(job)
+            self._live += 1
+        return job
+
+    def every(self, seconds, callback, *args, start=None):
+        """Runs callback(*args) every `seconds`, first at start (default: one interval from now)."""
+        first = start if start is not None else self.clock() + seconds
+        return self.schedule_at(first, callback, *args, trigger=_every(seconds))
+
+    def daily_at(self, time_str, callback, *args, tz=None):
+        """Runs callback(*args) every day at time_str ('HH:MM') in time zone tz (default: local time)."""
+        trigger = daily_trigger(time_str, tz)
+        return self.schedule_at(trigger(self.clock()), callback, *args, trigger=trigger)
+
+    def add_daily_jobs(self, entries):
+        """
+        Bulk daily_at: entries are (time_str, tz, callback, args) tuples. Each
+        distinct (time_str, tz) slot's first fire time is computed once, and the
+        heap is rebuilt in one pass instead of one push per job.
+
+        Returns:
+            The jobs, in entry order.
+        """
+        now = self.clock()
+        slots = {}  # (time_str, tz) -> (trigger, first fire time)
+        jobs = []
+        for time_str, tz, callback, args in entries:
+            slot = slots.get((time_str, tz))
+            if slot is None:
+                trigger = daily_trigger(time_str, tz)
+                slot = slots[(time_str, tz)] = (trigger, trigger(now))
+            jobs.append(Job(callback, tuple(args), slot[1], slot[0]))
+
+        with self._wakeup:
+            seq = self._seq
+            self._heap.extend((job.when, next(seq), 0, job) for job in jobs)
+            heapq.heapify(self._heap)
+            self._live += len(jobs)
+            self._wakeup.notify()
+        return jobs
+
+    def cancel(self, job):
+        with self._wakeup:
+            if job.cancelled:
+                return False
+            job.cancelled = True
+            self._live -= 1
+            if len(self._heap) > 64 and len(self._heap) > 2 * self._live:
+                self._compact()
+        return True
+
+    def reschedule(self, job, when):
+        """Moves a live job to fire next at when; its trigger still applies afterwards."""
+        with self._wakeup:
+            if job.cancelled:
+                raise ValueError("Cannot reschedule a cancelled job.")
+            job._version += 1
+            job.when = when
+            self._push(job)
+            if len(self._heap) > 64 and len(self._heap) > 2 * self._live:
+                self._compact()
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.when, next(self._seq), job._version, job))
+        if self._heap[0][3] is job:
+            self._wakeup.notify()   # a sleeping run_forever must wake up earlier now
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_current(entry)]
+        heapq.heapify(self._heap)
+
+    @staticmethod
+    def _is_current(entry):
+        _, _, version, job = entry
+        return not job.cancelled and version == job._version
+
+    # --- Running ---
+
+    def next_deadline(self):
+        """Fire time of the earliest live job, or None if nothing is scheduled."""
+        with self._wakeup:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and not self._is_current(heap[0]):
+            heapq.heappop(heap)
+
+    def _pop_due(self, now):
+        """
+        The next job due at now and the time it was due, or None. The job itself
+        is already advanced to its following fire time.
+        """
+        with self._wakeup:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return None
+            scheduled, _, _, job = heapq.heappop(self._heap)
+            if job.trigger is None:
+                job.cancelled = True
+                self._live -= 1
+            else:
+                following = job.trigger(job.when)
+                if following <= now:
+                    # Missed fire times (the process was asleep or busy) are not
+                    # replayed one by one; the job resumes at its next future slot.
+                    following = job.trigger(now)
+                job.when = following
+                self._push(job)
+            return job, scheduled
+
+    def run_pending(self, now=None):
+        """Runs every job due at now (default: the clock). Returns the number run."""
+        now = self.clock() if now is None else now
+        fire_lag = self._fire_lag
+        ran = 0
+        while True:
+            due = self._pop_due(now)
+            if due is None:
+                break
+            job, scheduled = due
+            if fire_lag is not None:
+                fire_lag.observe(max(0.0, self.clock() - scheduled))
+            self.fire_time = scheduled
+            self._run(job)
+            ran += 1
+        self.fire_time = None
+        if ran and self._jobs_per_tick is not None:
+            self._jobs_per_tick.observe(ran)
+        return ran
+
+    def _run(self, job):
+        try:
+            job.callback(*job.args)
+        except Exception as e:
+            if self._job_errors is not None:
+                self._job_errors.inc(type(e).__name__)
+            self.on_error(job, e)
+
+    @staticmethod
+    def _log_error(job, error):
+        log.error("An unexpected error occurred in %r: %s. Continuing.", job, error,
+                  extra={'error_type': type(error).__name__})
+
+    def run_forever(self):
+        """Runs jobs as they come due, sleeping until the next deadline in between. Stop with stop()."""
+        self._running = True
+        while self._running:
+            self.run_pending()
+            with self._wakeup:
+                if not self._running:
+                    break
+                deadline = self.next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - self.clock())
+                if timeout is None or timeout > 0:
+                    self._wakeup.wait(timeout)
+
+    def stop(self):
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify()
@@ -0,0 +1,183 @@
+"""
+Structured, buffered logging that keeps I/O off the scheduler thread.
+
+start_async_logging() points the root logger at a queue handler: a log call
+formats nothing and writes nothing, it only puts the record on a queue (the
+message is built from its arguments later, on the writer thread, so don't
+mutate objects after logging them). One background thread takes records off
+the queue, renders each as a JSON line
+(time, level, logger, message, plus any `extra=` fields) and writes them to
+the stream, flushing once per batch rather than once per line. stop() drains
+the queue and flushes, so nothing is lost on a clean exit.
+
+What the caller still pays is the logging call itself: building the
+LogRecord. start_async_logging() switches off the record fields the JSON lines
+never show (source file and line, thread, process; the switches from the
+logging HOWTO's "Optimization" section), which takes about a third off each
+call. That is still several microseconds: more than a print() to a local
+file, which only loses once the stream is slow or blocks (a pipe, a terminal,
+a log shipper falling behind). On hot paths pass values as %-arguments rather
+than building an `extra=` dict per call.
+
+Usage:
+    writer = start_async_logging()
+    logging.getLogger("medminders.push").info("push queued", extra={"user_id": "user_12345"})
+    writer.stop()
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else came in through extra=
+_BASE_RECORD = vars(logging.LogRecord('', 0, '', 0, '', (), None))
+_RECORD_FIELDS = set(_BASE_RECORD) | {'message', 'asctime'}
+
+# json.dumps(default=...) builds a new encoder per call; this one is reused
+_encode = json.JSONEncoder(default=str).encode
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__()
+        self._second = (None, '')  # (whole second, its strftime), reused by every record in that second
+
+    def format(self, record):
+        second, stamp = self._second
+        if int(record.created) != second:
+            second = int(record.created)
+            stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+            self._second = (second, stamp)
+        entry = {
+            'ts': f"{stamp}.{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = vars(record)
+        if len(fields) > len(_BASE_RECORD):  # no need to look for extra= fields a record cannot have
+            for key, value in fields.items():
+                if key not in _RECORD_FIELDS:
+                    entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return _encode(entry)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # QueueHandler formats and copies the record here, on the caller's
+        # thread; the writer thread does the formatting instead.
+        return record
+
+    def handle(self, record):
+        # Handler.handle takes the handler's lock around emit(); SimpleQueue.put
+        # is thread-safe on its own
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):  # a filter may hand back a replacement (3.12+)
+            record = rv
+        if rv:
+            self.queue.put(record)
+        return rv
+
+
+class AsyncLogWriter:
+    """Background thread writing queued log records in batches. Attach .handler to a logger."""
+
+    def __init__(self, stream=None, formatter=None, max_batch=512):
+        self.stream = stream or sys.stdout
+        self.formatter = formatter or JsonFormatter()
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.dropped = 0  # lines lost to stream errors
+        self.handler = _DeferredQueueHandler(self.queue)
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = []
+            for record in batch:
+                if record is None:
+                    continue
+                try:
+                    lines.append(self.formatter.format(record) + "\n")
+                except Exception:  # a broken record must not take the writer down
+                    lines.append(json.dumps({'level': 'ERROR', 'msg': f"Unformattable log record {record!r}"}) + "\n")
+            if lines:
+                try:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+                    self.written += len(lines)
+                except Exception as e:  # nor must a broken stream: keep draining so the queue cannot grow
+                    if not self.dropped:
+                        print(f"Log writer cannot write to its stream ({e}); dropping log lines.", file=sys.stderr)
+                    self.dropped += len(lines)
+            if stop:
+                return
+
+    def stop(self):
+        """
+        Detaches the handler from every logger it was added to, writes out
+        everything queued so far and ends the thread. Later records go to
+        whatever handlers remain (logging's stderr fallback if none).
+        """
+        global _writer
+        if not self._thread.is_alive():
+            return
+        for logger in [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]:
+            if isinstance(logger, logging.Logger) and self.handler in logger.handlers:
+                logger.removeHandler(self.handler)
+        self.queue.put(None)
+        self._thread.join()
+        with _writer_lock:
+            if _writer is self:
+                _writer = None  # start_async_logging() may start a new one
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def lean_log_records():
+    """
+    Stops logging from collecting the caller's file/line, thread and process
+    for every record (process-wide). JsonFormatter never shows them.
+    """
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+def start_async_logging(level=logging.INFO, stream=None, caller_info=False):
+    """
+    Routes the root logger through a queue to an AsyncLogWriter (once per
+    process; later calls return the same writer). Call it from the script's
+    entry point, not at import time.
+
+    Args:
+        caller_info (bool): keep collecting the per-record fields that
+            lean_log_records() switches off (for other handlers that show them).
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            if not caller_info:
+                lean_log_records()
+            _writer = AsyncLogWriter(stream)
+            root = logging.getLogger()
+            root.addHandler(_writer.handler)
+            root.setLevel(level)
+        return _writer
@@ -0,0 +1,201 @@
+"""
+In-process metrics for the reminder pipeline, served in the Prometheus text
+format.
+
+Counters, histograms and gauges are plain Python objects updated under a
+small lock (an observe() is a bisect and two additions), so instrumenting the
+scheduler's hot path costs well under a microsecond per event. Pass one
+MetricsRegistry to the components that should report into it:
+
+    ReminderScheduler(metrics=registry)
+        reminder_fire_lag_seconds        histogram  actual - scheduled fire time
+        reminder_jobs_per_tick           histogram  jobs run per run_pending()
+        reminder_job_errors_total{type}  counter    callback exceptions by class
+        reminder_jobs_scheduled          gauge      live jobs in the heap
+    PushDispatcher(metrics=registry)
+        push_dispatch_latency_seconds    histogram  one HTTP round trip
+        push_errors_total{type}          counter    "HTTP 429", "TimeoutError", ...
+        push_queue_depth                 gauge      submitted, not finished yet
+        push_retry_queue_depth           gauge      waiting in the retry heap
+
+serve_metrics() answers GET /metrics from a daemon thread (http.server).
+
+Usage:
+    registry = MetricsRegistry()
+    scheduler = ReminderScheduler(metrics=registry)
+    serve_metrics(registry, port=9464)   # curl localhost:9464/metrics
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+
+def _label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, help_text, label=None):
+        """
+        Args:
+            label (str): optional label name; inc() then takes its value.
+        """
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value=None, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value=None):
+        return self._values.get(label_value, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items(), key=lambda item: str(item[0]))
+        if not values and self.label is None:
+            values = [(None, 0)]
+        for label_value, value in values:
+            labels = f'{{{self.label}="{_label_value(label_value)}"}}' if self.label else ''
+            lines.append(f"{self.name}{labels} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # the last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    @property
+    def count(self):
+        return sum(self._counts)
+
+    @property
+    def sum(self):
+        return self._sum
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if past the last bucket)."""
+        with self._lock:
+            counts = list(self._counts)
+        target, seen = q * sum(counts), 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= target and seen:
+                return bound
+        return 0.0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_number(bound)}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_number(total)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value read at scrape time from a callable."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(self.read())}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} is already registered as a {type(existing).__name__}.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, label=None):
+        return self._add(Counter(name, help_text, label))
+
+    def histogram(self, name, help_text, buckets):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def get(self, name):
+        """The metric registered as name, or None."""
+        return self._metrics.get(name)
+
+    def gauge(self, name, help_text, read):
+        """Registers (or replaces) a gauge read from read() at scrape time."""
+        gauge = Gauge(name, help_text, read)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+def serve_metrics(registry, host='127.0.0.1', port=9464):
+    """
+    Serves GET /metrics on a daemon thread.
+
+    Returns:
+        The ThreadingHTTPServer (call shutdown() to stop it).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # no access log on stderr per scrape
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,338 @@
+"""
+Sharded reminder scheduling: several scheduler processes (possibly on different
+hosts) split the reminders by user, with lease-based failover.
+
+    partitions   every user_id hashes (stable BLAKE2, not hash()) onto one of a
+                 fixed number of partitions, so a user's reminders always move
+                 together.
+    ownership    partitions are placed on the live workers with a consistent-hash
+                 ring (virtual nodes). When a worker joins or leaves, only the
+                 partitions whose ring owner changed are handed off; the rest
+                 stay where they are.
+    leases       a worker may only run a partition it holds a lease on. Leases
+                 live in the shared store and expire after lease_ttl seconds
+                 unless renewed, which every worker does every lease_ttl / 3
+                 seconds. A worker that dies stops renewing; once its leases and
+                 heartbeat expire, the peers now owning its partitions take them
+                 over and fire whatever came due in the meantime (within grace).
+    firing       each fire is a compare-and-set in the store: the job's next fire
+                 time only moves forward if it still has the value this worker
+                 loaded and the worker still holds the partition's lease (same
+                 epoch, not expired). Two workers can therefore never both fire
+                 one reminder slot. The claim is committed before the callback
+                 runs, so a crash between the two loses that one reminder
+                 rather than sending it twice.
+
+The shared store is a SQLite file in WAL mode, which is fine for processes on
+one host (or a shared volume with working locks); a multi-host deployment
+would put the same three tables in a server database.
+
+Usage:
+    store = ShardStore("shards.db")
+    store.import_jobs([("user_12345", "08:00", "America/New_York", med_data)])
+    scheduler = ReminderScheduler()
+    ShardWorker(store, scheduler, "worker-a", send_medication_notification).start()
+    scheduler.run_forever()
+"""
+import bisect
+import hashlib
+import json
+import sqlite3
+import time
+
+from reminder_engine import daily_trigger
+
+PARTITIONS = 64
+
+
+def _hash64(key):
+    return int.from_bytes(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def partition_of(user_id, partitions=PARTITIONS):
+    return _hash64(user_id) % partitions
+
+
+class HashRing:
+    """Consistent-hash ring placing partitions on workers."""
+
+    def __init__(self, workers, vnodes=64):
+        points = sorted((_hash64(f"{worker}#{i}"), worker) for worker in workers for i in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._owners = [worker for _, worker in points]
+
+    def owner(self, partition):
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _hash64(f"partition-{partition}")) % len(self._points)
+        return self._owners[i]
+
+    def assignments(self, partitions=PARTITIONS):
+        return {partition: self.owner(partition) for partition in range(partitions)}
+
+
+class ShardStore:
+    """Jobs, partition leases and worker heartbeats in one SQLite file."""
+
+    def __init__(self, path, partitions=PARTITIONS):
+        self.path = path
+        self.partitions = partitions
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)  # explicit transactions below
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shard_jobs ("
+            " id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, partition INTEGER NOT NULL, time_str TEXT NOT NULL,"
+            " tz TEXT, payload TEXT NOT NULL, next_fire REAL NOT NULL, active INTEGER NOT NULL DEFAULT 1)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS shard_jobs_due ON shard_jobs (partition, next_fire) WHERE active = 1")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shard_leases ("
+            " partition INTEGER PRIMARY KEY, owner TEXT, expires REAL NOT NULL DEFAULT 0,"
+            " epoch INTEGER NOT NULL DEFAULT 0)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shard_workers (worker_id TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+        with self.transaction():
+            existing = self.conn.execute("SELECT COUNT(*) FROM shard_leases").fetchone()[0]
+            if existing and existing != partitions:
+                raise ValueError(f"{path} is partitioned {existing} ways, not {partitions}.")
+            self.conn.executemany("INSERT OR IGNORE INTO shard_leases (partition) VALUES (?)",
+                                  [(partition,) for partition in range(partitions)])
+
+    def transaction(self):
+        return _ImmediateTransaction(self.conn)
+
+    # --- Jobs ---
+
+    def import_jobs(self, entries, now=None, only_if_empty=False):
+        """
+        Adds daily reminders, (user_id, time_str, tz, payload) tuples, in one
+        transaction. With only_if_empty, nothing is added if the store already
+        has jobs (so concurrently starting workers seed it once).
+        """
+        now = time.time() if now is None else now
+        first_fire = {}
+
+        def rows():
+            for user_id, time_str, tz, payload in entries:
+                when = first_fire.get((time_str, tz))
+                if when is None:
+                    when = first_fire[(time_str, tz)] = daily_trigger(time_str, tz)(now)
+                yield user_id, partition_of(user_id, self.partitions), time_str, tz, json.dumps(payload), when
+
+        with self.transaction():
+            if only_if_empty and self.has_jobs():
+                return
+            self.conn.executemany(
+                "INSERT INTO shard_jobs (user_id, partition, time_str, tz, payload, next_fire)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows())
+
+    def has_jobs(self):
+        return self.conn.execute("SELECT 1 FROM shard_jobs WHERE active = 1 LIMIT 1").fetchone() is not None
+
+    def jobs_due(self, partitions, until, since=None):
+        """Active jobs of the given partitions with since <= next_fire < until."""
+        partitions = list(partitions)
+        if not partitions:
+            return []
+        sql = ("SELECT partition, id, time_str, tz, payload, next_fire FROM shard_jobs"
+               f" WHERE active = 1 AND partition IN ({','.join('?' * len(partitions))}) AND next_fire < ?")
+        params = partitions + [until]
+        if since is not None:
+            sql += " AND next_fire >= ?"
+            params.append(since)
+        return self.conn.execute(sql, params).fetchall()
+
+    def claim(self, job_id, expected, following, partition, owner, epoch, now):
+        """
+        Compare-and-set: moves the job's next fire time from expected to
+        following, only while owner holds an unexpired lease on the partition at
+        this epoch. Returns True if this caller won the slot.
+        """
+        cursor = self.conn.execute(
+            "UPDATE shard_jobs SET next_fire = ? WHERE id = ? AND next_fire = ? AND active = 1 AND EXISTS"
+            " (SELECT 1 FROM shard_leases WHERE partition = ? AND owner = ? AND epoch = ? AND expires > ?)",
+            (following, job_id, expected, partition, owner, epoch, now))
+        return cursor.rowcount == 1
+
+    # --- Leases and heartbeats (call inside transaction()) ---
+
+    def heartbeat(self, worker_id, now):
+        self.conn.execute("INSERT OR REPLACE INTO shard_workers (worker_id, heartbeat) VALUES (?, ?)",
+                          (worker_id, now))
+
+    def live_workers(self, now, ttl):
+        return [row[0] for row in self.conn.execute(
+            "SELECT worker_id FROM shard_workers WHERE heartbeat > ? ORDER BY worker_id", (now - ttl,))]
+
+    def remove_worker(self, worker_id):
+        self.conn.execute("DELETE FROM shard_workers WHERE worker_id = ?", (worker_id,))
+
+    def acquire(self, partition, owner, now, ttl):
+        """Takes a free or expired lease. Returns the new epoch, or None if someone else holds it."""
+        cursor = self.conn.execute(
+            "UPDATE shard_leases SET owner = ?, expires = ?, epoch = epoch + 1"
+            " WHERE partition = ? AND (owner IS NULL OR expires <= ?)", (owner, now + ttl, partition, now))
+        if cursor.rowcount != 1:
+            return None
+        return self.conn.execute("SELECT epoch FROM shard_leases WHERE partition = ?", (partition,)).fetchone()[0]
+
+    def renew(self, partition, owner, epoch, now, ttl):
+        cursor = self.conn.execute(
+            "UPDATE shard_leases SET expires = ? WHERE partition = ? AND owner = ? AND epoch = ? AND expires > ?",
+            (now + ttl, partition, owner, epoch, now))
+        return cursor.rowcount == 1
+
+    def release(self, partition, owner, epoch):
+        self.conn.execute(
+            "UPDATE shard_leases SET owner = NULL, expires = 0 WHERE partition = ? AND owner = ? AND epoch = ?",
+            (partition, owner, epoch))
+
+    def close(self):
+        self.conn.close()
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK, so read-then-write lease updates never hit a lock upgrade."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+
+class ShardWorker:
+    """Runs the partitions this worker owns on a ReminderScheduler."""
+
+    def __init__(self, store, scheduler, worker_id, callback, lease_ttl=10.0, horizon=3600.0, grace=3600.0,
+                 vnodes=64):
+        """
+        Args:
+            store: ShardStore shared by all workers.
+            scheduler: ReminderScheduler to run this worker's jobs on (its clock is
+                used for leases too, so all workers need comparable clocks).
+            worker_id (str): unique and stable per worker process.
+            callback: called as callback(payload) when a reminder fires.
+            lease_ttl (float): seconds a lease (and a heartbeat) stays valid; a dead
+                worker's reminders resume on a peer within about this long.
+            horizon (float): seconds of upcoming jobs kept in the scheduler.
+            grace (float): overdue reminders found on takeover are fired if at most
+                this many seconds late, skipped otherwise.
+        """
+        self.store = store
+        self.scheduler = scheduler
+        self.worker_id = worker_id
+        self.callback = callback
+        self.lease_ttl = lease_ttl
+        self.horizon = horizon
+        self.grace = grace
+        self.vnodes = vnodes
+        self._held = {}   # partition -> lease epoch
+        self._jobs = {}   # partition -> {job id: in-memory Job}
+        self._loaded_until = None
+        self._timers = []
+        self.fired = 0
+        self.skipped = 0
+        self.lost_claims = 0
+        self.handoffs = 0
+
+    @property
+    def partitions(self):
+        return sorted(self._held)
+
+    def start(self):
+        self._loaded_until = self.scheduler.clock() + self.horizon
+        self.coordinate()
+        self._timers = [self.scheduler.every(self.lease_ttl / 3, self.coordinate),
+                        self.scheduler.every(self.horizon / 2, self.refill)]
+        return self
+
+    def coordinate(self):
+        """Heartbeat, renew held leases, hand off partitions that moved away, take over the ones that moved here."""
+        now = self.scheduler.clock()
+        acquired = []
+        with self.store.transaction():
+            self.store.heartbeat(self.worker_id, now)
+            ring = HashRing(self.store.live_workers(now, self.lease_ttl), self.vnodes)
+            for partition, epoch in list(self._held.items()):
+                if ring.owner(partition) != self.worker_id:
+                    self.store.release(partition, self.worker_id, epoch)
+                    self._unload(partition)
+                    self.handoffs += 1
+                elif not self.store.renew(partition, self.worker_id, epoch, now, self.lease_ttl):
+                    self._unload(partition)  # lost it (we were paused past the lease)
+            for partition in range(self.store.partitions):
+                if partition not in self._held and ring.owner(partition) == self.worker_id:
+                    epoch = self.store.acquire(partition, self.worker_id, now, self.lease_ttl)
+                    if epoch is not None:
+                        self._held[partition] = epoch
+                        self._jobs[partition] = {}
+                        acquired.append(partition)
+        for row in self.store.jobs_due(acquired, self._loaded_until):
+            self._load(row, now)
+
+    def refill(self):
+        now = self.scheduler.clock()
+        until = now + self.horizon
+        for row in self.store.jobs_due(self._held, until, since=self._loaded_until):
+            self._load(row, now)
+        self._loaded_until = until
+
+    def _load(self, row, now):
+        partition, job_id, time_str, tz, payload, when = row
+        if partition not in self._held:
+            return
+        if when < now - self.grace:
+            # Too late to be useful: move it to its next slot without firing
+            trigger = daily_trigger(time_str, tz)
+            following = trigger(now)
+            if not self.store.claim(job_id, when, following, partition, self.worker_id, self._held[partition], now):
+                return
+            self.skipped += 1
+            if following >= self._loaded_until:
+                return  # refill loads it
+            when = following
+        self._jobs[partition][job_id] = self.scheduler.schedule_at(
+            when, self._fire, partition, job_id, time_str, tz, payload, when)
+
+    def _unload(self, partition):
+        self._held.pop(partition, None)
+        for job in self._jobs.pop(partition, {}).values():
+            self.scheduler.cancel(job)
+
+    def _fire(self, partition, job_id, time_str, tz, payload, scheduled_at):
+        jobs = self._jobs.get(partition)
+        job = jobs.get(job_id) if jobs is not None else None
+        if job is None or job.when != scheduled_at:
+            return  # the partition moved away, or this entry was superseded
+        del jobs[job_id]
+        trigger = daily_trigger(time_str, tz)
+        now = self.scheduler.clock()
+        following = trigger(scheduled_at)
+        if following <= now:
+            following = trigger(now)
+        if not self.store.claim(job_id, scheduled_at, following, partition, self.worker_id, self._held[partition],
+                                now):
+            self.lost_claims += 1
+            return
+        if following < self._loaded_until:
+            jobs[job_id] = self.scheduler.schedule_at(following, self._fire, partition, job_id, time_str, tz,
+                                                      payload, following)
+        self.fired += 1
+        self.callback(json.loads(payload))
+
+    def stop(self):
+        """Releases every partition right away so peers do not have to wait for the leases to expire."""
+        for timer in self._timers:
+            self.scheduler.cancel(timer)
+        with self.store.transaction():
+            for partition, epoch in list(self._held.items()):
+                self.store.release(partition, self.worker_id, epoch)
+                self._unload(partition)
+            self.store.remove_worker(self.worker_id)
@@ -0,0 +1,291 @@
+"""
+Replays a full day of reminders for a synthetic population on a virtual clock,
+for capacity planning.
+
+The ReminderScheduler is driven by a VirtualClock instead of time.time: the
+harness jumps the clock to the next deadline, runs the due jobs and jumps
+again, so 24 hours pass in however long the work itself takes. While a tick
+runs the clock also advances by the real time spent processing it. A burst
+that takes this machine 3 s to get through therefore makes the last of its
+reminders fire 3 s late, and the fire-lag histogram shows how late reminders
+would be on this hardware at this population size.
+
+Pushes go to a StubDispatcher with PushDispatcher's submit() signature. It
+sends nothing; with a provider rate it models the provider's send queue and
+records how long each push would wait in it.
+
+Reported: load time and memory, throughput, reminders and pushes in the
+busiest minutes, fire lag, the per-reminder cost of each stage (scheduler,
+rendering, submit), and the provider queue delay.
+
+Usage:
+    python reminder_simulation.py --users 1000000 [--provider-rate 5000] [--coalesce]
+"""
+import argparse
+import random
+import time
+
+from reminder_coalesce import ReminderCoalescer
+from reminder_engine import ReminderScheduler
+from reminder_metrics import LAG_BUCKETS, MetricsRegistry
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+DAY_SECONDS = 86400
+
+# Where the population lives (weights are rough shares of users)
+ZONES = (
+    ('America/New_York', 28), ('America/Chicago', 17), ('America/Denver', 6), ('America/Los_Angeles', 14),
+    ('America/Sao_Paulo', 5), ('Europe/London', 8), ('Europe/Berlin', 8), ('Africa/Lagos', 2),
+    ('Asia/Kolkata', 5), ('Asia/Singapore', 3), ('Asia/Tokyo', 3), ('Australia/Sydney', 1),
+)
+# Most doses are taken at a handful of times; the rest land on any quarter hour
+COMMON_SLOTS = ('07:00', '07:30', '08:00', '09:00', '12:00', '13:00', '18:00', '19:00', '20:00', '21:00', '22:00')
+MEDICATIONS = (
+    ('Metformin HCL', '500 MG Tablet'), ('Levothyroxine', '75 mcg Tablet'), ('Vitamin D', '1000 IU Capsule'),
+    ('Lisinopril', '10 MG Tablet'), ('Atorvastatin', '20 MG Tablet'), ('Amlodipine', '5 MG Tablet'),
+    ('Omeprazole', '20 MG Capsule'), ('Sertraline', '50 MG Tablet'),
+)
+MICRO_BUCKETS = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 1e-2, 1e-1)
+
+
+def synthetic_population(users, min_doses=1, max_doses=8, common=0.7, seed=0):
+    """
+    Yields (time_str, tz, reminder) for every daily dose of `users` users, each
+    taking min_doses-max_doses doses a day in one of ZONES. Reminders are small
+    dicts like the scripts' MEDICATION_SCHEDULES entries ('user_id', 'med_name',
+    'dosage').
+    """
+    rng = random.Random(seed)
+    zones = [zone for zone, _ in ZONES]
+    weights = [weight for _, weight in ZONES]
+    quarter_hours = [f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in (0, 15, 30, 45)]
+    for user in range(users):
+        user_id = f"user_{user}"
+        tz = rng.choices(zones, weights)[0]
+        for med_name, dosage in rng.sample(MEDICATIONS, rng.randint(min_doses, max_doses)):
+            time_str = rng.choice(COMMON_SLOTS) if rng.random() < common else rng.choice(quarter_hours)
+            yield time_str, tz, {'user_id': user_id, 'med_name': med_name, 'dosage': dosage}
+
+
+def render_reminders(reminders):
+    """(title, message) of one push for the reminders due together for one user."""
+    doses = [f"{reminder['dosage']} of {reminder['med_name']}" for reminder in reminders]
+    listed = doses[0] if len(doses) == 1 else ", ".join(doses[:-1]) + f" and {doses[-1]}"
+    return "Time for Medication", f"Take your {listed} now."
+
+
+class VirtualClock:
+    """
+    Epoch seconds under the harness's control. Between busy() and idle() the
+    real time elapsed is added on top, so work done in a tick takes virtual
+    time too.
+    """
+
+    def __init__(self, start):
+        self.now = start
+        self._busy_since = None
+
+    def __call__(self):
+        if self._busy_since is None:
+            return self.now
+        return self.now + (time.perf_counter() - self._busy_since)
+
+    def busy(self):
+        self._busy_since = time.perf_counter()
+
+    def idle(self):
+        self.now += time.perf_counter() - self._busy_since
+        self._busy_since = None
+
+
+class PerMinute:
+    """Event counts per virtual minute of the simulated day."""
+
+    def __init__(self, start):
+        self.start = start
+        self.counts = [0] * (DAY_SECONDS // 60 + 1)
+
+    def add(self, when):
+        minute = min(int((when - self.start) // 60), len(self.counts) - 1)
+        self.counts[minute] += 1
+
+    def busiest(self, n=1):
+        """The n busiest minutes as (count, minute of the day), busiest first."""
+        return sorted(((count, minute) for minute, count in enumerate(self.counts)), reverse=True)[:n]
+
+
+class StubDispatcher:
+    """
+    Stands in for PushDispatcher: submit() only counts the push. With a
+    provider rate (pushes per second), each push also takes a place in a
+    modelled provider queue, and its wait there goes into queue_delay.
+    """
+
+    def __init__(self, clock, per_minute, rate=None):
+        self.clock = clock
+        self.per_minute = per_minute
+        self.rate = rate
+        self.submitted = 0
+        self.queue_delay = MetricsRegistry().histogram('provider_queue_seconds', 'Modelled wait at the provider.',
+                                                       LAG_BUCKETS)
+        self._free_at = 0.0  # virtual time the provider queue drains
+
+    def submit(self, user_id, title, message, block=True, timeout=None):
+        now = self.clock()
+        self.submitted += 1
+        self.per_minute.add(now)
+        if self.rate:
+            self._free_at = max(now, self._free_at) + 1.0 / self.rate
+            self.queue_delay.observe(self._free_at - now)
+        return True
+
+
+class Pipeline:
+    """Job callback of the simulation: render and submit, each timed."""
+
+    def __init__(self, clock, dispatcher, registry, per_minute):
+        self.clock = clock
+        self.dispatcher = dispatcher
+        self.per_minute = per_minute
+        self.render_seconds = registry.histogram('simulation_render_seconds', 'Rendering one push.', MICRO_BUCKETS)
+        self.submit_seconds = registry.histogram('simulation_submit_seconds', 'One submit() call.', MICRO_BUCKETS)
+
+    def render(self, reminders):
+        start = time.perf_counter()
+        rendered = render_reminders(reminders)
+        self.render_seconds.observe(time.perf_counter() - start)
+        return rendered
+
+    def send(self, user_id, title, message):
+        start = time.perf_counter()
+        self.dispatcher.submit(user_id, title, message)
+        self.submit_seconds.observe(time.perf_counter() - start)
+
+    def count(self, reminder):
+        self.per_minute.add(self.clock())
+
+    def fire(self, reminder):
+        """Job callback without coalescing: one push per reminder."""
+        self.per_minute.add(self.clock())
+        title, message = self.render([reminder])
+        self.send(reminder['user_id'], title, message)
+
+
+def simulate(users, start, provider_rate=None, coalesce=False, seed=0):
+    """
+    Loads the population, runs one virtual day from start (epoch seconds) and
+    returns a dict of results (see main() for how they are reported).
+    """
+    clock = VirtualClock(start)
+    registry = MetricsRegistry()
+    scheduler = ReminderScheduler(clock=clock, metrics=registry)
+    reminders_per_minute, pushes_per_minute = PerMinute(start), PerMinute(start)
+    dispatcher = StubDispatcher(clock, pushes_per_minute, provider_rate)
+    pipeline = Pipeline(clock, dispatcher, registry, reminders_per_minute)
+    callback = pipeline.fire
+    if coalesce:
+        coalescer = ReminderCoalescer(scheduler, pipeline.send, pipeline.render)
+
+        def callback(reminder):
+            pipeline.count(reminder)
+            coalescer.add(reminder)
+
+    memory_before = _max_rss()
+    load_start = time.perf_counter()
+    scheduler.add_daily_jobs((time_str, tz, callback, (reminder,))
+                             for time_str, tz, reminder in synthetic_population(users, seed=seed))
+    load_seconds = time.perf_counter() - load_start
+    memory_after = _max_rss()
+    jobs = len(scheduler)
+
+    end = start + DAY_SECONDS
+    ticks, busy = 0, 0.0
+    while True:
+        deadline = scheduler.next_deadline()
+        if deadline is None or deadline > end:  # every daily job fires once in (start, end]
+            break
+        clock.now = max(clock.now, deadline)  # still behind after a long tick: run at once
+        clock.busy()
+        tick_start = time.perf_counter()
+        scheduler.run_pending()
+        busy += time.perf_counter() - tick_start
+        clock.idle()
+        ticks += 1
+    if coalesce:
+        # Reminders due at the very end of the day have their flush scheduled just after it
+        clock.busy()
+        tick_start = time.perf_counter()
+        coalescer.flush(force=True)
+        busy += time.perf_counter() - tick_start
+        clock.idle()
+
+    fired = sum(reminders_per_minute.counts)
+    return {
+        'jobs': jobs,
+        'load_seconds': load_seconds,
+        'memory_mb': (memory_after - memory_before) / 1024 if memory_before is not None else None,
+        'ticks': ticks,
+        'busy_seconds': busy,
+        'fired': fired,
+        'pushes': dispatcher.submitted,
+        'reminders_per_minute': reminders_per_minute,
+        'pushes_per_minute': pushes_per_minute,
+        'fire_lag': registry.get('reminder_fire_lag_seconds'),
+        'render': pipeline.render_seconds,
+        'submit': pipeline.submit_seconds,
+        'scheduler_seconds': busy - pipeline.render_seconds.sum - pipeline.submit_seconds.sum,
+        'queue_delay': dispatcher.queue_delay if provider_rate else None,
+    }
+
+
+def _max_rss():
+    """Peak resident memory of this process in KiB (None where unsupported)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _quantiles(histogram, scale=1.0, unit='s'):
+    return ", ".join(f"p{int(q * 100)} <= {histogram.quantile(q) * scale:g} {unit}" for q in (0.5, 0.99, 1.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--provider-rate', type=float, default=None,
+                        help="model a provider sending this many pushes per second")
+    parser.add_argument('--coalesce', action='store_true', help="one push per user per minute (ReminderCoalescer)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = 1_767_225_600.0  # 2026-01-01 00:00 UTC
+    wall_start = time.perf_counter()
+    result = simulate(args.users, start, args.provider_rate, args.coalesce, args.seed)
+    wall = time.perf_counter() - wall_start
+    fired = result['fired']
+    if not fired:
+        raise SystemExit("no reminders fired")
+
+    memory = f", peak RSS +{result['memory_mb']:.0f} MB" if result['memory_mb'] is not None else ""
+    print(f"population : {args.users} users, {result['jobs']} daily reminders in {len(ZONES)} time zones")
+    print(f"load       : {result['load_seconds']:.1f} s to generate and register{memory}")
+    print(f"day        : 24 h simulated in {wall - result['load_seconds']:.1f} s ({result['ticks']} ticks, "
+          f"{fired / result['busy_seconds']:,.0f} reminders/s while busy)")
+    for label, per_minute, total in (('reminders', result['reminders_per_minute'], fired),
+                                     ('pushes', result['pushes_per_minute'], result['pushes'])):
+        busiest = ", ".join(f"{count} at {minute // 60:02d}:{minute % 60:02d} UTC"
+                            for count, minute in per_minute.busiest(3))
+        print(f"{label:<11}: {total} in total, busiest minutes {busiest}")
+    print(f"fire lag   : {_quantiles(result['fire_lag'])}")
+    print(f"per stage  : scheduler {result['scheduler_seconds'] / fired * 1e6:.2f} us/reminder, "
+          f"render {_quantiles(result['render'], 1e6, 'us')}, submit {_quantiles(result['submit'], 1e6, 'us')}")
+    if result['queue_delay'] is not None:
+        print(f"provider   : {args.provider_rate:g} pushes/s, queue wait {_quantiles(result['queue_delay'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Durable reminder jobs: a SQLite job store plus the glue that feeds it to a
+ReminderScheduler.
+
+ReminderStore keeps one row per daily reminder with its next fire time (UTC
+epoch seconds) under a partial index on active rows, so "what is due before T"
+is an index range scan however many jobs there are. The file is in WAL mode;
+bulk imports go in one transaction, and fire-time updates are buffered and
+written in batches.
+
+DurableReminders runs the store on a scheduler:
+
+    start()   replays reminders that came due while the process was down (if
+              they are at most `grace` seconds late; older ones are skipped and
+              moved to their next slot), then loads only the next `window` jobs
+              into the scheduler.
+    refill    when the scheduler reaches the last loaded job, the next window is
+              read from the index. Memory and restart work follow the window
+              size and the number of reminders missed during downtime, not the
+              total number of jobs.
+
+A job that fires is written back with its next fire time and, if that is still
+inside the loaded range, rescheduled in memory right away. Buffered updates are
+flushed every flush_interval seconds and before each refill. A crash can lose
+the last interval of updates; those reminders are then replayed on restart
+(at-least-once), which for medication is the safer way to fail.
+
+Usage:
+    store = ReminderStore("reminders.db")
+    store.import_jobs([("user_12345", "08:00", "America/New_York", med_data)])
+    scheduler = ReminderScheduler()
+    DurableReminders(store, scheduler, send_medication_notification).start()
+    scheduler.run_forever()
+"""
+import json
+import logging
+import sqlite3
+import time
+
+from reminder_engine import daily_trigger
+
+log = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+
+
+def latest_occurrence(trigger, now):
+    """The latest fire time of a daily trigger at or before now."""
+    moment = trigger(now - 2 * DAY_SECONDS)
+    following = trigger(moment)
+    while following <= now:
+        moment, following = following, trigger(following)
+    return moment
+
+
+class ReminderStore:
+    """Daily reminder jobs in a SQLite file, indexed by next fire time."""
+
+    def __init__(self, path, batch_size=1000):
+        """
+        Args:
+            path: SQLite file (created if missing).
+            batch_size (int): buffered fire-time updates are written once this many
+                are pending (or on flush()).
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = {}  # job id -> next fire time, not yet written
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            " id INTEGER PRIMARY KEY, user_id TEXT, time_str TEXT NOT NULL, tz TEXT,"
+            " payload TEXT NOT NULL, next_fire REAL NOT NULL, active INTEGER NOT NULL DEFAULT 1)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS reminders_due ON reminders (next_fire) WHERE active = 1")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM reminders WHERE active = 1").fetchone()[0]
+
+    def has_jobs(self):
+        return self.conn.execute("SELECT 1 FROM reminders WHERE active = 1 LIMIT 1").fetchone() is not None
+
+    def import_jobs(self, entries, now=None):
+        """
+        Adds daily reminders in one transaction.
+
+        Args:
+            entries: iterable of (user_id, time_str, tz, payload) tuples; payload is
+                any JSON-serializable value handed back to the callback.
+            now: epoch seconds the first fire times are computed from (default: now).
+
+        Returns:
+            (first_id, last_id) of the new rows (ids are consecutive), or None if
+            entries was empty.
+        """
+        now = time.time() if now is None else now
+        first_fire = {}  # (time_str, tz) -> next fire time
+
+        def rows():
+            for user_id, time_str, tz, payload in entries:
+                when = first_fire.get((time_str, tz))
+                if when is None:
+                    when = first_fire[(time_str, tz)] = daily_trigger(time_str, tz)(now)
+                yield user_id, time_str, tz, json.dumps(payload), when
+
+        with self.conn:
+            before = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM reminders").fetchone()[0]
+            self.conn.executemany(
+                "INSERT INTO reminders (user_id, time_str, tz, payload, next_fire) VALUES (?, ?, ?, ?, ?)", rows())
+            after = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM reminders").fetchone()[0]
+        return (before + 1, after) if after > before else None
+
+    def due_before(self, until, since=None, limit=None):
+        """
+        Active jobs with since <= next_fire < until, earliest first.
+
+        Returns:
+            List of (id, time_str, tz, payload JSON, next_fire) tuples.
+        """
+        sql = "SELECT id, time_str, tz, payload, next_fire FROM reminders WHERE active = 1 AND next_fire < ?"
+        params = [until]
+        if since is not None:
+            sql += " AND next_fire >= ?"
+            params.append(since)
+        sql += " ORDER BY next_fire, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def due_after(self, cursor, limit):
+        """
+        The next `limit` active jobs after cursor, a (next_fire, id) position,
+        earliest first (keyset pagination over the next-fire index).
+        """
+        when, job_id = cursor
+        return self.conn.execute(
+            "SELECT id, time_str, tz, payload, next_fire FROM reminders"
+            " WHERE active = 1 AND (next_fire > ? OR (next_fire = ? AND id > ?))"
+            " ORDER BY next_fire, id LIMIT ?", (when, when, job_id, limit)).fetchall()
+
+    def jobs_between(self, first_id, last_id):
+        """Active jobs by id range (as returned by import_jobs), in due_before's row format."""
+        return self.conn.execute(
+            "SELECT id, time_str, tz, payload, next_fire FROM reminders"
+            " WHERE id BETWEEN ? AND ? AND active = 1", (first_id, last_id)).fetchall()
+
+    def mark_fired(self, job_id, next_fire):
+        """Records a job's next fire time; written with the next batch."""
+        self._pending[job_id] = next_fire
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        with self.conn:
+            self.conn.executemany("UPDATE reminders SET next_fire = ? WHERE id = ?",
+                                  [(when, job_id) for job_id, when in pending.items()])
+
+    def deactivate(self, job_id):
+        self._pending.pop(job_id, None)
+        with self.conn:
+            self.conn.execute("UPDATE reminders SET active = 0 WHERE id = ?", (job_id,))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class DurableReminders:
+    """Runs the jobs of a ReminderStore on a ReminderScheduler, a window of jobs at a time."""
+
+    def __init__(self, store, scheduler, callback, window=10_000, grace=3600.0, flush_interval=5.0,
+                 on_missed=None):
+        """
+        Args:
+            store: ReminderStore holding the jobs.
+            scheduler: ReminderScheduler to run them on (its clock is used throughout).
+            callback: called as callback(payload) when a reminder is due.
+            window (int): how many upcoming jobs are loaded into the scheduler at a time.
+            grace (float): reminders missed by at most this many seconds are replayed
+                on start(); older ones are skipped.
+            flush_interval (float): seconds between writes of buffered updates.
+            on_missed: called as on_missed(payload, scheduled_at) for replayed
+                reminders (default: callback(payload)).
+        """
+        self.store = store
+        self.scheduler = scheduler
+        self.callback = callback
+        self.window = window
+        self.grace = grace
+        self.flush_interval = flush_interval
+        self.on_missed = on_missed or (lambda payload, scheduled_at: callback(payload))
+        self._loaded = {}  # job id -> in-memory Job, for jobs up to the cursor
+        self._cursor = None  # (next_fire, id) of the last loaded job; later jobs are still on disk
+        self.replayed = 0
+        self.skipped = 0
+
+    def start(self):
+        """Replays missed reminders and loads the first window. Returns (replayed, skipped)."""
+        now = self.scheduler.clock()
+        self.recover(now)
+        self._cursor = (now, -1)
+        self.refill()
+        self.scheduler.every(self.flush_interval, self.store.flush)
+        return self.replayed, self.skipped
+
+    def recover(self, now, chunk_size=10_000):
+        """Replays or skips every job whose stored fire time is before now, and moves it to its next slot."""
+        while True:
+            overdue = self.store.due_before(now, limit=chunk_size)
+            if not overdue:
+                return
+            for job_id, time_str, tz, payload, _ in overdue:
+                trigger = daily_trigger(time_str, tz)
+                missed_at = latest_occurrence(trigger, now)
+                if now - missed_at <= self.grace:
+                    self.replayed += 1
+                    try:
+                        self.on_missed(json.loads(payload), missed_at)
+                    except Exception as e:
+                        log.error("An unexpected error occurred replaying reminder %s: %s. Continuing.", job_id, e,
+                                  extra={'reminder_id': job_id, 'error_type': type(e).__name__})
+                else:
+                    self.skipped += 1
+                self.store.mark_fired(job_id, trigger(missed_at))
+            self.store.flush()
+
+    def refill(self):
+        """
+        Loads the next window of jobs after the cursor, and schedules the
+        following refill for when the scheduler reaches the last of them.
+        """
+        self.store.flush()
+        rows = self.store.due_after(self._cursor, self.window)
+        for row in rows:
+            self._load(row)
+        if len(rows) < self.window:
+            self._cursor = (float('inf'), 0)  # everything is loaded; fired jobs are re-added directly
+        else:
+            self._cursor = (rows[-1][4], rows[-1][0])
+            self.scheduler.schedule_at(self._cursor[0], self.refill)
+
+    def _load(self, row):
+        job_id, time_str, tz, payload, when = row
+        self._loaded[job_id] = self.scheduler.schedule_at(when, self._fire, job_id, time_str, tz, payload, when)
+
+    def _loaded_through(self, job_id, when):
+        return (when, job_id) <= self._cursor
+
+    def add_jobs(self, entries):
+        """ReminderStore.import_jobs, also scheduling the new jobs that fall in the loaded window."""
+        ids = self.store.import_jobs(entries, now=self.scheduler.clock())
+        if ids is not None and self._cursor is not None:
+            for row in self.store.jobs_between(*ids):
+                if self._loaded_through(row[0], row[4]):
+                    self._load(row)
+        return ids
+
+    def remove(self, job_id):
+        job = self._loaded.pop(job_id, None)
+        if job is not None:
+            self.scheduler.cancel(job)
+        self.store.deactivate(job_id)
+
+    def _fire(self, job_id, time_str, tz, payload, scheduled_at):
+        del self._loaded[job_id]
+        trigger = daily_trigger(time_str, tz)
+        following = trigger(scheduled_at)
+        now = self.scheduler.clock()
+        if following <= now:
+            following = trigger(now)
+        self.store.mark_fired(job_id, following)
+        if self._loaded_through(job_id, following):
+            self._load((job_id, time_str, tz, payload, following))
+        self.callback(json.loads(payload))
+
+    def close(self):
+        self.store.close()